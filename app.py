@@ -4,12 +4,13 @@ from flask_cors import CORS
 from blockchain.wallet_api import wallet_bp
 from blockchain.tx_api import tx_bp
 from blockchain.chain_api import chain_bp
-from transactions.utxo import UTXOSet
 from transactions.mempool import Mempool
 from blockchain.core import init_blockchain  
+from blockchain.verify import verify_chain, print_report
 from routes.node_routes import node_bp  # seu blueprint para node
 
-def create_app():
+def build_app(blockchain, mempool):
+    """App com todas as rotas sobre o estado dado (o do nó ou o de um worker de leitura)"""
     app = Flask(__name__)
     CORS(app, resources={
         r"/wallet/*": {"origins": "*"},
@@ -24,12 +25,8 @@ def create_app():
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         return response
 
-    # ✅ Inicializa a blockchain e carrega o singleton
-    blockchain = init_blockchain()
-
-    utxo_set = UTXOSet()
-    mempool = Mempool(utxo_set)
-    utxo_set.load_utxos()
+    # A API consulta a camada da mempool (confirmados + pendentes)
+    utxo_set = mempool.utxo_set
 
     app.register_blueprint(wallet_bp(utxo_set, mempool), url_prefix='/wallet')
     app.register_blueprint(tx_bp(utxo_set, mempool, blockchain), url_prefix='/transaction')
@@ -38,10 +35,26 @@ def create_app():
 
     return app
 
+def create_app(verify=False, verify_workers=None):
+    # ✅ Inicializa a blockchain e carrega o singleton
+    blockchain = init_blockchain()
+    if verify:
+        report = verify_chain(blockchain.chain, workers=verify_workers)
+        print_report(report)
+        if not report['ok']:
+            raise SystemExit(f"Chain inválida a partir da altura {report['first_failure']['height']}")
+
+    # A mempool é uma camada sobre os UTXOs confirmados da blockchain
+    mempool = Mempool(blockchain.utxo_set)
+    return build_app(blockchain, mempool)
+
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--verify', action='store_true', help='valida a chain inteira antes de subir')
+    parser.add_argument('--verify-workers', type=int, default=None)
     args = parser.parse_args()
 
-    app = create_app()
+    # Servidor de desenvolvimento; em produção use python -m sunaryum serve
+    app = create_app(verify=args.verify, verify_workers=args.verify_workers)
     app.run(host='0.0.0.0', port=args.port, debug=True)
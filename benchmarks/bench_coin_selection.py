@@ -0,0 +1,97 @@
+# benchmarks/bench_coin_selection.py
+# Latência da seleção de moedas e média de inputs por transação numa
+# carteira com muitos UTXOs pequenos (pagamentos diários de energia).
+#
+# 'sem troco' conta as seleções que dispensam a saída de troco (o bnb paga a
+# sobra <= COST_OF_CHANGE como fee). 'greedy' é a seleção antiga do
+# /transaction/new: percorre find_utxos na ordem em que os UTXOs chegaram até
+# cobrir o valor.
+#
+#   python benchmarks/bench_coin_selection.py [--utxos 10000,50000] [--payments 500]
+import sys
+import os
+import random
+import statistics
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from transactions.utxo import UTXOSet
+from transactions.coin_selection import select_coins, STRATEGIES, CoinSelectionError
+
+ADDRESS = 'a' * 40
+PUBLIC_KEY = '02' + 'b' * 64
+
+
+def make_wallet(size, rng):
+    utxo_set = UTXOSet()
+    for n in range(size):
+        if rng.random() < 0.3:
+            amount = 0.05                                 # pagamento fixo
+        else:
+            amount = round(rng.lognormvariate(-2, 1.2), 8)
+        utxo_set.add_utxo(ADDRESS, f"{n:064x}", 0, amount, PUBLIC_KEY)
+    return utxo_set
+
+
+def greedy(utxo_set, amount):
+    selected, total = [], 0.0
+    for utxo in utxo_set.find_utxos(ADDRESS):
+        selected.append(utxo)
+        total += utxo.amount
+        if total >= amount:
+            return selected
+    raise CoinSelectionError("Saldo insuficiente")
+
+
+def run(size, payments, max_inputs):
+    rng = random.Random(size)
+    utxo_set = make_wallet(size, rng)
+    amounts = [round(rng.uniform(0.5, 50), 8) for _ in range(payments)]
+
+    start = time.perf_counter()
+    utxo_set.utxos_by_amount(ADDRESS)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"\n{size:,} UTXOs (saldo {utxo_set.get_balance(ADDRESS):,.2f}), "
+          f"{payments} pagamentos, índice por valor montado em {build_ms:.1f} ms")
+    print(f"{'estratégia':>14} {'mediana':>10} {'p99':>10} {'inputs/tx':>10} {'sem troco':>10} {'falhas':>7}")
+
+    selectors = [('greedy', lambda a: greedy(utxo_set, a))]
+    for strategy in STRATEGIES:
+        selectors.append((strategy, lambda a, s=strategy: select_coins(
+            utxo_set, ADDRESS, a, strategy=s, max_inputs=max_inputs)))
+
+    for name, select in selectors:
+        times, inputs, no_change, failures = [], [], 0, 0
+        for amount in amounts:
+            start = time.perf_counter()
+            try:
+                result = select(amount)
+            except CoinSelectionError:
+                failures += 1
+                continue
+            times.append(time.perf_counter() - start)
+            if isinstance(result, list):
+                inputs.append(len(result))
+            else:
+                inputs.append(len(result.utxos))
+                no_change += result.change == 0
+        times.sort()
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        print(f"{name:>14} {statistics.median(times) * 1000:>8.3f}ms {p99 * 1000:>8.3f}ms "
+              f"{statistics.mean(inputs):>10.1f} {no_change:>10} {failures:>7}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--utxos', default='10000,50000')
+    parser.add_argument('--payments', type=int, default=500)
+    parser.add_argument('--max-inputs', type=int, default=500)
+    args = parser.parse_args()
+    for size in (int(s) for s in args.utxos.split(',')):
+        run(size, args.payments, args.max_inputs)
+
+
+if __name__ == '__main__':
+    main()
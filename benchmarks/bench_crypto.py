@@ -0,0 +1,57 @@
+# benchmarks/bench_crypto.py
+# Compara a velocidade dos backends de secp256k1 de blockchain/crypto
+# (cryptography x ecdsa). A concordância entre eles é conferida em
+# tests/test_crypto.py.
+#
+#   python benchmarks/bench_crypto.py [--ops 200] [--keys 50]
+import sys
+import os
+import hashlib
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain.crypto import PrivateKey, PublicKey, available_backends, BACKEND
+
+
+def timed(fn, count):
+    start = time.perf_counter()
+    for n in range(count):
+        fn(n)
+    return count / (time.perf_counter() - start)
+
+
+def bench(backend, ops, keys):
+    secrets = [hashlib.sha256(f"k{n}".encode()).digest() for n in range(keys)]
+    private = [PrivateKey(secret, backend) for secret in secrets]
+    publics = [sk.public_key.to_string('compressed') for sk in private]
+    digests = [hashlib.sha256(f"tx{n}".encode()).digest() for n in range(ops)]
+    signatures = [private[n % keys].sign_digest(digests[n]) for n in range(ops)]
+    parsed = [PublicKey.from_bytes(pub, backend) for pub in publics]
+    return {
+        'chave': timed(lambda n: PrivateKey(secrets[n % keys], backend).public_key, ops),
+        'parse': timed(lambda n: PublicKey.from_bytes(publics[n % keys], backend), ops),
+        'assinar': timed(lambda n: private[n % keys].sign_digest(digests[n]), ops),
+        'verificar': timed(lambda n: parsed[n % keys].verify_digest(signatures[n], digests[n]), ops),
+    }
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--keys', type=int, default=50)
+    args = parser.parse_args()
+
+    backends = available_backends()
+    print(f"backend padrão: {BACKEND}; disponíveis: {', '.join(backends)}")
+
+    print(f"{'backend':>14} {'chave/s':>10} {'parse/s':>10} {'assinar/s':>10} {'verificar/s':>12}")
+    for name, backend in backends.items():
+        rates = bench(backend, args.ops, args.keys)
+        print(f"{name:>14} {rates['chave']:>10,.0f} {rates['parse']:>10,.0f} "
+              f"{rates['assinar']:>10,.0f} {rates['verificar']:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_encoding.py
+# Compara o caminho antigo (json.dumps(sort_keys=True)) com o encoding binário
+# em tempo de hash e tamanho de armazenamento.
+#
+#   python benchmarks/bench_encoding.py [--txs 2000] [--blocks 50]
+import sys
+import os
+import json
+import hashlib
+import random
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain import encoding
+from blockchain.merkle import merkle_root
+
+
+def _hex(n):
+    return random.getrandbits(n * 8).to_bytes(n, 'big').hex()
+
+
+def make_tx(n_inputs=2, n_outputs=2):
+    tx = {
+        'version': encoding.TX_VERSION,
+        'sender': _hex(20),
+        'recipient': _hex(20),
+        'amount': round(random.uniform(0.1, 100), 8),
+        'timestamp': '2025-05-20T16:05:41.263875',
+        'inputs': [
+            {'txid': _hex(32), 'index': i, 'public_key': '03' + _hex(32), 'signature': _hex(64)}
+            for i in range(n_inputs)
+        ],
+        'outputs': [
+            {'address': _hex(20), 'amount': round(random.uniform(0.1, 100), 8), 'public_key': '03' + _hex(32)}
+            for _ in range(n_outputs)
+        ],
+    }
+    tx['signatures'] = [inp['signature'] for inp in tx['inputs']]
+    tx['txid'] = encoding.tx_hash(tx)
+    return tx
+
+
+def make_block(height, n_txs):
+    block = {
+        'version': encoding.BLOCK_VERSION,
+        'index': height,
+        'timestamp': '2025-05-20T16:24:55.036394-03:00',
+        'consolidated_energy': 1234.5,
+        'transactions': [make_tx() for _ in range(n_txs)],
+        'node_count': 10,
+        'previous_hash': _hex(32),
+    }
+    block['merkle_root'] = merkle_root([tx['txid'] for tx in block['transactions']])
+    return block
+
+
+def json_tx_hash(tx):
+    body = {k: v for k, v in tx.items() if k not in ('signatures', 'txid')}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def json_block_hash(block):
+    return hashlib.sha256(json.dumps(block, sort_keys=True).encode()).hexdigest()
+
+
+def timed(fn, items, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--txs', type=int, default=2000)
+    parser.add_argument('--blocks', type=int, default=50)
+    parser.add_argument('--txs-per-block', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(1)
+    txs = [make_tx() for _ in range(args.txs)]
+    blocks = [make_block(h, args.txs_per_block) for h in range(args.blocks)]
+
+    t_json = timed(json_tx_hash, txs)
+    t_bin = timed(encoding.tx_hash, txs)
+    print(f"Hash de transação ({args.txs} txs)")
+    print(f"  json    {args.txs / t_json:12,.0f} tx/s")
+    print(f"  binário {args.txs / t_bin:12,.0f} tx/s  ({t_json / t_bin:.1f}x)")
+
+    t_json = timed(json_block_hash, blocks)
+    t_bin = timed(encoding.header_hash, blocks)
+    print(f"Hash de bloco ({args.blocks} blocos x {args.txs_per_block} txs)")
+    print(f"  json    {args.blocks / t_json:12,.0f} blocos/s")
+    print(f"  binário {args.blocks / t_bin:12,.0f} blocos/s  ({t_json / t_bin:.1f}x)")
+
+    size_json_indent = sum(len(json.dumps(b, indent=2)) for b in blocks)
+    size_json = sum(len(json.dumps(b, separators=(',', ':'))) for b in blocks)
+    size_bin = sum(len(encoding.encode_block(b)) for b in blocks)
+    print("Tamanho armazenado (blocos completos, com assinaturas)")
+    print(f"  json indent=2  {size_json_indent:12,} bytes")
+    print(f"  json compacto  {size_json:12,} bytes")
+    print(f"  binário        {size_bin:12,} bytes  ({size_json_indent / size_bin:.1f}x menor que indent=2)")
+    print(f"  cabeçalho binário: {encoding.HEADER.size} bytes fixos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_mempool_index.py
+# Operações da mempool indexada (MempoolIndex) x lista antiga:
+#   seleção  -> as 100 de maior fee para o bloco
+#   remoção  -> 100 transações confirmadas
+#   conflito -> o outpoint já é gasto por alguma pendente?
+#
+# Só os índices são medidos (sem validação de UTXOs nem persistência).
+#
+#   python benchmarks/bench_mempool_index.py [--sizes 10000,100000,1000000]
+import sys
+import os
+import random
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from transactions.mempool_index import MempoolIndex
+
+SELECT = 100
+REMOVE = 100
+LOOKUPS = 1000
+
+
+def make_txs(size, rng):
+    txs = []
+    for n in range(size):
+        txs.append({
+            'version': 2,
+            'txid': f"{n:064x}",
+            'timestamp': f"2024-01-01T00:00:{n % 60:02d}",
+            'fee': round(rng.uniform(0.0001, 0.01), 8),
+            'inputs': [{'txid': f"{n + size:064x}", 'index': 0, 'public_key': '02' + 'a' * 64, 'signature': 'b' * 140}],
+            'outputs': [{'address': 'c' * 40, 'amount': 1.0, 'public_key': '02' + 'a' * 64}],
+        })
+    return txs
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def legacy(txs, confirmed, outpoints):
+    pool = list(txs)
+    select, _ = timed(lambda: sorted(pool, key=lambda x: (-x.get('fee', 0), x['timestamp']))[:SELECT], 3)
+    lookup, _ = timed(lambda: [
+        any((i['txid'], i['index']) == op for tx in pool for i in tx['inputs']) for op in outpoints[:10]
+    ])
+    remove, _ = timed(lambda: [tx for tx in pool if tx['txid'] not in confirmed])
+    return select, remove, lookup / 10
+
+
+def indexed(txs, confirmed, outpoints):
+    index = MempoolIndex()
+    build, _ = timed(lambda: [index.add(index.make_entry(tx, time.time())) for tx in txs])
+    select, _ = timed(lambda: index.best(SELECT), 100)
+    lookup, _ = timed(lambda: [index.spender_of(*op) for op in outpoints])
+    remove, _ = timed(lambda: [index.remove(txid) for txid in confirmed])
+    return build, select, remove, lookup / len(outpoints)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    args = parser.parse_args()
+
+    print(f"{'entradas':>10} {'':>8} {'seleção':>11} {'remoção':>11} {'conflito':>11} {'inserção/tx':>12}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        rng = random.Random(size)
+        txs = make_txs(size, rng)
+        confirmed = [tx['txid'] for tx in rng.sample(txs, REMOVE)]
+        outpoints = [(f"{rng.randrange(size, 2 * size):064x}", 0) for _ in range(LOOKUPS)]
+
+        select, remove, lookup = legacy(txs, confirmed, outpoints)
+        print(f"{size:>10,} {'lista':>8} {select * 1000:>9.2f}ms {remove * 1000:>9.2f}ms {lookup * 1e6:>9.1f}µs")
+        build, select, remove, lookup = indexed(txs, confirmed, outpoints)
+        print(f"{'':>10} {'índice':>8} {select * 1000:>9.3f}ms {remove * 1000:>9.3f}ms {lookup * 1e6:>9.2f}µs "
+              f"{build / size * 1e6:>10.1f}µs")
+        del txs
+
+
+if __name__ == '__main__':
+    main()
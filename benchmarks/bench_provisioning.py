@@ -0,0 +1,45 @@
+# benchmarks/bench_provisioning.py
+# Vazão do provisionamento de carteiras em lote (WalletProvisioner) por
+# número de processos: geração de mnemônica + PBKDF2 + chave secp256k1.
+#
+# Cada rodada usa um provisionador novo; a subida do pool fica fora da medida.
+# Confere também que importar as mnemônicas geradas devolve as mesmas chaves.
+#
+#   python benchmarks/bench_provisioning.py [--wallets 500] [--workers 1,2,4]
+import sys
+import os
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain.provisioning import WalletProvisioner
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--wallets', type=int, default=500)
+    parser.add_argument('--workers', default='1,2,4')
+    args = parser.parse_args()
+
+    print(f"{args.wallets} carteiras ({os.cpu_count()} núcleos)")
+    print(f"{'processos':>10} {'tempo':>10} {'carteiras/s':>13}")
+    generated = None
+    for workers in (int(w) for w in args.workers.split(',')):
+        provisioner = WalletProvisioner(workers=workers, min_parallel=0)
+        list(provisioner.provision([None] * workers))
+        start = time.perf_counter()
+        generated = list(provisioner.provision([None] * args.wallets))
+        elapsed = time.perf_counter() - start
+        provisioner.close()
+        assert not any('error' in w for w in generated)
+        print(f"{workers:>10} {elapsed:>9.2f}s {args.wallets / elapsed:>13,.0f}")
+
+    sample = generated[:20]
+    imported = list(WalletProvisioner(workers=1).provision([w['mnemonic'] for w in sample]))
+    assert imported == sample, "importar a mnemônica não devolveu a mesma carteira"
+    print("importação das mnemônicas geradas confere")
+
+
+if __name__ == '__main__':
+    main()
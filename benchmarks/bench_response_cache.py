@@ -0,0 +1,92 @@
+# benchmarks/bench_response_cache.py
+# Pedidos/s das rotas de leitura com o cache de respostas vazio a cada pedido
+# (como se a chain mudasse sempre), com o cache quente e com If-None-Match
+# (304), pelo cliente de testes do Flask.
+#
+# Roda num diretório temporário com o backend SQLite: uma chain com um bloco
+# que dá --coins moedas a um endereço e --pending transferências na mempool.
+#
+#   python benchmarks/bench_response_cache.py [--coins 2000] [--pending 500] [--requests 200]
+import sys
+import os
+import io
+import hashlib
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TMP = tempfile.mkdtemp(prefix='sunaryum-bench-')
+os.environ['SUNARYUM_DATA_DIR'] = TMP
+os.environ['SUNARYUM_SQLITE_PATH'] = os.path.join(TMP, 'sunaryum.db')
+os.environ['SUNARYUM_STORAGE'] = 'sqlite'
+os.environ['SUNARYUM_MEMPOOL_TTL'] = '0'
+
+from blockchain import encoding
+from blockchain.crypto import PrivateKey
+from blockchain.tx_builder import create_transfer
+from blockchain.response_cache import response_cache
+
+SENDER = 'c' * 40
+
+
+def make_client(coins, pending):
+    import blockchain.core as core
+    from app import create_app
+    from transactions.mempool import Mempool
+
+    key = PrivateKey(hashlib.sha256(b'bench-cache').digest())
+    pub = key.public_key.to_string('compressed').hex()
+    with redirect_stdout(io.StringIO()):
+        bc = core.init_blockchain()
+        mint = {'version': encoding.TX_VERSION, 'type': 'mint', 'timestamp': '2024-01-01T00:00:00', 'inputs': [],
+                'outputs': [{'address': SENDER, 'amount': 1.0, 'public_key': pub} for _ in range(coins)]}
+        mint['txid'] = encoding.tx_hash(mint)
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1, 'transactions': [mint]}
+        bc.add_block()
+        txs = [create_transfer(key, SENDER, f"{n:040x}", 0.5, [{'txid': mint['txid'], 'index': n, 'amount': 1.0}])
+               for n in range(pending)]
+        Mempool(bc.utxo_set).add_transactions(txs)
+        return create_app().test_client()
+
+
+def rate(client, path, count, cold=False, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for _ in range(count):
+            if cold:
+                response_cache.clear()
+            client.get(path, headers=headers)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--coins', type=int, default=2000)
+    parser.add_argument('--pending', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        client = make_client(args.coins, args.pending)
+        paths = ['/chain/', f'/wallet/balance/{SENDER}', f'/wallet/transactions/{SENDER}', '/transaction/pending']
+        print(f"{'rota':<58} {'sem cache/s':>12} {'cache/s':>10} {'304/s':>10}")
+        for path in paths:
+            cold = rate(client, path, args.requests, cold=True)
+            warm = rate(client, path, args.requests)
+            with redirect_stdout(io.StringIO()):
+                etag = client.get(path).headers['ETag']
+            not_modified = rate(client, path, args.requests, etag=etag)
+            print(f"{path:<58} {cold:>12,.0f} {warm:>10,.0f} {not_modified:>10,.0f}")
+        stats = response_cache.stats()
+        print(f"cache: {stats['size']} entradas, {stats['bytes']:,} bytes")
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
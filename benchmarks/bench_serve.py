@@ -0,0 +1,185 @@
+# benchmarks/bench_serve.py
+# Teste de carga de python -m sunaryum serve: pedidos/s nas rotas de leitura
+# por número de workers.
+#
+# Monta num diretório temporário (backend SQLite) uma chain com um bloco que
+# dá moedas a um endereço e uma mempool com transações assinadas; para cada
+# número de workers sobe o servidor, confere que uma transação enviada ao
+# escritor (repassada por um worker) aparece nas leituras e mede a vazão com
+# clientes em processos separados, cada pedido numa conexão nova.
+#
+# Os clientes dividem a CPU com o servidor: a escala com o número de workers
+# só aparece com núcleos livres para eles.
+#
+#   python benchmarks/bench_serve.py [--workers 1,2,4] [--clients 8] [--seconds 5]
+import sys
+import os
+import io
+import json
+import hashlib
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import http.client
+import multiprocessing
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+TMP = tempfile.mkdtemp(prefix='sunaryum-serve-')
+os.environ['SUNARYUM_DATA_DIR'] = TMP
+os.environ['SUNARYUM_SQLITE_PATH'] = os.path.join(TMP, 'sunaryum.db')
+os.environ['SUNARYUM_STORAGE'] = 'sqlite'
+
+from blockchain import encoding
+from blockchain.crypto import PrivateKey
+from blockchain.tx_builder import create_transfer
+
+SENDER = 'e' * 40
+
+
+def seed(coins, pending):
+    """Chain com coins moedas para SENDER e pending transferências na mempool"""
+    import blockchain.core as core
+    from storage.backend import get_storage
+    from transactions.mempool import Mempool
+
+    key = PrivateKey(hashlib.sha256(b'bench-serve').digest())
+    pub = key.public_key.to_string('compressed').hex()
+    with redirect_stdout(io.StringIO()):
+        bc = core.init_blockchain()
+        mint = {'version': encoding.TX_VERSION, 'type': 'mint', 'timestamp': '2024-01-01T00:00:00', 'inputs': [],
+                'outputs': [{'address': SENDER, 'amount': 1.0, 'public_key': pub} for _ in range(coins)]}
+        mint['txid'] = encoding.tx_hash(mint)
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1, 'transactions': [mint]}
+        bc.add_block()
+        txs = [create_transfer(key, SENDER, f"{n:040x}", 0.5, [{'txid': mint['txid'], 'index': n, 'amount': 1.0}])
+               for n in range(pending)]
+        assert not any(Mempool(bc.utxo_set).add_transactions(txs))
+    get_storage().conn.close()
+    # A última moeda fica livre para a transação enviada durante a conferência
+    spare = create_transfer(key, SENDER, 'f' * 40, 0.5, [{'txid': mint['txid'], 'index': coins - 1, 'amount': 1.0}])
+    return spare
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def start_server(port, workers, sync_interval):
+    env = dict(os.environ, SUNARYUM_MEMPOOL_TTL='0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'sunaryum', 'serve', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--sync-interval', str(sync_interval)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if request(port, 'GET', '/chain/?headers=1')[0] == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit('servidor não subiu')
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def check_write(port, tx, workers, sync_interval):
+    """A transação enviada a um worker chega ao escritor e a todos os workers"""
+    status, body = request(port, 'POST', '/transaction/submit', json.dumps(tx))
+    assert status == 200, body
+    time.sleep(sync_interval * 2 + 0.1)
+    for _ in range(workers * 4):
+        status, body = request(port, 'GET', f"/transaction/{tx['txid']}")
+        assert status == 200 and json.loads(body)['status'] == 'pending', body
+
+
+def client(port, paths, seconds, results):
+    done = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status, _ = request(port, 'GET', paths[done % len(paths)])
+        assert status == 200
+        latencies.append(time.perf_counter() - start)
+        done += 1
+    results.put((done, sorted(latencies)[len(latencies) // 2] if latencies else 0))
+
+
+def load(port, paths, clients, seconds):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(port, paths, seconds, results)) for _ in range(clients)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    total = sum(done for done, _ in rows)
+    return total / seconds, sorted(median for _, median in rows)[len(rows) // 2]
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--coins', type=int, default=500)
+    parser.add_argument('--pending', type=int, default=200)
+    parser.add_argument('--sync-interval', type=float, default=0.1)
+    args = parser.parse_args()
+
+    try:
+        spare = seed(args.coins, args.pending)
+        paths = ['/chain/?headers=1', f'/wallet/balance/{SENDER}', '/transaction/pending',
+                 '/chain/block/1', f"/transaction/{spare['inputs'][0]['txid']}"]
+        print(f"{os.cpu_count()} núcleos, {args.clients} clientes, {args.seconds:g}s por rodada")
+        print(f"{'workers':>8} {'pedidos/s':>10} {'mediana':>9}")
+        shutil.copy(os.path.join(TMP, 'sunaryum.db'), os.path.join(TMP, 'base.db'))
+        for workers in (int(w) for w in args.workers.split(',')):
+            port = free_port()
+            server = start_server(port, workers, args.sync_interval)
+            try:
+                check_write(port, spare, workers, args.sync_interval)
+                rate, median = load(port, paths, args.clients, args.seconds)
+            finally:
+                stop_server(server)
+                # A próxima rodada começa sem a transação da conferência
+                shutil.copy(os.path.join(TMP, 'base.db'), os.path.join(TMP, 'sunaryum.db'))
+                for suffix in ('-wal', '-shm'):
+                    path = os.path.join(TMP, 'sunaryum.db' + suffix)
+                    if os.path.exists(path):
+                        os.remove(path)
+            print(f"{workers:>8} {rate:>10,.0f} {median * 1000:>8.1f}ms")
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_sigcache.py
+# Custo da verificação de assinaturas de um lote de transações nas duas
+# passadas do nó: entrada na mempool (cache frio) e montagem do bloco (as
+# mesmas transações de novo, cache quente).
+#
+#   python benchmarks/bench_sigcache.py [--txs 200] [--inputs 2] [--keys 20]
+import sys
+import os
+import io
+import hashlib
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain.crypto import PrivateKey
+from transactions.utxo import is_valid_transaction
+from transactions.sigcache import cache_stats, clear_caches
+
+
+def make_txs(count, inputs, keys):
+    signers = [PrivateKey(hashlib.sha256(f"k{n}".encode()).digest())
+               for n in range(keys)]
+    txs = []
+    for n in range(count):
+        sk = signers[n % keys]
+        pub = sk.public_key.to_string('compressed').hex()
+        txid = hashlib.sha256(f"tx{n}".encode()).hexdigest()
+        txs.append({'txid': txid, 'inputs': [
+            {'txid': '0' * 64, 'index': i, 'public_key': pub,
+             'signature': sk.sign_digest(hashlib.sha256(f"{txid}:{i}".encode()).digest()).hex()}
+            for i in range(inputs)
+        ]})
+    return txs
+
+
+def validate_all(txs):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):        # is_valid_transaction loga cada input
+        for tx in txs:
+            assert is_valid_transaction(tx, None)[0]
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--txs', type=int, default=200)
+    parser.add_argument('--inputs', type=int, default=2)
+    parser.add_argument('--keys', type=int, default=20)
+    args = parser.parse_args()
+
+    txs = make_txs(args.txs, args.inputs, args.keys)
+    sigs = args.txs * args.inputs
+    clear_caches()
+    cold = validate_all(txs)
+    warm = validate_all(txs)
+    stats = cache_stats()
+
+    print(f"{sigs} assinaturas, {args.keys} chaves")
+    print(f"  mempool (frio)  {cold * 1000:>9.1f}ms  {sigs / cold:>10,.0f} assinaturas/s")
+    print(f"  bloco (quente)  {warm * 1000:>9.1f}ms  {sigs / warm:>10,.0f} assinaturas/s")
+    for name, s in stats.items():
+        print(f"  cache {name:<10} hits {s['hits']:>7}  misses {s['misses']:>7}  tamanho {s['size']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_sigverify.py
+# Vazão da verificação de assinaturas em lote (SignatureVerifier) por número
+# de processos, e latência de um lote pequeno (que fica no processo atual).
+#
+# Cada rodada usa um verificador novo e o cache de assinaturas vazio; a
+# primeira chamada ao pool (subida dos processos) fica fora da medida.
+#
+#   python benchmarks/bench_sigverify.py [--sigs 2000] [--workers 1,2,4] [--keys 50]
+import sys
+import os
+import hashlib
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain.crypto import PrivateKey
+from transactions.sigcache import clear_caches
+from transactions.sigverify import SignatureVerifier, signing_digest
+
+
+def make_jobs(count, keys, salt=''):
+    signers = [PrivateKey(hashlib.sha256(f"k{n}".encode()).digest())
+               for n in range(keys)]
+    publics = [sk.public_key.to_string('compressed').hex() for sk in signers]
+    jobs = []
+    for n in range(count):
+        digest = signing_digest(hashlib.sha256(f"{salt}tx{n}".encode()).hexdigest(), 0)
+        jobs.append((publics[n % keys], digest, signers[n % keys].sign_digest(digest).hex()))
+    return jobs
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--sigs', type=int, default=2000)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--keys', type=int, default=50)
+    parser.add_argument('--small', type=int, default=8, help='tamanho do lote pequeno')
+    args = parser.parse_args()
+
+    print(f"gerando {args.sigs} assinaturas ({os.cpu_count()} núcleos)")
+    jobs = make_jobs(args.sigs, args.keys)
+    warmup = make_jobs(args.keys, args.keys, salt='w')
+    small = make_jobs(args.small, args.keys, salt='s')
+
+    print(f"{'processos':>10} {'tempo':>10} {'assinaturas/s':>15}")
+    for workers in (int(w) for w in args.workers.split(',')):
+        verifier = SignatureVerifier(workers=workers, min_parallel=0)
+        clear_caches()
+        verifier.verify(warmup)
+        start = time.perf_counter()
+        results = verifier.verify(jobs)
+        elapsed = time.perf_counter() - start
+        verifier.close()
+        assert all(results)
+        print(f"{workers:>10} {elapsed:>9.2f}s {len(jobs) / elapsed:>15,.0f}")
+
+    verifier = SignatureVerifier(workers=4)
+    clear_caches()
+    start = time.perf_counter()
+    assert all(verifier.verify(small))
+    elapsed = time.perf_counter() - start
+    verifier.close()
+    print(f"lote de {args.small} (no processo atual): {elapsed * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
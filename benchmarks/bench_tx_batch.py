@@ -0,0 +1,116 @@
+# benchmarks/bench_tx_batch.py
+# Vazão de transferências pelo cliente de testes do Flask:
+#   /new    -> N pedidos, o servidor assina cada um
+#   /submit -> N pedidos já assinados no cliente (tx_builder; assinatura fora
+#              da medida), o servidor só verifica
+#   /batch  -> um pedido com N itens
+#
+# Roda num diretório temporário com o backend SQLite (não toca em data/ nem
+# no mempool.json do repositório). Cada rodada começa de uma chain nova com
+# um bloco que dá N moedas ao remetente.
+#
+#   python benchmarks/bench_tx_batch.py [--sizes 100,500,1000]
+import sys
+import os
+import io
+import hashlib
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TMP = tempfile.mkdtemp(prefix='sunaryum-bench-')
+os.environ['SUNARYUM_DATA_DIR'] = TMP
+os.environ['SUNARYUM_SQLITE_PATH'] = os.path.join(TMP, 'sunaryum.db')
+os.environ['SUNARYUM_STORAGE'] = 'sqlite'
+
+from blockchain import encoding
+from blockchain.crypto import PrivateKey
+from blockchain.tx_builder import create_transfer
+
+SENDER = 'd' * 40
+
+
+def fresh_app(size, key):
+    """App novo sobre um banco vazio, com size moedas de 1.0 para SENDER"""
+    import config
+    import storage.backend
+    import blockchain.core as core
+    config.SQLITE_PATH = tempfile.mktemp(suffix='.db', dir=TMP)
+    storage.backend._storage = None
+    core._blockchain = None
+
+    from app import create_app
+    with redirect_stdout(io.StringIO()):
+        bc = core.init_blockchain()
+        pub = key.public_key.to_string('compressed').hex()
+        mint = {'version': encoding.TX_VERSION, 'type': 'mint', 'timestamp': '2024-01-01T00:00:00', 'inputs': [],
+                'outputs': [{'address': SENDER, 'amount': 1.0, 'public_key': pub} for _ in range(size)]}
+        mint['txid'] = encoding.tx_hash(mint)
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1, 'transactions': [mint]}
+        bc.add_block()
+        return create_app().test_client(), mint
+
+
+def transfers(size, key):
+    return [{'sender': SENDER, 'recipient': f"{n:040x}", 'amount': 0.5, 'private_key': key.secret.hex()}
+            for n in range(size)]
+
+
+def run_single(client, items):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for item in items:
+            assert client.post('/transaction/new', json=item).status_code == 200
+    return time.perf_counter() - start
+
+
+def signed_transfers(size, key, mint):
+    coins = [{'txid': mint['txid'], 'index': n, 'amount': 1.0} for n in range(size)]
+    return [create_transfer(key, SENDER, f"{n:040x}", 0.5, coins[n:n + 1]) for n in range(size)]
+
+
+def run_submit(client, txs):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for tx in txs:
+            response = client.post('/transaction/submit', json=tx)
+            assert response.status_code == 200, response.get_json()
+    return time.perf_counter() - start
+
+
+def run_batch(client, items):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        response = client.post('/transaction/batch', json={'transactions': items})
+    elapsed = time.perf_counter() - start
+    assert response.get_json()['accepted'] == len(items), response.get_json()['results'][:3]
+    return elapsed
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', default='100,500,1000')
+    args = parser.parse_args()
+
+    key = PrivateKey(hashlib.sha256(b'bench-batch').digest())
+    print(f"{'transações':>11} {'/new tx/s':>10} {'/submit tx/s':>13} {'/batch tx/s':>12}")
+    try:
+        for size in (int(s) for s in args.sizes.split(',')):
+            items = transfers(size, key)
+            client, _ = fresh_app(size, key)
+            single = run_single(client, items)
+            client, mint = fresh_app(size, key)
+            submit = run_submit(client, signed_transfers(size, key, mint))
+            client, _ = fresh_app(size, key)
+            batch = run_batch(client, items)
+            print(f"{size:>11} {size / single:>10,.0f} {size / submit:>13,.0f} {size / batch:>12,.0f}")
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
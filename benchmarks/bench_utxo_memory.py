@@ -0,0 +1,104 @@
+# benchmarks/bench_utxo_memory.py
+# Memória do UTXOSet compacto x layout antigo (objetos com __dict__ num
+# dict-de-dicts com strings hex completas e valores float).
+#
+# Cada medição roda num subprocesso separado e usa o pico de RSS.
+#
+#   python benchmarks/bench_utxo_memory.py [--sizes 1000000,10000000]
+import sys
+import os
+import random
+import resource
+import subprocess
+import time
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+OUTPUTS_PER_TX = 2
+UTXOS_PER_ADDRESS = 20
+
+
+class LegacyUTXO:
+    def __init__(self, txid, index, address, amount, public_key):
+        self.txid = txid
+        self.index = index
+        self.address = address
+        self.amount = amount
+        self.public_key = public_key
+
+
+class LegacyUTXOSet:
+    def __init__(self):
+        self.utxos = {}
+
+    def add_utxo(self, address, txid, index, amount, public_key):
+        if txid not in self.utxos:
+            self.utxos[txid] = {}
+        self.utxos[txid][index] = LegacyUTXO(txid, index, address, amount, public_key)
+
+
+def _hex(rng, n):
+    return rng.getrandbits(n * 8).to_bytes(n, 'big').hex()
+
+
+def fill(utxo_set, size):
+    rng = random.Random(1)
+    n_addresses = max(1, size // UTXOS_PER_ADDRESS)
+    # Cada endereço tem sua chave; as strings vêm da rede/JSON, então cada
+    # saída carrega sua própria cópia (como no json.load do utxos.json).
+    wallets = [(_hex(rng, 20), '03' + _hex(rng, 32)) for _ in range(n_addresses)]
+    for n in range(0, size, OUTPUTS_PER_TX):
+        txid = _hex(rng, 32)
+        for index in range(min(OUTPUTS_PER_TX, size - n)):
+            address, public_key = wallets[rng.randrange(n_addresses)]
+            utxo_set.add_utxo(
+                ''.join(address), txid, index,
+                round(rng.uniform(0.001, 100), 8), ''.join(public_key)
+            )
+
+
+def _max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def child(layout, size):
+    from transactions.utxo import UTXOSet
+    base = _max_rss_bytes()
+    utxo_set = UTXOSet() if layout == 'compact' else LegacyUTXOSet()
+    start = time.perf_counter()
+    if layout == 'compact':
+        # Como em Blockchain._rebuild_utxos: o conjunto é montado do zero
+        utxo_set.clear()
+    fill(utxo_set, size)
+    elapsed = time.perf_counter() - start
+    print(f"{_max_rss_bytes() - base} {elapsed}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', default='1000000,10000000')
+    parser.add_argument('--child', nargs=2, metavar=('LAYOUT', 'SIZE'))
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'UTXOs':>12} {'layout':>8} {'memória':>12} {'bytes/UTXO':>11} {'carga':>9}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        results = {}
+        for layout in ('legacy', 'compact'):
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', layout, str(size)],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            used, elapsed = int(out[-2]), float(out[-1])
+            results[layout] = used
+            print(f"{size:>12,} {layout:>8} {used / 2**20:>9,.0f} MB {used / size:>11,.0f} {elapsed:>8.1f}s")
+        print(f"{'':>12} {'':>8} {results['legacy'] / results['compact']:>9.1f}x menor")
+
+
+if __name__ == '__main__':
+    main()
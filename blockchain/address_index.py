@@ -0,0 +1,151 @@
+# blockchain/address_index.py
+# Histórico de transações por endereço, mantido bloco a bloco.
+#
+# Cada transação gera no máximo uma entrada por endereço, com as mesmas
+# regras que /wallet/transactions sempre usou: o remetente tem um envio (soma
+# das saídas para outros endereços) e cada outro endereço das saídas tem um
+# recebimento (soma das saídas para ele).
+#
+# As entradas de um endereço ficam em ordem de chain (altura, posição), então
+# a página mais nova é lida de trás para frente a partir do cursor, sem
+# ordenar nada. O arquivo em disco é append-only (uma linha por bloco) e,
+# como tudo vem da chain, é reconstruído no load se sumir ou não bater com ela.
+import json
+import os
+from bisect import bisect_left
+from blockchain.encoding import to_base_units, from_base_units
+
+MEMPOOL_CURSOR = 'mempool'
+
+
+def tx_entries(tx):
+    """[(endereço, 'sent' | 'received', unidades base)] de uma transação"""
+    sender = tx.get('sender')
+    sent = 0
+    received = {}
+    for out in tx.get('outputs', []):
+        address = out.get('address')
+        units = to_base_units(out.get('amount', 0))
+        if address == sender:
+            continue
+        if sender:
+            sent += units
+        received[address] = received.get(address, 0) + units
+    entries = [(sender, 'sent', sent)] if sender and sent > 0 else []
+    entries += [(address, 'received', units) for address, units in received.items() if units > 0]
+    return entries
+
+
+def block_entries(block):
+    """[(endereço, posição, txid, tipo, unidades)] de um bloco"""
+    return [
+        (address, pos, tx['txid'], kind, units)
+        for pos, tx in enumerate(block.get('transactions', []))
+        for address, kind, units in tx_entries(tx)
+    ]
+
+
+def history_item(txid, kind, units, date, status, cursor):
+    return {'txid': txid, 'type': f'{kind} ({status})', 'amount': from_base_units(units),
+            'date': date, 'cursor': cursor}
+
+
+def parse_cursor(cursor):
+    """'mempool:<seq>' -> ('mempool', seq); '<altura>:<posição>' -> ('chain', (altura, posição))"""
+    head, sep, tail = cursor.partition(':')
+    if not sep:
+        raise ValueError(f"cursor inválido: '{cursor}'")
+    if head == MEMPOOL_CURSOR:
+        return MEMPOOL_CURSOR, int(tail)
+    return 'chain', (int(head), int(tail))
+
+
+class AddressIndex:
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.entries = {}       # endereço -> [(altura, posição, txid, tipo, unidades)]
+        self.dates = []         # altura -> timestamp do bloco
+        self.hashes = []        # altura -> hash, para conferir com a chain
+
+    @property
+    def height(self):
+        return len(self.hashes)
+
+    def _index_block(self, height, block_hash, date, entries):
+        for address, pos, txid, kind, units in entries:
+            self.entries.setdefault(address, []).append((height, pos, txid, kind, units))
+        self.dates.append(date)
+        self.hashes.append(block_hash)
+
+    @staticmethod
+    def _line(height, block, entries):
+        return json.dumps({
+            'height': height,
+            'hash': block['hash'],
+            'date': block.get('timestamp'),
+            'entries': entries
+        }, separators=(',', ':')) + '\n'
+
+    def load(self, chain):
+        """Carrega o índice do disco e indexa os blocos que estiverem faltando"""
+        self.entries = {}
+        self.dates = []
+        self.hashes = []
+
+        lines = []
+        truncated = False
+        try:
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        truncated = True  # escrita interrompida no meio da linha
+                        break
+        except FileNotFoundError:
+            pass
+
+        consistent = (
+            not truncated
+            and len(lines) <= len(chain)
+            and all(line['height'] == h for h, line in enumerate(lines))
+            and (not lines or chain[len(lines) - 1]['hash'] == lines[-1]['hash'])
+        )
+        if not consistent:
+            print(f"[INDEX] {self.index_file} não confere com a chain, reconstruindo")
+            lines = []
+
+        for line in lines:
+            self._index_block(line['height'], line['hash'], line['date'], [tuple(e) for e in line['entries']])
+
+        if self.height < len(chain):
+            missing = chain[self.height:]
+            mode = 'a' if lines else 'w'
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(self.index_file, mode) as f:
+                for block in missing:
+                    self._append(f, block)
+            print(f"[INDEX] Histórico por endereço: {len(missing)} blocos indexados")
+
+    def _append(self, f, block):
+        height = self.height
+        entries = block_entries(block)
+        self._index_block(height, block['hash'], block.get('timestamp'), entries)
+        f.write(self._line(height, block, entries))
+
+    def add_block(self, block):
+        with open(self.index_file, 'a') as f:
+            self._append(f, block)
+
+    def history(self, address, before=None, limit=None):
+        """Entradas confirmadas de address, da mais nova para a mais velha.
+
+        before é (altura, posição) de um cursor: só entram as anteriores a ele.
+        """
+        entries = self.entries.get(address, [])
+        end = len(entries) if before is None else bisect_left(entries, before)
+        start = 0 if limit is None else max(end - limit, 0)
+        return [
+            history_item(txid, kind, units, self.dates[height], 'confirmed', f"{height}:{pos}")
+            for height, pos, txid, kind, units in reversed(entries[start:end])
+        ]
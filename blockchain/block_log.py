@@ -0,0 +1,220 @@
+# blockchain/block_log.py
+# Log append-only de blocos em arquivos de segmento.
+#
+# Cada bloco é gravado como um registro [tamanho | crc32 | json compacto] no
+# segmento ativo. Um índice de tamanho fixo (segmento, offset, tamanho) por
+# altura permite ler qualquer bloco sem varrer os segmentos. Adicionar um bloco
+# custa o mesmo na altura 10 ou na altura 500.000: nada é reescrito.
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+RECORD_HEADER = struct.Struct('>II')     # tamanho do payload, crc32
+INDEX_ENTRY = struct.Struct('>IQI')      # nº do segmento, offset, tamanho do registro
+
+
+class BlockLogError(Exception):
+    pass
+
+
+class BlockLog:
+    def __init__(self, directory, segment_max_bytes=64 * 1024 * 1024,
+                 fsync_every=16, fsync_interval=1.0):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_file = os.path.join(self.directory, 'index.dat')
+
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+
+        self._recover()
+        self._index = open(self.index_file, 'ab')
+        self._segment = open(self._segment_path(self._segment_no), 'ab')
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ #
+    # Abertura / recuperação
+    # ------------------------------------------------------------------ #
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f'segment-{number:06d}.dat')
+
+    def _recover(self):
+        """Descarta registros incompletos deixados por um crash no meio da escrita"""
+        if not os.path.exists(self.index_file):
+            open(self.index_file, 'wb').close()
+
+        size = os.path.getsize(self.index_file)
+        count = size // INDEX_ENTRY.size
+
+        # Volta do fim até achar uma entrada cujo registro está íntegro no disco
+        while count > 0:
+            entry = self._read_entry(count - 1)
+            if self._record_is_valid(*entry):
+                break
+            count -= 1
+
+        if count * INDEX_ENTRY.size != size:
+            print(f"[BLOCKLOG] Índice truncado de {size // INDEX_ENTRY.size} para {count} blocos")
+            with open(self.index_file, 'r+b') as f:
+                f.truncate(count * INDEX_ENTRY.size)
+
+        self._count = count
+        if count:
+            segment_no, offset, length = self._read_entry(count - 1)
+            end = offset + length
+        else:
+            segment_no, end = 0, 0
+
+        # Remove lixo após o último registro válido e segmentos órfãos
+        path = self._segment_path(segment_no)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        number = segment_no + 1
+        while os.path.exists(self._segment_path(number)):
+            os.remove(self._segment_path(number))
+            number += 1
+
+        self._segment_no = segment_no
+        self._segment_size = end
+
+    def _read_entry(self, height):
+        with open(self.index_file, 'rb') as f:
+            f.seek(height * INDEX_ENTRY.size)
+            return INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+
+    def _record_is_valid(self, segment_no, offset, length):
+        path = self._segment_path(segment_no)
+        if not os.path.exists(path) or os.path.getsize(path) < offset + length:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            record = f.read(length)
+        try:
+            self._decode_record(record)
+        except BlockLogError:
+            return False
+        return True
+
+    @staticmethod
+    def _encode_record(block):
+        payload = json.dumps(block, separators=(',', ':')).encode()
+        return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    @staticmethod
+    def _decode_record(record):
+        if len(record) < RECORD_HEADER.size:
+            raise BlockLogError("Registro truncado")
+        length, crc = RECORD_HEADER.unpack_from(record)
+        payload = record[RECORD_HEADER.size:RECORD_HEADER.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise BlockLogError("Registro corrompido (crc inválido)")
+        return json.loads(payload)
+
+    # ------------------------------------------------------------------ #
+    # Escrita
+    # ------------------------------------------------------------------ #
+    def __len__(self):
+        return self._count
+
+    def append(self, block):
+        record = self._encode_record(block)
+        with self.lock:
+            if self._segment_size and self._segment_size + len(record) > self.segment_max_bytes:
+                self._roll_segment()
+
+            offset = self._segment_size
+            self._segment.write(record)
+            self._segment.flush()
+            # O índice só é gravado depois do registro: se o processo cair
+            # entre as duas escritas, _recover simplesmente ignora o registro.
+            self._index.write(INDEX_ENTRY.pack(self._segment_no, offset, len(record)))
+            self._index.flush()
+
+            self._segment_size += len(record)
+            self._count += 1
+            self._pending += 1
+
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+        return self._count - 1
+
+    def _roll_segment(self):
+        self._sync_locked()
+        self._segment.close()
+        self._segment_no += 1
+        self._segment_size = 0
+        self._segment = open(self._segment_path(self._segment_no), 'ab')
+
+    def _sync_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            os.fsync(self._segment.fileno())
+            os.fsync(self._index.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        """Força o fsync dos blocos pendentes (group commit)"""
+        with self.lock:
+            if not self._segment.closed:
+                self._sync_locked()
+
+    def close(self):
+        with self.lock:
+            if self._segment.closed:
+                return
+            self._sync_locked()
+            self._segment.close()
+            self._index.close()
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------------ #
+    # Leitura
+    # ------------------------------------------------------------------ #
+    def read(self, height):
+        if height < 0 or height >= self._count:
+            raise IndexError(f"Bloco {height} fora do log (altura {self._count})")
+        segment_no, offset, length = self._read_entry(height)
+        with open(self._segment_path(segment_no), 'rb') as f:
+            f.seek(offset)
+            return self._decode_record(f.read(length))
+
+    def iter_blocks(self, start=0):
+        """Lê os blocos em sequência, segmento por segmento"""
+        if start >= self._count:
+            return
+        with open(self.index_file, 'rb') as idx:
+            idx.seek(start * INDEX_ENTRY.size)
+            entries = idx.read((self._count - start) * INDEX_ENTRY.size)
+
+        current_no, current = None, None
+        try:
+            for segment_no, offset, length in INDEX_ENTRY.iter_unpack(entries):
+                if segment_no != current_no:
+                    if current is not None:
+                        current.close()
+                    current = open(self._segment_path(segment_no), 'rb')
+                    current_no = segment_no
+                current.seek(offset)
+                yield self._decode_record(current.read(length))
+        finally:
+            if current is not None:
+                current.close()
@@ -1,13 +1,104 @@
 # blockchain/chain_api.py
-from flask import Blueprint, jsonify
-from blockchain.core import get_chain
+import hashlib
+import json
+from flask import Blueprint, Response, jsonify, request
+from blockchain.core import get_chain, init_blockchain
+from blockchain import encoding
+from blockchain.merkle import merkle_proof
+from blockchain.response_cache import response_cache
+
+
+def _block_header(block):
+    """Visão do bloco sem o corpo das transações"""
+    header = {k: v for k, v in block.items() if k != 'transactions'}
+    header['tx_count'] = len(block.get('transactions', []))
+    return header
+
+
+def _parse_non_negative(name, default):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    value = int(value)
+    if value < 0:
+        raise ValueError(f"'{name}' deve ser >= 0")
+    return value
+
 
 def chain_bp():
     bp = Blueprint('chain', __name__)
 
     @bp.route('/', methods=['GET'])
+    @response_cache.cached(lambda: init_blockchain().version)
     def full_chain():
         chain = get_chain()
-        return jsonify(chain)
-    
-    return bp
\ No newline at end of file
+        height = len(chain)
+        tip_hash = chain[-1]['hash'] if chain else ''
+
+        try:
+            from_height = _parse_non_negative('from_height', 0)
+            limit = _parse_non_negative('limit', None)
+        except ValueError as e:
+            return jsonify({'error': f'Parâmetro inválido: {e}'}), 400
+
+        headers_only = request.args.get('headers', '').lower() in ('1', 'true', 'yes')
+        ndjson = (request.args.get('format') == 'ndjson'
+                  or request.accept_mimetypes.best == 'application/x-ndjson')
+
+        # O ETag muda sempre que a ponta da chain muda; a query entra no hash
+        # porque cada combinação de parâmetros gera um corpo diferente.
+        variant = hashlib.sha256(
+            f"{from_height}:{limit}:{headers_only}:{ndjson}".encode()
+        ).hexdigest()[:16]
+        etag = f"{tip_hash}-{variant}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        end = height if limit is None else min(height, from_height + limit)
+        view = _block_header if headers_only else (lambda block: block)
+
+        if ndjson:
+            def generate():
+                for i in range(from_height, end):
+                    yield json.dumps(view(chain[i])) + '\n'
+
+            response = Response(generate(), mimetype='application/x-ndjson')
+        else:
+            response = jsonify([view(chain[i]) for i in range(from_height, end)])
+
+        response.set_etag(etag)
+        response.headers['X-Chain-Height'] = str(height)
+        return response
+
+    @bp.route('/block/<hash_or_height>', methods=['GET'])
+    def get_block(hash_or_height):
+        block = init_blockchain().get_block(hash_or_height)
+        if block is None:
+            return jsonify({'error': 'Bloco não encontrado'}), 404
+        return jsonify(block)
+
+    @bp.route('/proof/<txid>', methods=['GET'])
+    def inclusion_proof(txid):
+        found = init_blockchain().get_transaction(txid)
+        if found is None:
+            return jsonify({'error': 'Transação não encontrada na chain'}), 404
+        block, _, position = found
+        if block.get('version', 1) < encoding.MERKLE_BLOCK_VERSION:
+            return jsonify({'error': 'Bloco anterior à merkle_root, sem prova de inclusão'}), 409
+
+        txids = [tx['txid'] for tx in block['transactions']]
+        return jsonify({
+            'txid': txid,
+            'block_height': block['index'],
+            'block_hash': block['hash'],
+            'merkle_root': block['merkle_root'],
+            'position': position,
+            'proof': merkle_proof(txids, position),
+            # sha256(header) == block_hash: o cliente valida o cabeçalho
+            # de tamanho fixo e depois a prova contra merkle_root.
+            'header': encoding.encode_header(block).hex()
+        })
+
+    return bp
@@ -0,0 +1,88 @@
+# blockchain/chain_index.py
+# Índices hash -> altura e txid -> (altura, posição), mantidos bloco a bloco.
+#
+# O arquivo em disco é append-only (uma linha por bloco), então atualizar o
+# índice custa O(transações do bloco). Como tudo pode ser derivado da chain,
+# se o arquivo sumir ou não bater com a chain ele é reconstruído no load.
+import json
+import os
+
+
+class ChainIndex:
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.block_heights = {}   # hash -> altura
+        self.tx_locations = {}    # txid -> (altura, posição no bloco)
+        self.height = 0           # quantidade de blocos indexados
+
+    def _index_block(self, block, height):
+        self.block_heights[block['hash']] = height
+        for pos, tx in enumerate(block.get('transactions', [])):
+            self.tx_locations[tx['txid']] = (height, pos)
+        self.height = height + 1
+
+    @staticmethod
+    def _entry(block, height):
+        return json.dumps({
+            'height': height,
+            'hash': block['hash'],
+            'txids': [tx['txid'] for tx in block.get('transactions', [])]
+        }, separators=(',', ':')) + '\n'
+
+    def load(self, chain):
+        """Carrega o índice do disco e indexa os blocos que estiverem faltando"""
+        self.block_heights = {}
+        self.tx_locations = {}
+        self.height = 0
+
+        entries = []
+        truncated = False
+        try:
+            with open(self.index_file, 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        truncated = True  # escrita interrompida no meio da linha
+                        break
+        except FileNotFoundError:
+            pass
+
+        consistent = (
+            not truncated
+            and len(entries) <= len(chain)
+            and all(e['height'] == h for h, e in enumerate(entries))
+            and (not entries or chain[len(entries) - 1]['hash'] == entries[-1]['hash'])
+        )
+        if not consistent:
+            print(f"[INDEX] {self.index_file} não confere com a chain, reconstruindo")
+            entries = []
+
+        for entry in entries:
+            self.block_heights[entry['hash']] = entry['height']
+            for pos, txid in enumerate(entry['txids']):
+                self.tx_locations[txid] = (entry['height'], pos)
+        self.height = len(entries)
+
+        if self.height < len(chain):
+            missing = chain[self.height:]
+            mode = 'a' if entries else 'w'
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(self.index_file, mode) as f:
+                for block in missing:
+                    height = self.height
+                    self._index_block(block, height)
+                    f.write(self._entry(block, height))
+            print(f"[INDEX] {len(missing)} blocos indexados")
+
+    def add_block(self, block):
+        height = self.height
+        self._index_block(block, height)
+        with open(self.index_file, 'a') as f:
+            f.write(self._entry(block, height))
+
+    def get_height(self, block_hash):
+        return self.block_heights.get(block_hash)
+
+    def get_tx_location(self, txid):
+        return self.tx_locations.get(txid)
@@ -4,27 +4,32 @@ import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from nodes.node_manager import NodeManager
-from transactions.utxo import UTXOSet
+from transactions.utxo import UTXOSet, is_valid_transaction
+from transactions.utxo_view import UTXOView, apply_transaction
+from transactions.sigverify import verify_transactions
 from blockchain.consensus import ProofOfEnergy
-from ecdsa import SigningKey, SECP256k1, VerifyingKey
+from blockchain import encoding
+from blockchain.merkle import merkle_root
+from blockchain.response_cache import next_version
+from storage.backend import get_storage
+import config
+from blockchain.crypto import PrivateKey, compress_public_key
 
 def compress_pubkey(pubkey_hex: str) -> str:
-    # Remove o prefixo 0x04 que indica chave pública não comprimida
+    # Chave não comprimida (prefixo 0x04) vira a forma de 33 bytes
     pubkey_bytes = bytes.fromhex(pubkey_hex)
     if pubkey_bytes[0] == 0x04:
-        vk = VerifyingKey.from_string(pubkey_bytes[1:], curve=SECP256k1)
-        compressed = vk.to_string("compressed").hex()
-        return compressed
+        return compress_public_key(pubkey_hex)
     else:
         # Já comprimida ou formato diferente, retorna original
         return pubkey_hex
 
 # Geração da chave para endereço (exemplo, pode não ser usada diretamente aqui)
-sk = SigningKey.generate(curve=SECP256k1)
-vk = sk.verifying_key
+sk = PrivateKey.generate()
+vk = sk.public_key
 
 # Chave pública não comprimida (com prefixo 04)
-public_key_uncompressed = '04' + vk.to_string().hex()
+public_key_uncompressed = vk.to_string('uncompressed').hex()
 
 # Chave pública comprimida (sem prefixo 04)
 public_key_compressed = compress_pubkey(public_key_uncompressed)
@@ -40,17 +45,36 @@ def init_blockchain():
         _blockchain = Blockchain()
     return _blockchain
 def mine_mempool_transactions(blockchain, mempool, max_txs=100):
+    # Expiradas pelo TTL não entram no bloco
+    mempool.expire_transactions()
     pending_txs = mempool.get_transactions_for_block(max_txs)
     if not pending_txs:
         print("[MINER] Nenhuma transação pendente para minerar.")
         return None
 
+    # Monta o bloco numa camada descartável sobre o conjunto confirmado:
+    # gastos duplos entre transações do mesmo bloco são barrados aqui
+    layer = UTXOView(blockchain.utxo_set)
     valid_txs = []
-    for tx in pending_txs:
-        if is_valid_transaction(tx, blockchain.utxo_set):
+    # Assinaturas de todas de uma vez (cache + pool de processos); as que
+    # passam ficam no cache e is_valid_transaction não refaz a conta
+    signatures_ok = verify_transactions(pending_txs)
+    for tx, signed in zip(pending_txs, signatures_ok):
+        candidate = layer.overlay()
+        try:
+            if not signed:
+                valid, reason = False, "assinatura inválida"
+            else:
+                valid, reason = is_valid_transaction(tx, layer)
+            if valid:
+                apply_transaction(candidate, tx)
+        except Exception as e:
+            valid, reason = False, str(e)
+        if valid:
+            candidate.commit()
             valid_txs.append(tx)
         else:
-            print(f"[MINER] Transação inválida descartada: {tx['txid']}")
+            print(f"[MINER] Transação inválida descartada: {tx['txid']} ({reason})")
 
     if not valid_txs:
         print("[MINER] Nenhuma transação válida após verificação.")
@@ -66,13 +90,15 @@ def mine_mempool_transactions(blockchain, mempool, max_txs=100):
     daily_data['transactions'] = valid_txs
     blockchain.node_manager.aggregate_daily_data = lambda: daily_data
 
+    # Bloco, UTXOs e mempool são gravados juntos (um COMMIT no SQLite)
     try:
-        new_block = blockchain.add_block()
+        with get_storage().atomic():
+            new_block = blockchain.add_block()
+            mempool.remove_confirmed_transactions([tx['txid'] for tx in valid_txs])
     except Exception as e:
         print(f"[ERROR] Falha ao minerar bloco: {e}")
         return None
 
-    mempool.remove_confirmed_transactions([tx['txid'] for tx in valid_txs])
     print(f"[MINER] Bloco {new_block['index']} minerado com {len(valid_txs)} transações.")
     return new_block
 
@@ -84,16 +110,21 @@ class Blockchain:
         self.utxo_set = UTXOSet()
         self.consensus = ProofOfEnergy(self)
         self.load_chain()
-        self._rebuild_utxos()
+        self.index = self.chain_store.open_index()
+        self.index.load(self.chain)
+        self.address_index = self.chain_store.open_address_index()
+        self.address_index.load(self.chain)
+        # utxos.json + journal ou, no SQLite, a tabela outputs, marcados com
+        # a ponta da chain em que estão
+        self.utxo_snapshots = get_storage().open_utxo_snapshots()
+        self._restore_utxos()
+        # Muda a cada bloco; chave do cache de respostas da API
+        self.version = next_version()
 
     def load_chain(self):
-        data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
-        os.makedirs(data_dir, exist_ok=True)
-        self.blockchain_file = os.path.join(data_dir, 'blockchain.json')
-        try:
-            with open(self.blockchain_file, 'r') as f:
-                self.chain = json.load(f)
-        except FileNotFoundError:
+        self.chain_store = get_storage().open_chain()
+        self.chain = self.chain_store.load()
+        if not self.chain:
             self.create_genesis_block()
 
     def create_genesis_block(self):
@@ -120,6 +151,7 @@ class Blockchain:
         }
 
         genesis = {
+            'version': encoding.BLOCK_VERSION,
             'index': 0,
             'timestamp': self.current_time(),
             'consolidated_energy': 0,
@@ -127,22 +159,41 @@ class Blockchain:
             'previous_hash': '0'*64,
             'node_count': 0
         }
+        genesis['merkle_root'] = merkle_root([genesis_tx['txid']])
         genesis['hash'] = self.calculate_hash(genesis)
         self.chain.append(genesis)
         self.save_chain()
 
+    def _apply_block(self, block, utxos=None):
+        utxos = self.utxo_set if utxos is None else utxos
+        for tx in block.get('transactions', []):
+            # Remove UTXOs gastos
+            for inp in tx.get('inputs', []):
+                utxos.spend_utxo(inp['txid'], inp['index'])
+            # Adiciona novos UTXOs dos outputs
+            for idx, out in enumerate(tx.get('outputs', [])):
+                public_key = out.get('public_key', '') or out.get('locking_script', '')
+                utxos.add_utxo(out['address'], tx['txid'], idx, out['amount'], public_key)
+
     def _rebuild_utxos(self):
-        self.utxo_set.utxos = {}  # limpa
+        self.utxo_set.clear()
         for block in self.chain:
-            for tx in block.get('transactions', []):
-                # Remove UTXOs gastos
-                for inp in tx.get('inputs', []):
-                    self.utxo_set.spend_utxo(inp['txid'], inp['index'])
-                # Adiciona novos UTXOs dos outputs
-                for idx, out in enumerate(tx.get('outputs', [])):
-                    public_key = out.get('public_key', '') or out.get('locking_script', '')
-                    self.utxo_set.add_utxo(out['address'], tx['txid'], idx, out['amount'], public_key)
-        self.utxo_set.save_utxos()
+            self._apply_block(block)
+
+    def _restore_utxos(self):
+        """Carrega o último snapshot válido e reaplica só os blocos posteriores"""
+        tip = len(self.chain) - 1
+        with get_storage().atomic():
+            height = self.utxo_snapshots.load_latest(self.chain, self.utxo_set)
+            if height is None:
+                print("[SNAPSHOT] Nenhum snapshot compatível, reconstruindo UTXOs da chain inteira")
+                self._rebuild_utxos()
+            else:
+                for block in self.chain[height + 1:]:
+                    self._apply_block(block)
+                print(f"[SNAPSHOT] UTXOs restaurados da altura {height} + {tip - height} blocos")
+            if height != tip:
+                self.utxo_snapshots.write(tip, self.chain[tip]['hash'], self.utxo_set)
 
     def add_block(self):
         daily_data = self.node_manager.aggregate_daily_data()
@@ -154,6 +205,7 @@ class Blockchain:
 
         last_block = self.chain[-1]
         new_block = {
+            'version': encoding.BLOCK_VERSION,
             'index': len(self.chain),
             'timestamp': self.current_time(),
             'consolidated_energy': daily_data['total_energy'],
@@ -162,42 +214,66 @@ class Blockchain:
             'previous_hash': last_block['hash']
         }
 
-        # Garante que todas as chaves públicas das outputs estejam comprimidas
+        # Garante que todas as chaves públicas das outputs estejam comprimidas.
+        # Transações com txid binário já foram assinadas sobre as chaves como
+        # estão, então só as antigas são normalizadas aqui.
         for tx in daily_data.get('transactions', []):
+            if tx.get('version', 1) >= encoding.TX_VERSION:
+                continue
             for out in tx.get('outputs', []):
                 pubkey = out.get('public_key', '')
                 if pubkey:
                     out['public_key'] = compress_pubkey(pubkey)
 
         new_block['transactions'] = daily_data.get('transactions', [])
+        new_block['merkle_root'] = merkle_root([tx['txid'] for tx in new_block['transactions']])
         new_block['hash'] = self.calculate_hash(new_block)
         reward = self.consensus.mint_tokens(daily_data['total_energy'])
         new_block['reward'] = reward
 
-        for tx in new_block['transactions']:
-            for inp in tx.get('inputs', []):
-                self.utxo_set.spend_utxo(inp['txid'], inp['index'])
-            for idx, out in enumerate(tx.get('outputs', [])):
-                public_key = out.get('public_key', '')  # já comprimida aqui
-                self.utxo_set.add_utxo(out['address'], tx['txid'], idx, out['amount'], public_key)
-        self.utxo_set.save_utxos()
-
-        self.chain.append(new_block)
-        self.save_chain()
+        # O bloco é aplicado numa camada e só então consolidado na base.
+        # UTXOs, bloco, índices e checkpoint saem num COMMIT só (SQLite); se
+        # ele for desfeito (inclusive pelo atomic() de quem chamou), a base e
+        # a chain em memória voltam junto
+        layer = UTXOView(self.utxo_set)
+        self._apply_block(new_block, layer)
+        storage = get_storage()
+        with storage.atomic():
+            storage.on_rollback(layer.commit())
+            self.chain.append(new_block)
+            storage.on_rollback(self.chain.pop)
+            self.save_chain()
+            self.index.add_block(new_block)
+            self.address_index.add_block(new_block)
+            # Grava os UTXOs do bloco junto com a ponta em que ficaram
+            self.utxo_snapshots.write(new_block['index'], new_block['hash'], self.utxo_set)
+        self.version = next_version()
         return new_block
 
+    def get_block(self, hash_or_height):
+        """Busca um bloco pela altura ou pelo hash, sem varrer a chain"""
+        if isinstance(hash_or_height, int) or (hash_or_height.isdigit() and len(hash_or_height) < 64):
+            height = int(hash_or_height)
+        else:
+            height = self.index.get_height(hash_or_height)
+        if height is None or height >= len(self.chain):
+            return None
+        return self.chain[height]
+
+    def get_transaction(self, txid):
+        """Retorna (bloco, transação, posição) de uma transação confirmada"""
+        location = self.index.get_tx_location(txid)
+        if location is None:
+            return None
+        height, pos = location
+        block = self.chain[height]
+        return block, block['transactions'][pos], pos
+
     def calculate_hash(self, block):
-        block_string = json.dumps(block, sort_keys=True).encode()
-        return hashlib.sha256(block_string).hexdigest()
+        return encoding.block_hash(block)
 
     def save_chain(self):
-        # Garante que o caminho do arquivo está definido
-        if not hasattr(self, 'blockchain_file'):
-            self.blockchain_file = os.path.abspath(
-                os.path.join(os.path.dirname(__file__), '..', 'data', 'blockchain.json')
-            )
-        with open(self.blockchain_file, 'w') as f:
-            json.dump(self.chain, f, indent=2)
+        self.chain_store.save(self.chain)
 
     def current_time(self):
         return datetime.now(self.fusohorario).isoformat()
@@ -0,0 +1,235 @@
+# blockchain/crypto.py
+# Chaves e assinaturas secp256k1 do nó, atrás de uma interface só.
+#
+# A aritmética da curva vem de um backend:
+#   cryptography -> OpenSSL (C), usado quando o pacote está instalado
+#   ecdsa        -> Python puro (requirements.txt), sempre disponível
+# CRYPTO_BACKEND ('auto', 'cryptography' ou 'ecdsa') força um deles.
+#
+# Os formatos são os mesmos nos dois backends:
+#   chave pública -> 'raw' (x||y, 64 bytes, o to_string() do ecdsa),
+#                    'compressed' (33 bytes) ou 'uncompressed' (04||x||y)
+#   assinatura    -> r||s (64 bytes, padrão do sign_digest) ou DER
+# O nonce da assinatura é aleatório nos dois, então as assinaturas não são
+# iguais byte a byte, mas as de um backend verificam no outro.
+import hashlib
+import os
+from ecdsa import SigningKey, VerifyingKey, SECP256k1
+from ecdsa import BadSignatureError as _EcdsaBadSignature
+from ecdsa.util import sigencode_der, sigdecode_der
+import config
+
+ORDER = SECP256k1.order
+
+
+class BadSignatureError(Exception):
+    pass
+
+
+class _EcdsaBackend:
+    name = 'ecdsa'
+
+    def load_private(self, secret):
+        return SigningKey.from_string(secret, curve=SECP256k1)
+
+    def public_from_private(self, key):
+        return key.get_verifying_key()
+
+    def sign_digest(self, key, digest):
+        return key.sign_digest(digest, sigencode=lambda r, s, order: (r, s), allow_truncate=True)
+
+    def load_public(self, data):
+        return VerifyingKey.from_string(data, curve=SECP256k1)
+
+    def public_point(self, key):
+        point = key.pubkey.point
+        return point.x(), point.y()
+
+    def verify_digest(self, key, r, s, digest):
+        try:
+            return key.verify_digest((r, s), digest, sigdecode=lambda sig, order: sig, allow_truncate=True)
+        except _EcdsaBadSignature:
+            return False
+
+
+class _CryptographyBackend:
+    name = 'cryptography'
+
+    def __init__(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import (
+            Prehashed, encode_dss_signature, decode_dss_signature
+        )
+        self.ec = ec
+        self.curve = ec.SECP256K1()
+        self.InvalidSignature = InvalidSignature
+        self.encode_dss_signature = encode_dss_signature
+        self.decode_dss_signature = decode_dss_signature
+        # O digest chega pronto; o OpenSSL só precisa saber o tamanho dele
+        self.algorithms = {
+            algorithm.digest_size: ec.ECDSA(Prehashed(algorithm))
+            for algorithm in (hashes.SHA1(), hashes.SHA224(), hashes.SHA256(),
+                              hashes.SHA384(), hashes.SHA512())
+        }
+
+    def _algorithm(self, digest):
+        try:
+            return self.algorithms[len(digest)]
+        except KeyError:
+            raise ValueError(f"Digest de {len(digest)} bytes não suportado")
+
+    def load_private(self, secret):
+        return self.ec.derive_private_key(int.from_bytes(secret, 'big'), self.curve)
+
+    def public_from_private(self, key):
+        return key.public_key()
+
+    def sign_digest(self, key, digest):
+        return self.decode_dss_signature(key.sign(digest, self._algorithm(digest)))
+
+    def load_public(self, data):
+        if len(data) == 64:
+            data = b'\x04' + data
+        return self.ec.EllipticCurvePublicKey.from_encoded_point(self.curve, data)
+
+    def public_point(self, key):
+        numbers = key.public_numbers()
+        return numbers.x, numbers.y
+
+    def verify_digest(self, key, r, s, digest):
+        try:
+            key.verify(self.encode_dss_signature(r, s), digest, self._algorithm(digest))
+            return True
+        except self.InvalidSignature:
+            return False
+
+
+def available_backends():
+    backends = {'ecdsa': _EcdsaBackend()}
+    try:
+        backends['cryptography'] = _CryptographyBackend()
+    except ImportError:
+        pass
+    return backends
+
+
+def _select_backend(name):
+    backends = available_backends()
+    if name == 'auto':
+        return backends.get('cryptography') or backends['ecdsa']
+    if name not in backends:
+        raise RuntimeError(f"Backend de criptografia indisponível: {name}")
+    return backends[name]
+
+
+default_backend = _select_backend(config.CRYPTO_BACKEND)
+BACKEND = default_backend.name
+
+
+def _int_bytes(value):
+    return value.to_bytes(32, 'big')
+
+
+class PublicKey:
+    __slots__ = ('key', 'x', 'y', 'backend')
+
+    def __init__(self, key, x, y, backend):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.backend = backend
+
+    @classmethod
+    def from_bytes(cls, data, backend=None):
+        """Aceita os formatos 'raw', 'compressed' e 'uncompressed'"""
+        backend = backend or default_backend
+        if len(data) not in (33, 64, 65):
+            raise ValueError(f"Chave pública de {len(data)} bytes")
+        try:
+            key = backend.load_public(bytes(data))
+        except Exception:
+            raise ValueError("Chave pública inválida (ponto fora da curva)")
+        return cls(key, *backend.public_point(key), backend)
+
+    @classmethod
+    def from_hex(cls, public_key_hex, backend=None):
+        return cls.from_bytes(bytes.fromhex(public_key_hex), backend)
+
+    def to_string(self, encoding='raw'):
+        if encoding == 'raw':
+            return _int_bytes(self.x) + _int_bytes(self.y)
+        if encoding == 'compressed':
+            return bytes([2 + (self.y & 1)]) + _int_bytes(self.x)
+        if encoding == 'uncompressed':
+            return b'\x04' + _int_bytes(self.x) + _int_bytes(self.y)
+        raise ValueError(f"Formato de chave desconhecido: {encoding}")
+
+    def verify_digest(self, signature, digest, der=False):
+        """Levanta BadSignatureError se a assinatura não conferir"""
+        try:
+            r, s = sigdecode_der(signature, ORDER) if der else _decode_raw(signature)
+        except Exception:
+            raise BadSignatureError("Assinatura malformada")
+        if not (0 < r < ORDER and 0 < s < ORDER):
+            raise BadSignatureError("Assinatura fora do intervalo")
+        if not self.backend.verify_digest(self.key, r, s, digest):
+            raise BadSignatureError("Assinatura não confere")
+        return True
+
+    def verify(self, signature, data):
+        """Par de PrivateKey.sign (sha1 dos dados, como o ecdsa)"""
+        return self.verify_digest(signature, hashlib.sha1(data).digest())
+
+
+class PrivateKey:
+    __slots__ = ('secret', 'key', 'backend', '_public_key')
+
+    def __init__(self, secret, backend=None):
+        if len(secret) != 32 or not 0 < int.from_bytes(secret, 'big') < ORDER:
+            raise ValueError("Chave privada inválida")
+        self.secret = bytes(secret)
+        self.backend = backend or default_backend
+        self.key = self.backend.load_private(self.secret)
+        self._public_key = None
+
+    @classmethod
+    def generate(cls, backend=None):
+        while True:
+            secret = os.urandom(32)
+            if 0 < int.from_bytes(secret, 'big') < ORDER:
+                return cls(secret, backend)
+
+    @classmethod
+    def from_hex(cls, private_key_hex, backend=None):
+        return cls(bytes.fromhex(private_key_hex), backend)
+
+    def to_string(self):
+        return self.secret
+
+    @property
+    def public_key(self):
+        if self._public_key is None:
+            key = self.backend.public_from_private(self.key)
+            self._public_key = PublicKey(key, *self.backend.public_point(key), self.backend)
+        return self._public_key
+
+    def sign_digest(self, digest, der=False):
+        r, s = self.backend.sign_digest(self.key, digest)
+        return sigencode_der(r, s, ORDER) if der else _int_bytes(r) + _int_bytes(s)
+
+    def sign(self, data):
+        """Assina o sha1 dos dados (o padrão do SigningKey.sign do ecdsa)"""
+        return self.sign_digest(hashlib.sha1(data).digest())
+
+
+def _decode_raw(signature):
+    if len(signature) != 64:
+        raise ValueError("Assinatura r||s deve ter 64 bytes")
+    return int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:], 'big')
+
+
+def compress_public_key(public_key_hex):
+    """Chave pública hex em qualquer formato -> hex comprimido (33 bytes)"""
+    return PublicKey.from_hex(public_key_hex).to_string('compressed').hex()
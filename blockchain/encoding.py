@@ -0,0 +1,195 @@
+# blockchain/encoding.py
+# Codificação binária canônica de transações e cabeçalhos de bloco.
+#
+# Todo hash de consenso de transações/blocos versão >= 2 sai daqui: o txid é
+# sha256(encode_tx(tx)) e o hash do bloco é sha256(encode_header(block)).
+# A partir da versão 3 o cabeçalho carrega a raiz de Merkle dos txids
+# (block['merkle_root']) e pode ser hasheado sem nenhuma transação.
+# Os dicts continuam sendo a visão JSON usada pela API HTTP; os campos 'txid'
+# e 'hash' guardados neles funcionam como cache do hash já calculado.
+#
+# Blocos/transações antigos (sem 'version' ou version 1) mantêm o hash via
+# json.dumps(sort_keys=True) com que foram criados.
+import hashlib
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
+COIN = 10 ** 8          # unidades base por token
+TX_VERSION = 2
+BLOCK_VERSION = 3
+BINARY_BLOCK_VERSION = 2    # primeira versão com hash pelo cabeçalho binário
+MERKLE_BLOCK_VERSION = 3    # primeira versão com merkle_root no cabeçalho
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# versão, altura, timestamp (µs), previous_hash, raiz das txs, energia, nº de nodes
+HEADER = struct.Struct('>IQq32s32sdI')
+AMOUNT = struct.Struct('>q')
+
+_HEX = 0x00
+_TEXT = 0x01
+
+
+def to_base_units(amount):
+    """Converte um valor em token (float) para inteiro em unidades base"""
+    return int(round(float(amount) * COIN))
+
+
+def from_base_units(units):
+    return units / COIN
+
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7f
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _bytes(data):
+    return _varint(len(data)) + data
+
+
+def _is_hex(value):
+    if len(value) % 2:
+        return False
+    try:
+        # Só hex minúsculo é aceito como binário, para não haver duas
+        # representações JSON com o mesmo encoding.
+        return bytes.fromhex(value).hex() == value
+    except ValueError:
+        return False
+
+
+def _ident(value):
+    """Hash, endereço ou chave: hex vira bytes crus, o resto vai como texto"""
+    value = value or ''
+    if _is_hex(value):
+        return bytes([_HEX]) + _bytes(bytes.fromhex(value))
+    return bytes([_TEXT]) + _bytes(value.encode())
+
+
+def _text(value):
+    return _bytes((value or '').encode())
+
+
+def txid_bytes(txid):
+    """Forma de 32 bytes de um txid (txids não-hex, como o do gênesis, são hasheados)"""
+    if len(txid) == 64 and _is_hex(txid):
+        return bytes.fromhex(txid)
+    return hashlib.sha256(txid.encode()).digest()
+
+
+def _timestamp_us(value):
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+# ---------------------------------------------------------------------- #
+# Transações
+# ---------------------------------------------------------------------- #
+def encode_tx(tx, include_signatures=False):
+    """Serializa os campos de consenso da transação.
+
+    Assinaturas ficam fora do encoding usado no txid (são feitas sobre ele);
+    include_signatures=True serve só para armazenamento/medição de tamanho.
+    """
+    parts = [
+        _varint(tx.get('version', TX_VERSION)),
+        _text(tx.get('type')),
+        _text(tx.get('timestamp') or tx.get('date')),
+        _ident(tx.get('sender')),
+        _ident(tx.get('recipient')),
+        AMOUNT.pack(to_base_units(tx.get('amount', 0))),
+        AMOUNT.pack(to_base_units(tx.get('fee', 0))),
+    ]
+
+    inputs = tx.get('inputs', [])
+    parts.append(_varint(len(inputs)))
+    for inp in inputs:
+        parts.append(_ident(inp['txid']))
+        parts.append(_varint(inp['index']))
+        parts.append(_ident(inp.get('public_key')))
+        if include_signatures:
+            parts.append(_ident(inp.get('signature')))
+
+    outputs = tx.get('outputs', [])
+    parts.append(_varint(len(outputs)))
+    for out in outputs:
+        parts.append(_ident(out['address']))
+        parts.append(AMOUNT.pack(to_base_units(out['amount'])))
+        parts.append(_ident(out.get('public_key') or out.get('locking_script')))
+
+    return b''.join(parts)
+
+
+def tx_hash(tx):
+    """Calcula o txid a partir do encoding binário (sempre recalcula)"""
+    return hashlib.sha256(encode_tx(tx)).hexdigest()
+
+
+def txid(tx):
+    """Retorna o txid da transação, calculando e memorizando em tx['txid'] se faltar"""
+    if 'txid' not in tx:
+        tx['txid'] = tx_hash(tx)
+    return tx['txid']
+
+
+# ---------------------------------------------------------------------- #
+# Blocos
+# ---------------------------------------------------------------------- #
+def tx_root(block):
+    """Compromisso dos blocos versão 2 com a lista de transações (hash dos txids)"""
+    return hashlib.sha256(
+        b''.join(txid_bytes(tx['txid']) for tx in block.get('transactions', []))
+    ).digest()
+
+
+def encode_header(block):
+    """Cabeçalho de tamanho fixo (HEADER.size bytes)"""
+    version = block.get('version', BLOCK_VERSION)
+    if version >= MERKLE_BLOCK_VERSION:
+        root = bytes.fromhex(block['merkle_root'])
+    else:
+        root = tx_root(block)
+    return HEADER.pack(
+        version,
+        block['index'],
+        _timestamp_us(block['timestamp']),
+        bytes.fromhex(block['previous_hash']),
+        root,
+        float(block.get('consolidated_energy', 0)),
+        block.get('node_count', 0)
+    )
+
+
+def header_hash(block):
+    return hashlib.sha256(encode_header(block)).hexdigest()
+
+
+def block_hash(block):
+    """Hash de consenso do bloco, de acordo com a versão dele"""
+    if block.get('version', 1) >= BINARY_BLOCK_VERSION:
+        # Só o cabeçalho de tamanho fixo entra no hash; as transações
+        # entram pela raiz de Merkle (v3) ou pelos txids (v2).
+        return header_hash(block)
+    # Blocos antigos: hash do JSON do bloco sem 'hash' e 'reward'
+    legacy = {k: v for k, v in block.items() if k not in ('hash', 'reward')}
+    return hashlib.sha256(json.dumps(legacy, sort_keys=True).encode()).hexdigest()
+
+
+def encode_block(block):
+    """Cabeçalho + transações com assinaturas (para armazenamento/medição)"""
+    txs = block.get('transactions', [])
+    return encode_header(block) + _varint(len(txs)) + b''.join(
+        _bytes(encode_tx(tx, include_signatures=True)) for tx in txs
+    )
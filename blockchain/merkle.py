@@ -0,0 +1,63 @@
+# blockchain/merkle.py
+# Árvore de Merkle sobre os txids de um bloco e provas de inclusão.
+#
+# Folhas e nós internos usam prefixos diferentes (0x00 / 0x01) para que um nó
+# interno nunca possa ser apresentado como folha. Num nível com quantidade
+# ímpar, o último nó sobe sem ser duplicado.
+import hashlib
+from blockchain.encoding import txid_bytes
+
+_LEAF = b'\x00'
+_NODE = b'\x01'
+
+
+def leaf_hash(txid):
+    return hashlib.sha256(_LEAF + txid_bytes(txid)).digest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(_NODE + left + right).digest()
+
+
+def _next_level(level):
+    parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(txids):
+    """Raiz (hex) da árvore sobre a lista de txids, na ordem do bloco"""
+    if not txids:
+        return hashlib.sha256(b'').hexdigest()
+    level = [leaf_hash(txid) for txid in txids]
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(txids, position):
+    """Irmãos do caminho folha -> raiz: lista de {'hash', 'side'}, O(log n)"""
+    level = [leaf_hash(txid) for txid in txids]
+    proof = []
+    while len(level) > 1:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append({
+                'hash': level[sibling].hex(),
+                'side': 'left' if sibling < position else 'right'
+            })
+        level = _next_level(level)
+        position //= 2
+    return proof
+
+
+def verify_proof(txid, proof, root):
+    current = leaf_hash(txid)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        if step['side'] == 'left':
+            current = _node_hash(sibling, current)
+        else:
+            current = _node_hash(current, sibling)
+    return current.hex() == root
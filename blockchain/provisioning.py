@@ -0,0 +1,181 @@
+# blockchain/provisioning.py
+# Geração e importação de carteiras em lote (nós de energia aos milhares).
+#
+# Cada carteira custa um PBKDF2 de 2048 rodadas (Mnemonic.to_seed) e uma
+# derivação de chave secp256k1. Lotes pequenos (< PROVISION_PARALLEL_MIN)
+# rodam no processo atual; o resto vai em pedaços de PROVISION_CHUNK para um
+# pool de processos, e os resultados voltam na ordem do lote à medida que
+# ficam prontos, para serem enviados em NDJSON sem esperar o lote inteiro.
+#
+# A chave é derivada da mnemônica como em /wallet/import (seed[:32]), então
+# importar depois a mnemônica de uma carteira gerada aqui devolve a mesma.
+#
+#   python -m blockchain.provisioning --count 1000 [--workers 4] > carteiras.ndjson
+#   python -m blockchain.provisioning --import-file mnemonicas.txt --register
+#   python -m blockchain.provisioning --count 1000 --node http://localhost:5000
+import sys
+import os
+import atexit
+import json
+import multiprocessing
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mnemonic import Mnemonic
+from blockchain.crypto import PrivateKey
+from blockchain.wallet import Wallet
+import config
+
+_mnemo = None
+
+
+def _mnemonic():
+    global _mnemo
+    if _mnemo is None:
+        _mnemo = Mnemonic('english')
+    return _mnemo
+
+
+def derive_wallet(mnemonic):
+    """Carteira (dict, como em /wallet/import) de uma mnemônica BIP39"""
+    mnemo = _mnemonic()
+    if not mnemo.check(mnemonic):
+        raise ValueError('Invalid mnemonic')
+    seed = mnemo.to_seed(mnemonic, passphrase="")
+    priv = PrivateKey(seed[:32])
+    pub = priv.public_key
+    return {
+        'mnemonic': mnemonic,
+        'address': Wallet.generate_address(pub),
+        'public_key': pub.to_string().hex(),
+        'private_key': priv.to_string().hex()
+    }
+
+
+def provision_one(mnemonic=None):
+    """Importa mnemonic ou, se None, gera uma nova; erros voltam no dict"""
+    try:
+        if mnemonic is None:
+            mnemonic = _mnemonic().generate(strength=128)
+        elif not isinstance(mnemonic, str):
+            raise ValueError('Mnemonic deve ser texto')
+        return derive_wallet(mnemonic)
+    except ValueError as e:
+        return {'error': str(e)}
+
+
+class WalletProvisioner:
+    def __init__(self, workers=None, chunk_size=None, min_parallel=None):
+        self.workers = workers or config.PROVISION_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or config.PROVISION_CHUNK
+        self.min_parallel = config.PROVISION_PARALLEL_MIN if min_parallel is None else min_parallel
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: o servidor tem threads, e fork copiaria locks travados
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def provision(self, items):
+        """Gerador de carteiras, uma por item (None gera, texto importa), na ordem"""
+        items = list(items)
+        if self.workers <= 1 or len(items) < self.min_parallel:
+            for item in items:
+                yield provision_one(item)
+            return
+
+        done = 0
+        try:
+            for wallet in self._get_pool().map(provision_one, items, chunksize=self.chunk_size):
+                yield wallet
+                done += 1
+        except BrokenProcessPool:
+            print("[PROVISION] Pool de derivação caiu; continuando no processo atual", file=sys.stderr)
+            self.close()
+            for item in items[done:]:
+                yield provision_one(item)
+
+
+_provisioner = None
+_provisioner_lock = threading.Lock()
+
+
+def get_provisioner():
+    global _provisioner
+    with _provisioner_lock:
+        if _provisioner is None:
+            _provisioner = WalletProvisioner()
+            atexit.register(_provisioner.close)
+        return _provisioner
+
+
+def provision(items):
+    return get_provisioner().provision(items)
+
+
+def _read_mnemonics(path):
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--count', type=int, help='gera N carteiras novas')
+    source.add_argument('--import-file', help='arquivo com uma mnemônica por linha')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--register', action='store_true', help='registra os endereços no NodeManager')
+    parser.add_argument('--node-ids-file', help='um node_id por linha (padrão: o próprio endereço)')
+    parser.add_argument('--node', help='URL de um nó: usa POST /wallet/bulk em vez de derivar aqui')
+    args = parser.parse_args()
+
+    items = [None] * args.count if args.count is not None else _read_mnemonics(args.import_file)
+    node_ids = _read_mnemonics(args.node_ids_file) if args.node_ids_file else None
+    if node_ids is not None and len(node_ids) != len(items):
+        sys.exit('[PROVISION] --node-ids-file precisa de um node_id por carteira')
+
+    if args.node:
+        import requests
+        body = {'register': args.register}
+        if args.count is not None:
+            body['count'] = args.count
+        else:
+            body['mnemonics'] = items
+        if node_ids:
+            body['node_ids'] = node_ids
+        with requests.post(f"{args.node}/wallet/bulk", json=body, stream=True, timeout=600) as response:
+            if response.status_code != 200:
+                sys.exit(f"[PROVISION] {response.status_code} {response.text}")
+            for line in response.iter_lines():
+                if line:
+                    print(line.decode())
+    else:
+        provisioner = WalletProvisioner(workers=args.workers)
+        registered = []
+        for n, wallet in enumerate(provisioner.provision(items)):
+            wallet = {'index': n, **wallet}
+            if args.register and 'error' not in wallet:
+                wallet['node_id'] = node_ids[n] if node_ids else wallet['address']
+                registered.append((wallet['node_id'], wallet['address']))
+            print(json.dumps(wallet), flush=True)
+        provisioner.close()
+        if registered:
+            from nodes.node_manager import NodeManager
+            NodeManager().register_nodes(registered)
+            print(f"[PROVISION] {len(registered)} nós registrados", file=sys.stderr)
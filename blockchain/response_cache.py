@@ -0,0 +1,126 @@
+# blockchain/response_cache.py
+# Cache das respostas serializadas das rotas de leitura mais consultadas
+# (/chain/, /wallet/balance, /wallet/transactions, /transaction/pending).
+#
+# A chave é o pedido (caminho, query e Accept) mais as versões do estado de
+# que a rota depende: Blockchain.version muda a cada bloco e Mempool.version
+# a cada transação que entra ou sai. Nada expira por tempo; uma entrada só
+# deixa de ser usada quando a versão muda (e sai do LRU depois). O ETag é o
+# hash do corpo, então vale entre processos e reinícios do nó.
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, make_response, request
+import config
+
+# Um contador só por processo: duas instâncias (p.ex. apps de teste) nunca
+# repetem uma versão, e a versão nova é sempre maior que a anterior
+_versions = itertools.count(1)
+
+
+def next_version():
+    return next(_versions)
+
+
+class CachedResponse:
+    __slots__ = ('body', 'status', 'headers', 'etag')
+
+    def __init__(self, response):
+        self.body = response.get_data()
+        self.status = response.status_code
+        self.headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'content-length']
+        etag, _ = response.get_etag()
+        self.etag = etag or hashlib.sha256(self.body).hexdigest()[:32]
+
+    def to_response(self):
+        response = Response(self.body, self.status, self.headers)
+        response.set_etag(self.etag)
+        return response
+
+
+class ResponseCache:
+    """LRU de respostas limitado em entradas e em bytes de corpo"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        # Uma resposta maior que um quarto do limite não entra: expulsaria
+        # o resto do cache para servir um pedido só
+        if self.max_entries <= 0 or len(entry.body) * 4 > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old.body)
+            self._data[key] = entry
+            self.bytes += len(entry.body)
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def cached(self, *versions):
+        """Decorador de rota: versions são funções que retornam as versões do
+        estado que a resposta usa (lidas antes de montar a resposta, então
+        uma mudança no meio do caminho só faz a entrada nunca ser usada)"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (request.endpoint, request.full_path, request.headers.get('Accept', ''),
+                       tuple(version() for version in versions))
+                entry = self.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    # Só respostas 200 com corpo pronto (NDJSON é gerado aos poucos)
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    entry = CachedResponse(response)
+                    self.put(key, entry)
+                if request.if_none_match.contains(entry.etag):
+                    response = Response(status=304)
+                    response.set_etag(entry.etag)
+                    return response
+                return entry.to_response()
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_BYTES)
@@ -11,19 +11,41 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from transactions.mempool import Mempool
 from blockchain.core import Blockchain
 from transactions.utxo import is_valid_transaction
+from transactions.utxo_view import UTXOView, apply_transaction
+from transactions.sigverify import verify_transactions
+from storage.backend import get_storage
 def mine_mempool_transactions(blockchain, mempool, max_txs=100):
+    # Expiradas pelo TTL não entram no bloco
+    mempool.expire_transactions()
     pending_txs = mempool.get_transactions_for_block(max_txs)
 
     if not pending_txs:
         print("[MINER] Nenhuma transação pendente para minerar.")
         return None
 
+    # Monta o bloco numa camada descartável sobre o conjunto confirmado:
+    # gastos duplos entre transações do mesmo bloco são barrados aqui
+    layer = UTXOView(blockchain.utxo_set)
     valid_txs = []
-    for tx in pending_txs:
-        if is_valid_transaction(tx, blockchain.utxo_set):
+    # Assinaturas de todas de uma vez (cache + pool de processos); as que
+    # passam ficam no cache e is_valid_transaction não refaz a conta
+    signatures_ok = verify_transactions(pending_txs)
+    for tx, signed in zip(pending_txs, signatures_ok):
+        candidate = layer.overlay()
+        try:
+            if not signed:
+                valid, reason = False, "assinatura inválida"
+            else:
+                valid, reason = is_valid_transaction(tx, layer)
+            if valid:
+                apply_transaction(candidate, tx)
+        except Exception as e:
+            valid, reason = False, str(e)
+        if valid:
+            candidate.commit()
             valid_txs.append(tx)
         else:
-            print(f"[MINER] Transação inválida descartada: {tx['txid']}")
+            print(f"[MINER] Transação inválida descartada: {tx['txid']} ({reason})")
 
     if not valid_txs:
         print("[MINER] Nenhuma transação válida após verificação.")
@@ -36,11 +58,11 @@ def mine_mempool_transactions(blockchain, mempool, max_txs=100):
     # Força o node_manager a retornar esse daily_data
     blockchain.node_manager.aggregate_daily_data = lambda: daily_data
 
-    # Adiciona bloco
-    new_block = blockchain.add_block()
-
-    # Remove as transações mineradas da mempool
-    mempool.remove_confirmed_transactions([tx['txid'] for tx in valid_txs])
+    # Adiciona bloco e remove as transações mineradas da mempool numa
+    # gravação só (um COMMIT no backend SQLite)
+    with get_storage().atomic():
+        new_block = blockchain.add_block()
+        mempool.remove_confirmed_transactions([tx['txid'] for tx in valid_txs])
 
     print(f"[MINER] Bloco {new_block['index']} minerado com {len(valid_txs)} transações.")
     return new_block
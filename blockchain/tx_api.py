@@ -1,9 +1,197 @@
+import math
+import struct
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-import hashlib
-import json
-from ecdsa import SigningKey, SECP256k1, BadSignatureError
+from blockchain.crypto import PrivateKey
 from transactions.utxo import is_valid_transaction
+from transactions.utxo_view import apply_transaction
+from transactions.coin_selection import select_coins, CoinSelectionError
+from transactions.sigverify import signing_digest, verify_transactions
+from transactions.sigcache import get_public_key
+from blockchain import encoding
+from blockchain.encoding import to_base_units
+from blockchain.wallet import Wallet
+from blockchain.response_cache import response_cache
+import config
+
+class TransferError(Exception):
+    pass
+
+
+# Maior valor que cabe no campo de 8 bytes da codificação (encoding.AMOUNT)
+MAX_AMOUNT_UNITS = 2 ** 63 - 1
+
+
+def amount_units(value):
+    """Valor de um campo de transação em unidades base; ValueError se não for
+    um número finito que caiba na codificação"""
+    if isinstance(value, bool) or not math.isfinite(float(value)):
+        raise ValueError(f'valor inválido: {value}')
+    units = to_base_units(value)
+    if abs(units) > MAX_AMOUNT_UNITS:
+        raise ValueError(f'valor fora do limite: {value}')
+    return units
+
+
+def parse_transfer(data):
+    """Confere os campos de uma transferência (/new e itens do /batch).
+
+    Retorna (amount, max_inputs) ou levanta TransferError com a mensagem.
+    """
+    if not isinstance(data, dict):
+        raise TransferError('Transação deve ser um objeto JSON')
+    required_fields = {'sender', 'recipient', 'amount', 'private_key'}
+    if not all(field in data for field in required_fields):
+        missing = [f for f in required_fields if f not in data]
+        raise TransferError(f'Campos obrigatórios faltando: {", ".join(missing)}')
+
+    if data['sender'] == data['recipient']:
+        raise TransferError('Remetente e destinatário não podem ser iguais')
+    try:
+        amount = float(data['amount'])
+    except (ValueError, TypeError):
+        raise TransferError('Valor de transação inválido')
+    if not math.isfinite(amount) or amount <= 0:
+        raise TransferError('O valor deve ser positivo')
+
+    try:
+        max_inputs = int(data['max_inputs']) if data.get('max_inputs') is not None else None
+    except (ValueError, TypeError):
+        raise TransferError('max_inputs inválido')
+    return amount, max_inputs
+
+
+def build_transfer(utxo_set, data, amount, max_inputs, signing_key=None):
+    """Seleciona as moedas em utxo_set, monta e assina a transação"""
+    try:
+        selection = select_coins(
+            utxo_set, data['sender'], amount,
+            strategy=data.get('coin_selection'),
+            max_inputs=max_inputs
+        )
+    except CoinSelectionError as e:
+        raise TransferError(str(e))
+    selected_utxos = selection.utxos
+
+    tx = {
+        'version': encoding.TX_VERSION,
+        'sender': data['sender'],
+        'recipient': data['recipient'],
+        'amount': amount,
+        'timestamp': datetime.utcnow().isoformat(),
+        'inputs': [],
+        'outputs': [],
+        'signatures': []
+    }
+    if selection.excess > 0:
+        # bnb sem troco: a sobra é paga como fee
+        tx['fee'] = selection.excess
+
+    for utxo in selected_utxos:
+        tx['inputs'].append({
+            'txid': utxo.txid,
+            'index': utxo.index,
+            'public_key': utxo.public_key
+        })
+
+    tx['outputs'].append({
+        'address': data['recipient'],
+        'amount': amount,
+        'public_key': ''
+    })
+
+    change = selection.change
+    if change > 0:
+        tx['outputs'].append({
+            'address': data['sender'],
+            'amount': change,
+            'public_key': selected_utxos[0].public_key
+        })
+
+    tx['txid'] = encoding.tx_hash(tx)
+
+    signing_key = signing_key or PrivateKey.from_hex(data['private_key'])
+    for i, inp in enumerate(tx['inputs']):
+        signing_hash = signing_digest(tx['txid'], i)
+        signature = signing_key.sign_digest(signing_hash)
+        tx['signatures'].append(signature.hex())
+        tx['inputs'][i]['signature'] = signature.hex()
+    return tx
+
+
+def _owns(utxo, public_key_hex):
+    """A chave do input pode gastar o UTXO? Compara com a chave gravada na
+    saída; saídas sem chave (ou PKH:) são conferidas pelo endereço"""
+    try:
+        key = get_public_key(public_key_hex)
+        if utxo.public_key and not utxo.public_key.startswith('PKH:'):
+            return get_public_key(utxo.public_key).to_string('compressed') == key.to_string('compressed')
+    except ValueError:
+        return False
+    return utxo.address == Wallet.generate_address(key)
+
+
+def check_raw_transaction(utxo_set, tx):
+    """Confere uma transação já assinada pelo cliente (/submit e itens do
+    /batch): estrutura, txid, UTXOs, dono de cada input e valores.
+
+    As assinaturas ficam para quem chama (verificação em lote). Levanta
+    TransferError com a mensagem.
+    """
+    if not isinstance(tx, dict):
+        raise TransferError('Transação deve ser um objeto JSON')
+    if tx.get('version') != encoding.TX_VERSION:
+        raise TransferError(f'Versão de transação não suportada: {tx.get("version")}')
+    if not tx.get('timestamp'):
+        # O timestamp entra no txid; não pode ser preenchido pelo servidor
+        raise TransferError('A transação precisa de timestamp')
+    inputs = tx.get('inputs')
+    outputs = tx.get('outputs')
+    if not isinstance(inputs, list) or not inputs:
+        raise TransferError('A transação precisa de ao menos um input')
+    if not isinstance(outputs, list) or not outputs:
+        raise TransferError('A transação precisa de ao menos um output')
+    if len(inputs) > config.MAX_TX_INPUTS:
+        raise TransferError(f'A transação tem mais de {config.MAX_TX_INPUTS} inputs')
+
+    try:
+        for inp in inputs:
+            if not isinstance(inp['index'], int) or inp['index'] < 0:
+                raise ValueError
+            bytes.fromhex(inp['public_key'])
+            bytes.fromhex(inp['signature'])
+        output_units = 0
+        for out in outputs:
+            units = amount_units(out['amount'])
+            if units <= 0 or not out['address']:
+                raise ValueError
+            output_units += units
+        fee_units = amount_units(tx.get('fee', 0) or 0)
+        if fee_units < 0:
+            raise ValueError
+        amount_units(tx.get('amount', 0))
+        txid = encoding.tx_hash(tx)
+    except (KeyError, TypeError, ValueError, AttributeError, OverflowError, struct.error):
+        raise TransferError('Transação malformada')
+    if txid != tx.get('txid'):
+        raise TransferError('txid não confere com o conteúdo da transação')
+
+    spent = set()
+    input_units = 0
+    for i, inp in enumerate(inputs):
+        outpoint = (inp['txid'], inp['index'])
+        if outpoint in spent:
+            raise TransferError(f'UTXO {inp["txid"]}:{inp["index"]} repetido nos inputs')
+        spent.add(outpoint)
+        utxo = utxo_set.get_utxo(*outpoint)
+        if utxo is None:
+            raise TransferError(f'UTXO {inp["txid"]}:{inp["index"]} não encontrado ou já gasto')
+        if not _owns(utxo, inp['public_key']):
+            raise TransferError(f'A chave do input {i} não pode gastar o UTXO {inp["txid"]}:{inp["index"]}')
+        input_units += to_base_units(utxo.amount)
+    if output_units + fee_units > input_units:
+        raise TransferError('Outputs + fee maiores que os inputs')
+
 
 def tx_bp(utxo_set, mempool, blockchain):
     bp = Blueprint('transaction', __name__)
@@ -15,104 +203,141 @@ def tx_bp(utxo_set, mempool, blockchain):
                 return jsonify({'status': 'error', 'message': 'Content-Type deve ser application/json'}), 400
 
             data = request.get_json()
-            required_fields = {'sender', 'recipient', 'amount', 'private_key'}
-            if not all(field in data for field in required_fields):
-                missing = [f for f in required_fields if f not in data]
-                return jsonify({'status': 'error', 'message': f'Campos obrigatórios faltando: {", ".join(missing)}'}), 400
-                
-            if data['sender'] == data['recipient']:
-                return jsonify({'status': 'error', 'message': 'Remetente e destinatário não podem ser iguais'}), 400
             try:
-                amount = float(data['amount'])
-                if amount <= 0:
-                    return jsonify({'status': 'error', 'message': 'O valor deve ser positivo'}), 400
-            except (ValueError, TypeError):
-                return jsonify({'status': 'error', 'message': 'Valor de transação inválido'}), 400
-
-            sender_utxos = utxo_set.find_utxos(data['sender'])
-            if not sender_utxos:
-                return jsonify({'status': 'error', 'message': 'Nenhum UTXO disponível para o remetente'}), 400
-
-            selected_utxos = []
-            total_input = 0.0
-            for utxo in sender_utxos:
-                selected_utxos.append(utxo)
-                total_input += utxo.amount
-                if total_input >= amount:
-                    break
-
-            if total_input < amount:
-                return jsonify({'status': 'error', 'message': f'Saldo insuficiente. Necessário: {amount}, Disponível: {total_input}'}), 400
-
-            tx = {
-                'version': 1,
-                'sender': data['sender'],
-                'recipient': data['recipient'],
-                'amount': amount,
-                'timestamp': datetime.utcnow().isoformat(),
-                'inputs': [],
-                'outputs': [],
-                'signatures': []
-            }
-
-            for utxo in selected_utxos:
-                tx['inputs'].append({
-                    'txid': utxo.txid,
-                    'index': utxo.index,
-                    'public_key': utxo.public_key
-                })
-
-            tx['outputs'].append({
-                'address': data['recipient'],
-                'amount': amount,
-                'public_key': ''
-            })
-
-            change = total_input - amount
-            if change > 0:
-                tx['outputs'].append({
-                    'address': data['sender'],
-                    'amount': change,
-                    'public_key': selected_utxos[0].public_key
-                })
-
-            tx_str = json.dumps({k: v for k, v in tx.items() if k not in ['signatures']}, sort_keys=True)
-            tx['txid'] = hashlib.sha256(tx_str.encode()).hexdigest()
-
-            signing_key = SigningKey.from_string(bytes.fromhex(data['private_key']), curve=SECP256k1)
-            for i, inp in enumerate(tx['inputs']):
-                signing_data = f"{tx['txid']}:{i}".encode()
-                signing_hash = hashlib.sha256(signing_data).digest()
-                signature = signing_key.sign_digest(signing_hash)
-                tx['signatures'].append(signature.hex())
-                tx['inputs'][i]['signature'] = signature.hex()
-
-                verifying_key = signing_key.verifying_key
-                if not verifying_key.verify_digest(signature, signing_hash):
-                    return jsonify({'status': 'error', 'message': 'Assinatura inválida gerada'}), 400
+                amount, max_inputs = parse_transfer(data)
+                tx = build_transfer(utxo_set, data, amount, max_inputs)
+            except TransferError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
 
+            # As assinaturas são conferidas contra a chave gravada em cada UTXO:
+            # uma chave privada que não é a do remetente para aqui
             is_valid, validation_msg = is_valid_transaction(tx, utxo_set)
             if not is_valid:
                 return jsonify({'status': 'error', 'message': f'Transação inválida: {validation_msg}'}), 400
 
             try:
                 mempool.add_transaction(tx)
-                utxo_set.save_utxos()
             except Exception as e:
                 return jsonify({'status': 'error', 'message': f'Erro ao adicionar ao mempool: {str(e)}'}), 400
 
             return jsonify({'status': 'success', 'txid': tx['txid'], 'message': 'Transação criada com sucesso'})
 
-        except BadSignatureError as e:
-            return jsonify({'status': 'error', 'message': 'Assinatura inválida - chave privada incorreta'}), 400
         except Exception as e:
             return jsonify({'status': 'error', 'message': f'Erro interno: {str(e)}'}), 500
 
+    @bp.route('/submit', methods=['POST'])
+    def submit_transaction():
+        """Transação já assinada no cliente (blockchain/tx_builder.py).
+
+        O servidor não vê chave privada: só confere a estrutura, os UTXOs e
+        as assinaturas.
+        """
+        if not request.is_json:
+            return jsonify({'status': 'error', 'message': 'Content-Type deve ser application/json'}), 400
+        tx = request.get_json()
+        try:
+            check_raw_transaction(utxo_set, tx)
+        except TransferError as e:
+            return jsonify({'status': 'error', 'message': f'Transação inválida: {e}'}), 400
+        if not verify_transactions([tx])[0]:
+            return jsonify({'status': 'error', 'message': 'Transação inválida: assinatura inválida'}), 400
+
+        try:
+            mempool.add_transaction(tx)
+        except Exception as e:
+            return jsonify({'status': 'error', 'message': f'Erro ao adicionar ao mempool: {str(e)}'}), 400
+        return jsonify({'status': 'success', 'txid': tx['txid'], 'message': 'Transação recebida com sucesso'})
+
+    @bp.route('/batch', methods=['POST'])
+    def batch_transactions():
+        """Várias transferências num pedido só: {"transactions": [...]}.
+
+        Cada item tem os campos do /new ou é uma transação já assinada (com
+        txid e inputs, como no /submit). Os itens são montados em ordem numa
+        camada descartável, então dois pagamentos do mesmo remetente não
+        escolhem as mesmas moedas (o segundo pode gastar o troco do
+        primeiro). As assinaturas são verificadas juntas (em paralelo nos
+        lotes grandes) e a mempool admite todas sob um lock e uma gravação.
+        """
+        if not request.is_json:
+            return jsonify({'status': 'error', 'message': 'Content-Type deve ser application/json'}), 400
+        data = request.get_json()
+        items = data.get('transactions') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({'status': 'error', 'message': 'Envie uma lista não vazia em "transactions"'}), 400
+        if len(items) > config.MAX_BATCH_SIZE:
+            return jsonify({'status': 'error', 'message': f'Lote maior que o limite de {config.MAX_BATCH_SIZE} transações'}), 400
+
+        results = [{'index': n} for n in range(len(items))]
+        built = []                      # (posição no lote, tx)
+        keys = {}                       # chave privada hex -> PrivateKey (um pagador, muitos itens)
+        layer = utxo_set.overlay()
+        for n, item in enumerate(items):
+            try:
+                if isinstance(item, dict) and 'txid' in item and 'inputs' in item:
+                    check_raw_transaction(layer, item)
+                    tx = item
+                else:
+                    amount, max_inputs = parse_transfer(item)
+                    signing_key = keys.get(item['private_key'])
+                    if signing_key is None:
+                        signing_key = keys[item['private_key']] = PrivateKey.from_hex(item['private_key'])
+                    tx = build_transfer(layer, item, amount, max_inputs, signing_key)
+                apply_transaction(layer, tx)
+            except Exception as e:
+                results[n].update(status='error', message=str(e))
+                continue
+            built.append((n, tx))
+
+        admit = []
+        for (n, tx), signed in zip(built, verify_transactions([tx for _, tx in built])):
+            if signed:
+                admit.append((n, tx))
+            else:
+                results[n].update(status='error', txid=tx['txid'], message='Assinatura inválida')
+
+        errors = mempool.add_transactions([tx for _, tx in admit])
+        for (n, tx), error in zip(admit, errors):
+            if error is None:
+                results[n].update(status='success', txid=tx['txid'])
+            else:
+                results[n].update(status='error', txid=tx['txid'], message=f'Erro ao adicionar ao mempool: {error}')
+
+        accepted = sum(1 for r in results if r['status'] == 'success')
+        return jsonify({
+            'status': 'success' if accepted == len(items) else ('partial' if accepted else 'error'),
+            'accepted': accepted,
+            'rejected': len(items) - accepted,
+            'results': results
+        })
+
     @bp.route('/pending', methods=['GET'])
+    @response_cache.cached(lambda: mempool.version)
     def pending_transactions():
+        pending = mempool.get_all_transactions()
         return jsonify({
-            'count': len(mempool.transactions),
-            'transactions': mempool.transactions
+            'count': len(pending),
+            'transactions': pending
         })
 
+    @bp.route('/<txid>', methods=['GET'])
+    def get_transaction(txid):
+        found = blockchain.get_transaction(txid)
+        if found is not None:
+            block, tx, position = found
+            return jsonify({
+                'status': 'confirmed',
+                'block_height': block['index'],
+                'block_hash': block['hash'],
+                'position': position,
+                'confirmations': len(blockchain.chain) - block['index'],
+                'transaction': tx
+            })
+
+        tx = mempool.get_transaction(txid)
+        if tx is not None:
+            return jsonify({'status': 'pending', 'transaction': tx})
+
+        return jsonify({'status': 'error', 'message': 'Transação não encontrada'}), 404
+
     return bp
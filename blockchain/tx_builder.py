@@ -0,0 +1,120 @@
+# blockchain/tx_builder.py
+# Montagem e assinatura de transações no cliente, para /transaction/submit.
+#
+# A chave privada não sai da máquina do cliente: a transação é montada a
+# partir dos UTXOs que o nó lista em /wallet/balance/<endereço>, o txid é o
+# mesmo do nó (encoding.tx_hash, sem as assinaturas) e cada input assina
+# sha256(f"{txid}:{i}"), o digest que o nó verifica.
+#
+#   python -m blockchain.tx_builder --node http://localhost:5000 \
+#       --private-key <hex> --sender <endereço> --to <endereço> --amount 1.5 [--fee 0.0001]
+import sys
+import os
+from argparse import ArgumentParser
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain import encoding
+from blockchain.crypto import PrivateKey
+from blockchain.encoding import to_base_units, from_base_units
+from transactions.sigverify import signing_digest
+
+DEFAULT_FEE = 0.0001
+
+
+class BuildError(Exception):
+    pass
+
+
+def select_utxos(utxos, amount):
+    """Maiores primeiro até cobrir amount; utxos são dicts como os de /wallet/balance"""
+    target = to_base_units(amount)
+    chosen = []
+    total = 0
+    for utxo in sorted(utxos, key=lambda u: to_base_units(u['amount']), reverse=True):
+        if total >= target:
+            break
+        chosen.append(utxo)
+        total += to_base_units(utxo['amount'])
+    if total < target:
+        raise BuildError(f"Saldo insuficiente. Necessário: {amount}, Disponível: {from_base_units(total)}")
+    return chosen
+
+
+def build_transaction(sender, recipient, amount, utxos, public_key, fee=DEFAULT_FEE, timestamp=None):
+    """Transação sem assinaturas (com txid) que paga amount + fee com utxos.
+
+    public_key (hex) é a chave do remetente, colocada em cada input; o troco
+    volta para sender.
+    """
+    if sender == recipient:
+        raise BuildError('Remetente e destinatário não podem ser iguais')
+    if amount <= 0 or fee < 0:
+        raise BuildError('Valor e fee devem ser positivos')
+    chosen = select_utxos(utxos, from_base_units(to_base_units(amount) + to_base_units(fee)))
+
+    tx = {
+        'version': encoding.TX_VERSION,
+        'sender': sender,
+        'recipient': recipient,
+        'amount': amount,
+        'fee': fee,
+        'timestamp': timestamp or datetime.utcnow().isoformat(),
+        'inputs': [
+            {'txid': utxo['txid'], 'index': utxo['index'], 'public_key': public_key}
+            for utxo in chosen
+        ],
+        'outputs': [{'address': recipient, 'amount': amount, 'public_key': ''}],
+    }
+    change = sum(to_base_units(u['amount']) for u in chosen) - to_base_units(amount) - to_base_units(fee)
+    if change > 0:
+        tx['outputs'].append({'address': sender, 'amount': from_base_units(change), 'public_key': public_key})
+    tx['txid'] = encoding.tx_hash(tx)
+    return tx
+
+
+def sign_transaction(tx, private_key):
+    """Assina todos os inputs de tx (dict com txid) com private_key (hex ou PrivateKey)"""
+    if not isinstance(private_key, PrivateKey):
+        private_key = PrivateKey.from_hex(private_key)
+    if encoding.tx_hash(tx) != tx.get('txid'):
+        raise BuildError('txid não confere com o conteúdo da transação')
+    tx['signatures'] = []
+    for i, inp in enumerate(tx['inputs']):
+        signature = private_key.sign_digest(signing_digest(tx['txid'], i)).hex()
+        inp['signature'] = signature
+        tx['signatures'].append(signature)
+    return tx
+
+
+def create_transfer(private_key, sender, recipient, amount, utxos, fee=DEFAULT_FEE):
+    """Monta e assina uma transferência pronta para /transaction/submit"""
+    if not isinstance(private_key, PrivateKey):
+        private_key = PrivateKey.from_hex(private_key)
+    public_key = private_key.public_key.to_string('compressed').hex()
+    tx = build_transaction(sender, recipient, amount, utxos, public_key, fee)
+    return sign_transaction(tx, private_key)
+
+
+if __name__ == '__main__':
+    import requests
+
+    parser = ArgumentParser()
+    parser.add_argument('--node', default='http://localhost:5000')
+    parser.add_argument('--private-key', required=True)
+    parser.add_argument('--sender', required=True)
+    parser.add_argument('--to', required=True)
+    parser.add_argument('--amount', type=float, required=True)
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE)
+    parser.add_argument('--dry-run', action='store_true', help='só imprime a transação assinada')
+    args = parser.parse_args()
+
+    balance = requests.get(f"{args.node}/wallet/balance/{args.sender}", timeout=30).json()
+    tx = create_transfer(args.private_key, args.sender, args.to, args.amount, balance.get('utxos', []), args.fee)
+    if args.dry_run:
+        import json
+        print(json.dumps(tx, indent=2))
+    else:
+        response = requests.post(f"{args.node}/transaction/submit", json=tx, timeout=30)
+        print(f"[TX] {response.status_code} {response.json()}")
@@ -0,0 +1,177 @@
+# blockchain/verify.py
+# Verificação completa da chain: encadeamento, hashes, merkle_root/txids e
+# assinaturas de todos os inputs.
+#
+# Os hashes e as assinaturas são verificados em pedaços num pool de processos;
+# o encadeamento (previous_hash x hash anterior) é comparado coluna a coluna
+# no processo principal.
+#
+#   python -m blockchain.verify [--workers N] [--chunk-size N]
+import sys
+import os
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blockchain import encoding
+from blockchain.merkle import merkle_root
+from transactions.sigverify import check_jobs, signing_digest
+
+BLOCK_CHUNK = 256
+SIG_CHUNK = 512
+PROGRESS_INTERVAL = 1.0   # segundos entre linhas de progresso
+
+
+def _check_blocks(chunk):
+    """Recalcula hash, merkle_root e txids (v2+) de um pedaço de blocos.
+
+    Retorna (altura, motivo) da primeira falha do pedaço ou None.
+    """
+    for height, block in chunk:
+        if block.get('version', 1) >= encoding.MERKLE_BLOCK_VERSION:
+            txids = [tx['txid'] for tx in block.get('transactions', [])]
+            if merkle_root(txids) != block.get('merkle_root'):
+                return height, 'merkle_root não confere com as transações'
+        for tx in block.get('transactions', []):
+            if tx.get('version', 1) >= encoding.TX_VERSION and encoding.tx_hash(tx) != tx['txid']:
+                return height, f"txid {tx['txid']} não confere com o conteúdo"
+        if encoding.block_hash(block) != block.get('hash'):
+            return height, 'hash do bloco não confere'
+    return None
+
+
+def _check_signatures(chunk):
+    """Verifica um pedaço de jobs (altura, txid, input, pubkey, assinatura)"""
+    results = check_jobs([(public_key, signing_digest(txid, i), signature)
+                          for _, txid, i, public_key, signature in chunk])
+    for (height, txid, i, _, _), ok in zip(chunk, results):
+        if not ok:
+            return height, f'assinatura inválida no input {i} da transação {txid}'
+    return None
+
+
+def _check_links(chain):
+    """Encadeamento e alturas, comparados em colunas"""
+    hashes = [block.get('hash') for block in chain]
+    previous = [block.get('previous_hash') for block in chain]
+    indexes = [block.get('index') for block in chain]
+
+    bad_index = next((h for h, index in enumerate(indexes) if index != h), None)
+    bad_link = next(
+        (h for h, (prev, parent) in enumerate(zip(previous[1:], hashes[:-1]), start=1) if prev != parent),
+        None
+    )
+    failures = []
+    if bad_index is not None:
+        failures.append((bad_index, 'índice do bloco fora de ordem'))
+    if bad_link is not None:
+        failures.append((bad_link, 'previous_hash não aponta para o bloco anterior'))
+    return failures
+
+
+def _signature_jobs(chain):
+    jobs = []
+    for height, block in enumerate(chain):
+        for tx in block.get('transactions', []):
+            for i, inp in enumerate(tx.get('inputs', [])):
+                jobs.append((height, tx['txid'], i, inp.get('public_key', ''), inp.get('signature') or ''))
+    return jobs
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _print_progress(blocks_done, blocks_total, sigs_done, sigs_total, elapsed):
+    blocks_rate = blocks_done / elapsed if elapsed else 0
+    sigs_rate = sigs_done / elapsed if elapsed else 0
+    print(f"[VERIFY] blocos {blocks_done}/{blocks_total} ({blocks_rate:,.0f}/s)  "
+          f"assinaturas {sigs_done}/{sigs_total} ({sigs_rate:,.0f}/s)")
+
+
+def verify_chain(chain, workers=None, block_chunk=BLOCK_CHUNK, sig_chunk=SIG_CHUNK,
+                 progress=_print_progress):
+    """Valida a chain inteira e retorna um relatório.
+
+    workers=None usa todos os núcleos; workers=1 roda tudo no processo atual.
+    """
+    start = time.perf_counter()
+    failures = _check_links(chain)
+
+    block_tasks = _chunks(list(enumerate(chain)), block_chunk)
+    sig_jobs = _signature_jobs(chain)
+    sig_tasks = _chunks(sig_jobs, sig_chunk)
+
+    blocks_done = sigs_done = 0
+    last_report = start
+
+    def account(kind, task, result):
+        nonlocal blocks_done, sigs_done, last_report
+        if kind == 'blocks':
+            blocks_done += len(task)
+        else:
+            sigs_done += len(task)
+        if result is not None:
+            failures.append(result)
+
+        now = time.perf_counter()
+        finished = blocks_done == len(chain) and sigs_done == len(sig_jobs)
+        if progress and (finished or now - last_report >= PROGRESS_INTERVAL):
+            last_report = now
+            progress(blocks_done, len(chain), sigs_done, len(sig_jobs), now - start)
+
+    if workers == 1:
+        for task in block_tasks:
+            account('blocks', task, _check_blocks(task))
+        for task in sig_tasks:
+            account('sigs', task, _check_signatures(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for task in block_tasks:
+                futures[pool.submit(_check_blocks, task)] = ('blocks', task)
+            for task in sig_tasks:
+                futures[pool.submit(_check_signatures, task)] = ('sigs', task)
+            for future in as_completed(futures):
+                kind, task = futures[future]
+                account(kind, task, future.result())
+
+    elapsed = time.perf_counter() - start
+    first_failure = min(failures, key=lambda f: f[0]) if failures else None
+    return {
+        'ok': first_failure is None,
+        'height': len(chain),
+        'signatures': len(sig_jobs),
+        'elapsed': elapsed,
+        'blocks_per_s': len(chain) / elapsed if elapsed else 0,
+        'sigs_per_s': len(sig_jobs) / elapsed if elapsed else 0,
+        'first_failure': None if first_failure is None else {
+            'height': first_failure[0],
+            'reason': first_failure[1]
+        }
+    }
+
+
+def print_report(report):
+    print(f"[VERIFY] {report['height']} blocos e {report['signatures']} assinaturas "
+          f"em {report['elapsed']:.2f}s ({report['blocks_per_s']:,.0f} blocos/s, "
+          f"{report['sigs_per_s']:,.0f} assinaturas/s)")
+    if report['ok']:
+        print("[VERIFY] Chain válida")
+    else:
+        failure = report['first_failure']
+        print(f"[VERIFY] Primeira falha na altura {failure['height']}: {failure['reason']}")
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=SIG_CHUNK)
+    args = parser.parse_args()
+
+    from blockchain.core import Blockchain
+    report = verify_chain(Blockchain().chain, workers=args.workers, sig_chunk=args.chunk_size)
+    print_report(report)
+    sys.exit(0 if report['ok'] else 1)
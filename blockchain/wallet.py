@@ -1,10 +1,12 @@
 # blockchain/wallet.py
 from mnemonic import Mnemonic
-from ecdsa import SigningKey, SECP256k1, VerifyingKey, BadSignatureError
+from blockchain.crypto import PrivateKey, PublicKey
 import hashlib
-import json
 from typing import List, Dict
 from transactions.utxo import UTXOSet, UTXO
+from transactions.coin_selection import select_coins, CoinSelectionError
+from blockchain import encoding
+from transactions.sigverify import verify_batch
 
 class InsufficientFundsError(Exception):
     pass
@@ -17,8 +19,8 @@ class Wallet:
     def create() -> 'Wallet':
         mnemo = Mnemonic('english')
         seed = mnemo.generate(strength=128)
-        priv = SigningKey.generate(curve=SECP256k1)
-        pub = priv.get_verifying_key()
+        priv = PrivateKey.generate()
+        pub = priv.public_key
         
         w = Wallet()
         w.mnemonic = seed
@@ -28,31 +30,31 @@ class Wallet:
         return w
 
     @staticmethod
-    def generate_address(pub_key: VerifyingKey) -> str:
+    def generate_address(pub_key: PublicKey) -> str:
         return hashlib.sha256(pub_key.to_string()).hexdigest()[:40]
 
     @staticmethod
     def build_transaction(sender: str, recipient: str, amount: float, 
                       private_key: str, fee: float = 0.0001) -> Dict:
         utxo_set = UTXOSet()
-        sk = SigningKey.from_string(bytes.fromhex(private_key), curve=SECP256k1)
+        sk = PrivateKey.from_hex(private_key)
 
-        utxos = utxo_set.find_utxos(sender)
-        if not utxos:
-            raise InsufficientFundsError("Sem UTXOs disponíveis")
-
-        total_input = sum(utxo.amount for utxo in utxos)
         required = amount + fee
-
-        if total_input < required:
-            raise InsufficientFundsError(f"Saldo insuficiente. Necessário: {required}, Disponível: {total_input}")
+        try:
+            selection = select_coins(utxo_set, sender, required)
+        except CoinSelectionError as e:
+            raise InsufficientFundsError(str(e))
+        utxos = selection.utxos
+        if selection.excess > 0:
+            # bnb sem troco: a sobra é paga como fee
+            fee = encoding.from_base_units(encoding.to_base_units(fee) + encoding.to_base_units(selection.excess))
 
         inputs = []
         for utxo in utxos:
             input_data = {
                 "txid": utxo.txid,
                 "index": utxo.index,
-                "public_key": sk.get_verifying_key().to_string("compressed").hex(),
+                "public_key": sk.public_key.to_string("compressed").hex(),
                 "signature": None
             }
             inputs.append(input_data)
@@ -61,7 +63,7 @@ class Wallet:
             {"address": recipient, "amount": amount, "locking_script": f"PKH:{recipient}"}
         ]
 
-        change = total_input - required
+        change = selection.change
         if change > 0:
             outputs.append({
                 "address": sender,
@@ -69,10 +71,11 @@ class Wallet:
                 "locking_script": f"PKH:{sender}"
             })
 
-        tx_data = {"inputs": inputs, "outputs": outputs}
+        tx_data = {"version": encoding.TX_VERSION, "inputs": inputs, "outputs": outputs, "fee": fee}
 
-        # Calcular hash dos dados da transação
-        signing_data = hashlib.sha256(json.dumps(tx_data, sort_keys=True).encode()).digest()
+        # O txid (encoding binário, sem assinaturas) é o dado assinado
+        txid = encoding.tx_hash(tx_data)
+        signing_data = bytes.fromhex(txid)
 
         # Assinar a transação uma única vez
         signature = sk.sign(signing_data).hex()
@@ -81,9 +84,8 @@ class Wallet:
         for inp in inputs:
             inp["signature"] = signature
 
-        txid = hashlib.sha256(json.dumps(tx_data, sort_keys=True).encode()).hexdigest()
-
         return {
+            "version": encoding.TX_VERSION,
             "txid": txid,
             "inputs": inputs,
             "outputs": outputs,
@@ -98,24 +100,21 @@ class Wallet:
         if not all(field in tx for field in required_fields):
             return False
 
-        # Calcular hash dos dados para verificação (inputs + outputs)
-        signing_data = hashlib.sha256(json.dumps({"inputs": tx["inputs"], "outputs": tx["outputs"]}, sort_keys=True).encode()).digest()
+        # O txid precisa bater com o encoding binário e é o dado assinado
+        if encoding.tx_hash(tx) != tx["txid"]:
+            return False
+        signing_data = bytes.fromhex(tx["txid"])
 
-        for inp in tx["inputs"]:
-            try:
-                vk = VerifyingKey.from_string(
-    bytes.fromhex(inp["public_key"]), 
-    curve=SECP256k1,
-    validate_point=True
-)
-                if not vk.verify(bytes.fromhex(inp["signature"]), signing_data):
-                    return False
-            except BadSignatureError:
-                return False
+        # sk.sign(signing_data) assina o sha1 dos dados (hash padrão do ecdsa);
+        # os inputs são verificados juntos, em lote
+        digest = hashlib.sha1(signing_data).digest()
+        jobs = [(inp["public_key"], digest, inp["signature"] or "") for inp in tx["inputs"]]
+        if not all(verify_batch(jobs)):
+            return False
 
         total_input = 0
         for inp in tx["inputs"]:
-            utxo = utxo_set.utxos.get(inp["txid"], {}).get(inp["index"])
+            utxo = utxo_set.get_utxo(inp["txid"], inp["index"])
             if not utxo:
                 return False
             total_input += utxo.amount
@@ -1,12 +1,19 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, jsonify, request
 from blockchain.wallet import Wallet
 from blockchain.core import init_blockchain
 from mnemonic import Mnemonic
-from ecdsa import SigningKey, SECP256k1
+from blockchain.crypto import PrivateKey
+from blockchain.response_cache import response_cache
+from blockchain.address_index import parse_cursor, MEMPOOL_CURSOR
+from blockchain.provisioning import provision
+import config
 
 
 def wallet_bp(utxo_set, mempool):
     bp = Blueprint('wallet', __name__)
+    # Saldo e histórico mudam com a chain e com a mempool
+    cached = response_cache.cached(lambda: init_blockchain().version, lambda: mempool.version)
     
     @bp.route('/import', methods=['POST'])
     def import_wallet():
@@ -22,8 +29,8 @@ def wallet_bp(utxo_set, mempool):
         try:
             seed = mnemo.to_seed(mnemonic, passphrase="")
             priv_key_bytes = seed[:32]
-            priv = SigningKey.from_string(priv_key_bytes, curve=SECP256k1)
-            pub = priv.get_verifying_key()
+            priv = PrivateKey(priv_key_bytes)
+            pub = priv.public_key
             address = Wallet.generate_address(pub)
 
             return jsonify({
@@ -45,7 +52,61 @@ def wallet_bp(utxo_set, mempool):
             'private_key': w.private_key.to_string().hex()
         })
 
+    @bp.route('/bulk', methods=['POST'])
+    def bulk_wallets():
+        """Gera ({"count": N}) ou importa ({"mnemonics": [...]}) carteiras em lote.
+
+        A resposta é NDJSON, uma linha por carteira na ordem do pedido
+        ({"index", "mnemonic", "address", "public_key", "private_key"} ou
+        {"index", "error"}). Com "register": true os endereços entram no
+        NodeManager, com node_id de "node_ids" ou o próprio endereço.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'JSON inválido'}), 400
+
+        count = data.get('count')
+        mnemonics = data.get('mnemonics')
+        if (count is None) == (mnemonics is None):
+            return jsonify({'error': 'Envie "count" ou "mnemonics"'}), 400
+        if mnemonics is None:
+            if not isinstance(count, int) or count <= 0:
+                return jsonify({'error': '"count" deve ser um inteiro positivo'}), 400
+            items = [None] * count
+        else:
+            if not isinstance(mnemonics, list) or not mnemonics:
+                return jsonify({'error': '"mnemonics" deve ser uma lista não vazia'}), 400
+            items = mnemonics
+        if len(items) > config.MAX_PROVISION_BATCH:
+            return jsonify({'error': f'Lote maior que o limite de {config.MAX_PROVISION_BATCH} carteiras'}), 400
+
+        register = bool(data.get('register'))
+        node_ids = data.get('node_ids')
+        if node_ids is not None and (not isinstance(node_ids, list) or len(node_ids) != len(items)):
+            return jsonify({'error': '"node_ids" precisa de um node_id por carteira'}), 400
+        if node_ids is not None and not all(isinstance(node_id, str) and node_id for node_id in node_ids):
+            return jsonify({'error': '"node_ids" deve conter só textos não vazios'}), 400
+        node_manager = init_blockchain().node_manager if register else None
+
+        def generate():
+            registered = []
+            try:
+                for n, wallet in enumerate(provision(items)):
+                    wallet = {'index': n, **wallet}
+                    if register and 'error' not in wallet:
+                        wallet['node_id'] = node_ids[n] if node_ids else wallet['address']
+                        registered.append((wallet['node_id'], wallet['address']))
+                    yield json.dumps(wallet) + '\n'
+            finally:
+                # Registra o que já foi entregue, mesmo se o cliente desconectar
+                if registered:
+                    node_manager.register_nodes(registered)
+                    print(f"[WALLET] {len(registered)} nós registrados")
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
     @bp.route('/balance/<address>', methods=['GET'])
+    @cached
     def get_balance(address):
         try:
             confirmed_balance = utxo_set.get_balance(address) or 0
@@ -81,64 +142,40 @@ def wallet_bp(utxo_set, mempool):
             return jsonify({'error': 'Internal error', 'details': str(e)}), 500
 
     @bp.route('/transactions/<address>', methods=['GET'])
+    @cached
     def wallet_transactions(address):
-        blockchain = init_blockchain()
-        history = []
+        """Histórico do endereço, do mais novo para o mais velho: pendentes
+        (ordem de chegada) e depois confirmadas (ordem da chain).
 
-        # --- Transações Confirmadas ---
-        for block in blockchain.chain:
-            ts = block.get('timestamp')
-            for tx in block.get('transactions', []):
-                sender = tx.get('sender')
-                sent = 0
-                received = 0
-
-                if sender == address:
-                    # Valor ENVIADO: soma dos outputs que não são para o próprio address
-                    sent = sum(
-                        out.get('amount', 0) for out in tx.get('outputs', [])
-                        if out.get('address') != address
-                    )
-                else:
-                    # Valor RECEBIDO: soma dos outputs para o address
-                    received = sum(
-                        out.get('amount', 0) for out in tx.get('outputs', [])
-                        if out.get('address') == address
-                    )
-
-                if sent > 0:
-                    history.append({'txid': tx['txid'], 'type': 'sent (confirmed)', 'amount': sent, 'date': ts})
-                if received > 0:
-                    history.append({'txid': tx['txid'], 'type': 'received (confirmed)', 'amount': received, 'date': ts})
-
-        # --- Transações Pendentes ---
-        for tx in mempool.get_all_transactions():
-            txid = tx.get('txid')
-            ts = tx.get('timestamp') or tx.get('date')
-            sender = tx.get('sender')
-            sent_pending = 0
-            received_pending = 0
-
-            if sender == address:
-                # Valor ENVIADO pendente: outputs para outros endereços
-                sent_pending = sum(
-                    out.get('amount', 0) for out in tx.get('outputs', [])
-                    if out.get('address') != address
-                )
-            else:
-                # Valor RECEBIDO pendente: outputs para o address
-                received_pending = sum(
-                    out.get('amount', 0) for out in tx.get('outputs', [])
-                    if out.get('address') == address
-                )
-
-            if sent_pending > 0:
-                history.append({'txid': txid, 'type': 'sent (pending)', 'amount': sent_pending, 'date': ts})
-            if received_pending > 0:
-                history.append({'txid': txid, 'type': 'received (pending)', 'amount': received_pending, 'date': ts})
-
-        # Ordenar por data
-        history.sort(key=lambda x: x['date'], reverse=True)
-        return jsonify({'transactions': history})
+        ?limit=N limita a página; ?before=<cursor> continua a partir do
+        'next' da página anterior.
+        """
+        try:
+            before = request.args.get('before')
+            before = parse_cursor(before) if before else None
+            limit = request.args.get('limit')
+            limit = int(limit) if limit else None
+            if limit is not None and limit <= 0:
+                raise ValueError("'limit' deve ser > 0")
+        except ValueError as e:
+            return jsonify({'error': f'Parâmetro inválido: {e}'}), 400
+
+        # Uma a mais que o pedido diz se existe próxima página
+        wanted = None if limit is None else limit + 1
+        history = []
+        if before is None or before[0] == MEMPOOL_CURSOR:
+            history = mempool.address_history(address, before and before[1], wanted)
+            before = None
+        else:
+            before = before[1]
+        if wanted is None or len(history) < wanted:
+            remaining = None if wanted is None else wanted - len(history)
+            history += init_blockchain().address_index.history(address, before, remaining)
+
+        next_cursor = None
+        if limit is not None and len(history) > limit:
+            history = history[:limit]
+            next_cursor = history[-1]['cursor']
+        return jsonify({'transactions': history, 'next': next_cursor})
 
     return bp 
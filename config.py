@@ -0,0 +1,89 @@
+# config.py
+# Configurações do nó, lidas de variáveis de ambiente com valores padrão.
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Diretório onde ficam blockchain, UTXOs e índices
+DATA_DIR = os.environ.get('SUNARYUM_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+
+# Backend de armazenamento de chain, UTXOs e mempool:
+#   'files'  -> arquivos em DATA_DIR (padrão)
+#   'sqlite' -> banco SQLite em modo WAL (SQLITE_PATH)
+STORAGE_BACKEND = os.environ.get('SUNARYUM_STORAGE', 'files')
+SQLITE_PATH = os.environ.get('SUNARYUM_SQLITE_PATH', os.path.join(DATA_DIR, 'sunaryum.db'))
+
+# Modo de armazenamento da chain no backend 'files':
+#   'segments' -> log append-only em arquivos de segmento (padrão)
+#   'json'     -> reescreve data/blockchain.json inteiro (modo antigo)
+CHAIN_STORAGE = os.environ.get('SUNARYUM_CHAIN_STORAGE', 'segments')
+
+# Tamanho máximo de cada arquivo de segmento antes de rolar para o próximo
+SEGMENT_MAX_BYTES = int(os.environ.get('SUNARYUM_SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+
+# Group commit: fsync a cada N blocos ou a cada X segundos, o que vier primeiro
+FSYNC_EVERY_BLOCKS = int(os.environ.get('SUNARYUM_FSYNC_EVERY_BLOCKS', 16))
+FSYNC_INTERVAL = float(os.environ.get('SUNARYUM_FSYNC_INTERVAL', 1.0))
+
+# Journal de deltas do UTXOSet: group commit e compactação em utxos.json
+UTXO_FSYNC_EVERY = int(os.environ.get('SUNARYUM_UTXO_FSYNC_EVERY', 64))
+UTXO_FSYNC_INTERVAL = float(os.environ.get('SUNARYUM_UTXO_FSYNC_INTERVAL', 0.5))
+UTXO_COMPACT_EVERY = int(os.environ.get('SUNARYUM_UTXO_COMPACT_EVERY', 100000))
+
+# Seleção de moedas: estratégia padrão ('bnb', 'largest_first' ou
+# 'consolidate') e limite de inputs por transação
+COIN_SELECTION_STRATEGY = os.environ.get('SUNARYUM_COIN_SELECTION', 'bnb')
+MAX_TX_INPUTS = int(os.environ.get('SUNARYUM_MAX_TX_INPUTS', 500))
+
+# Journal da mempool: group commit e compactação em mempool.json (em segundo
+# plano, quando o journal passa de N registros ou do tamanho da mempool)
+MEMPOOL_FSYNC_EVERY = int(os.environ.get('SUNARYUM_MEMPOOL_FSYNC_EVERY', 64))
+MEMPOOL_FSYNC_INTERVAL = float(os.environ.get('SUNARYUM_MEMPOOL_FSYNC_INTERVAL', 0.5))
+MEMPOOL_COMPACT_EVERY = int(os.environ.get('SUNARYUM_MEMPOOL_COMPACT_EVERY', 10000))
+
+# Limites da mempool: tamanho total (bytes serializados) e tempo máximo de
+# espera de uma transação (segundos; 0 desliga a expiração)
+MEMPOOL_MAX_BYTES = int(os.environ.get('SUNARYUM_MEMPOOL_MAX_BYTES', 64 * 1024 * 1024))
+MEMPOOL_TTL = int(os.environ.get('SUNARYUM_MEMPOOL_TTL', 14 * 24 * 3600))
+
+# Caches de verificação de assinaturas (entradas): assinaturas já verificadas
+# e chaves públicas decodificadas
+SIGCACHE_SIZE = int(os.environ.get('SUNARYUM_SIGCACHE_SIZE', 200000))
+KEYCACHE_SIZE = int(os.environ.get('SUNARYUM_KEYCACHE_SIZE', 20000))
+
+# Verificação de assinaturas em lote: processos do pool (0 = um por núcleo),
+# assinaturas por pedaço enviado a um processo e tamanho mínimo de lote para
+# sair do processo atual
+SIG_WORKERS = int(os.environ.get('SUNARYUM_SIG_WORKERS', 0))
+SIG_CHUNK = int(os.environ.get('SUNARYUM_SIG_CHUNK', 256))
+SIG_PARALLEL_MIN = int(os.environ.get('SUNARYUM_SIG_PARALLEL_MIN', 512))
+
+# Backend de secp256k1: 'auto' usa o pacote cryptography (OpenSSL) quando
+# instalado e cai no ecdsa (Python puro); 'cryptography' ou 'ecdsa' forçam
+CRYPTO_BACKEND = os.environ.get('SUNARYUM_CRYPTO_BACKEND', 'auto')
+
+# Máximo de transações por pedido em /transaction/batch
+MAX_BATCH_SIZE = int(os.environ.get('SUNARYUM_MAX_BATCH_SIZE', 5000))
+
+# python -m sunaryum serve: intervalo mínimo (segundos) entre as checagens de
+# mudança no banco feitas por um worker de leitura e tempo máximo de espera
+# por um pedido repassado ao processo escritor
+SERVE_SYNC_INTERVAL = float(os.environ.get('SUNARYUM_SERVE_SYNC_INTERVAL', 0.1))
+SERVE_WRITER_TIMEOUT = float(os.environ.get('SUNARYUM_SERVE_WRITER_TIMEOUT', 60))
+
+# Saídas da mempool registradas no SQLite para os workers de leitura aplicarem
+# só o que mudou; um worker que ficar mais que isso para trás recarrega tudo
+SERVE_MEMPOOL_REMOVED_KEEP = int(os.environ.get('SUNARYUM_SERVE_MEMPOOL_REMOVED_KEEP', 10000))
+
+# Cache de respostas das rotas de leitura (entradas e bytes de corpo); as
+# entradas valem enquanto as versões de chain/mempool não mudam
+RESPONSE_CACHE_SIZE = int(os.environ.get('SUNARYUM_RESPONSE_CACHE_SIZE', 1024))
+RESPONSE_CACHE_BYTES = int(os.environ.get('SUNARYUM_RESPONSE_CACHE_BYTES', 64 * 1024 * 1024))
+
+# Provisionamento de carteiras em lote (/wallet/bulk): processos do pool
+# (0 = um por núcleo), carteiras por pedaço enviado a um processo, tamanho
+# mínimo de lote para sair do processo atual e máximo de carteiras por pedido
+PROVISION_WORKERS = int(os.environ.get('SUNARYUM_PROVISION_WORKERS', 0))
+PROVISION_CHUNK = int(os.environ.get('SUNARYUM_PROVISION_CHUNK', 16))
+PROVISION_PARALLEL_MIN = int(os.environ.get('SUNARYUM_PROVISION_PARALLEL_MIN', 8))
+MAX_PROVISION_BATCH = int(os.environ.get('SUNARYUM_MAX_PROVISION_BATCH', 10000))
@@ -22,11 +22,16 @@ class NodeManager:
             json.dump(self.nodes, f, indent=2)
 
     def register_node(self, node_id, wallet_address):
-        self.nodes[node_id] = {
-            'wallet': wallet_address,
-            'last_validation': None,
-            'energy_history': []
-        }
+        self.register_nodes([(node_id, wallet_address)])
+
+    def register_nodes(self, pairs):
+        """Registra vários (node_id, carteira) e grava nodes.json uma vez só"""
+        for node_id, wallet_address in pairs:
+            self.nodes[node_id] = {
+                'wallet': wallet_address,
+                'last_validation': None,
+                'energy_history': []
+            }
         self.save_nodes()
 
     def load_energy_data_from_nodes(self):
@@ -0,0 +1,33 @@
+# storage/backend.py
+# Escolhe o backend de armazenamento pela configuração (SUNARYUM_STORAGE).
+import config
+
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        if config.STORAGE_BACKEND == 'sqlite':
+            from storage.sqlite_store import SQLiteStorage
+            _storage = SQLiteStorage(config.SQLITE_PATH)
+        elif config.STORAGE_BACKEND == 'files':
+            from storage.file_store import FileStorage
+            _storage = FileStorage(config.DATA_DIR)
+        else:
+            raise ValueError(f"Backend de armazenamento desconhecido: {config.STORAGE_BACKEND}")
+    return _storage
+
+
+def use_readonly():
+    """Troca o backend deste processo por uma conexão só de leitura ao SQLite.
+
+    Usado pelos workers de leitura do servidor (sunaryum serve): o estado é
+    gravado por um único processo escritor e os workers só o consultam.
+    """
+    global _storage
+    if config.STORAGE_BACKEND != 'sqlite':
+        raise ValueError("Workers de leitura exigem o backend 'sqlite'")
+    from storage.sqlite_store import SQLiteStorage
+    _storage = SQLiteStorage(config.SQLITE_PATH, readonly=True)
+    return _storage
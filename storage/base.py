@@ -0,0 +1,87 @@
+# storage/base.py
+# Interface de armazenamento do nó. Cada backend (arquivos, SQLite) entrega
+# três stores — chain, UTXOs e mempool — e um contexto atomic() que agrupa as
+# escritas feitas dentro dele numa única transação, quando o backend suporta.
+from contextlib import nullcontext
+
+
+class Storage:
+    def open_chain(self):
+        raise NotImplementedError
+
+    def open_utxos(self):
+        raise NotImplementedError
+
+    def open_mempool(self):
+        raise NotImplementedError
+
+    def open_utxo_snapshots(self):
+        """Checkpoint do UTXOSet marcado com a ponta da chain:
+        load_latest(chain, utxo_set) -> altura ou None e
+        write(height, tip_hash, utxo_set), chamado a cada bloco"""
+        raise NotImplementedError
+
+    def atomic(self):
+        """Escritas feitas dentro do bloco são confirmadas juntas"""
+        return nullcontext()
+
+    def on_commit(self, callback):
+        """Roda callback depois do COMMIT do atomic() em curso; sem transação
+        aberta (ou num backend sem transações), na hora"""
+        callback()
+
+    def on_rollback(self, callback):
+        """Roda callback se o atomic() em curso for desfeito, para a memória
+        voltar junto com o banco. Sem transação não há o que desfazer"""
+        pass
+
+
+class ChainStore:
+    def load(self):
+        """Retorna a sequência de blocos (lista ou visão preguiçosa)"""
+        raise NotImplementedError
+
+    def save(self, chain):
+        """Persiste os blocos adicionados à chain desde o último save"""
+        raise NotImplementedError
+
+    def open_index(self):
+        """Índice com load(chain), add_block, get_height e get_tx_location"""
+        raise NotImplementedError
+
+    def open_address_index(self):
+        """Histórico por endereço com load(chain), add_block e history(address, before, limit)"""
+        raise NotImplementedError
+
+
+class UTXOStore:
+    def load(self, utxo_set):
+        raise NotImplementedError
+
+    def save(self, utxo_set):
+        """Persiste as mudanças pendentes do UTXOSet (deltas ou conjunto inteiro)"""
+        raise NotImplementedError
+
+    def compact(self, utxo_set):
+        """Regrava o conjunto inteiro"""
+        raise NotImplementedError
+
+
+class MempoolStore:
+    def load(self):
+        raise NotImplementedError
+
+    def append(self, added=(), removed=()):
+        """Registra transações que entraram (added) e txids que saíram (removed).
+
+        O custo depende só do que mudou, não do tamanho da mempool.
+        """
+        raise NotImplementedError
+
+    def needs_compaction(self, pool_size):
+        return False
+
+    def compact(self, transactions, wait=False):
+        """Regrava a mempool inteira a partir de transactions (uma cópia da
+        lista, feita por quem chama); pode terminar em segundo plano"""
+        raise NotImplementedError
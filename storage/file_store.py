@@ -0,0 +1,293 @@
+# storage/file_store.py
+# Backend em arquivos: chain no log de segmentos (ou blockchain.json), UTXOs
+# em snapshot + journal de deltas e mempool em mempool.json + journal.
+import json
+import os
+import shutil
+import threading
+from blockchain.block_log import BlockLog
+from blockchain.chain_index import ChainIndex
+from blockchain.address_index import AddressIndex
+from transactions.journal import Journal
+from storage.base import Storage, ChainStore, UTXOStore, MempoolStore
+import config
+
+
+class FileStorage(Storage):
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._utxo_store = None
+
+    def open_chain(self):
+        return FileChainStore(self.data_dir)
+
+    def open_utxos(self):
+        # Um store (e um journal) só por arquivo: instâncias de UTXOSet que
+        # persistem no mesmo utxos.json escrevem nele serializadas pelo lock
+        # do journal, e a ponta marcada no checkpoint é a mesma para todas.
+        if self._utxo_store is None:
+            self._utxo_store = FileUTXOStore(os.path.join(self.data_dir, 'utxos.json'), Journal(
+                os.path.join(self.data_dir, 'utxos.journal'),
+                fsync_every=config.UTXO_FSYNC_EVERY,
+                fsync_interval=config.UTXO_FSYNC_INTERVAL
+            ))
+        return self._utxo_store
+
+    def open_mempool(self):
+        mempool_file = os.path.join(config.BASE_DIR, 'mempool.json')
+        return FileMempoolStore(mempool_file, Journal(
+            os.path.join(config.BASE_DIR, 'mempool.journal'),
+            fsync_every=config.MEMPOOL_FSYNC_EVERY,
+            fsync_interval=config.MEMPOOL_FSYNC_INTERVAL
+        ))
+
+    def open_utxo_snapshots(self):
+        # utxos.json + journal já são o checkpoint
+        return self.open_utxos()
+
+
+class FileChainStore(ChainStore):
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.blockchain_file = os.path.join(data_dir, 'blockchain.json')
+        self.block_log = None
+
+    def load(self):
+        if config.CHAIN_STORAGE == 'segments':
+            log_dir = os.path.join(self.data_dir, 'blocks')
+            self.block_log = self._open_log(log_dir)
+            if len(self.block_log) == 0 and os.path.exists(self.blockchain_file):
+                self.block_log.close()
+                self._migrate_json_to_log(log_dir)
+                self.block_log = self._open_log(log_dir)
+            return list(self.block_log.iter_blocks())
+
+        try:
+            with open(self.blockchain_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _open_log(log_dir):
+        return BlockLog(
+            log_dir,
+            segment_max_bytes=config.SEGMENT_MAX_BYTES,
+            fsync_every=config.FSYNC_EVERY_BLOCKS,
+            fsync_interval=config.FSYNC_INTERVAL
+        )
+
+    def _migrate_json_to_log(self, log_dir):
+        """Importa uma única vez o blockchain.json antigo para o log de segmentos.
+
+        O log é montado em blocks.tmp e só então trocado pelo diretório
+        definitivo: um crash no meio não toca o log definitivo, que continua
+        vazio, e a importação recomeça do zero no próximo start.
+        """
+        with open(self.blockchain_file, 'r') as f:
+            blocks = json.load(f)
+        tmp_dir = log_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        block_log = self._open_log(tmp_dir)
+        try:
+            for block in blocks:
+                block_log.append(block)
+        finally:
+            block_log.close()
+        shutil.rmtree(log_dir, ignore_errors=True)
+        os.replace(tmp_dir, log_dir)
+        print(f"[BLOCKLOG] Migrados {len(blocks)} blocos de {self.blockchain_file}")
+
+    def save(self, chain):
+        if self.block_log is not None:
+            # Só os blocos que ainda não estão no log são gravados
+            for block in chain[len(self.block_log):]:
+                self.block_log.append(block)
+            return
+
+        # Escreve em arquivo temporário e troca atomicamente
+        tmp_file = self.blockchain_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(list(chain), f, indent=2)
+        os.replace(tmp_file, self.blockchain_file)
+
+    def open_index(self):
+        return ChainIndex(os.path.join(self.data_dir, 'chain_index.jsonl'))
+
+    def open_address_index(self):
+        return AddressIndex(os.path.join(self.data_dir, 'address_index.jsonl'))
+
+
+class FileUTXOStore(UTXOStore):
+    """utxos.json é um snapshot marcado com a altura e o hash da ponta da
+    chain; o journal guarda os deltas feitos depois dele, e cada bloco
+    termina com um registro 'tip' com a ponta nova.
+
+    É também o checkpoint do UTXOSet no backend de arquivos (load_latest e
+    write): no startup o estado é o snapshot mais o journal até o último
+    'tip', e só os blocos depois dele são reaplicados da chain.
+    """
+
+    def __init__(self, utxos_file, journal):
+        self.utxos_file = utxos_file
+        self.journal = journal
+        self.compact_every = config.UTXO_COMPACT_EVERY
+        self.tip = None            # (altura, hash) em que o estado gravado está
+
+    def _read(self, utxo_set):
+        """Snapshot + journal até o último 'tip'. Retorna a ponta marcada (ou
+        None) e quantos deltas depois dela ficaram de fora"""
+        tip = None
+        try:
+            with open(self.utxos_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            utxo_set.clear()
+            print(f"[DEBUG] Arquivo {self.utxos_file} não encontrado, iniciando vazio")
+        else:
+            if 'utxos' in data and 'tip_hash' in data:
+                utxo_set.load_serializable(data['utxos'])
+                if data['tip_hash'] is not None:
+                    tip = (data['height'], data['tip_hash'])
+            else:
+                utxo_set.load_serializable(data)     # formato antigo, sem ponta
+
+        records = self.journal.replay()
+        marked = 0
+        for n, record in enumerate(records):
+            if record['op'] == 'tip':
+                marked = n + 1
+                tip = (record['height'], record['hash'])
+        # Deltas depois do último 'tip' são de um bloco que não terminou de
+        # ser gravado; o bloco é reaplicado da chain
+        utxo_set.replay(record for record in records[:marked] if record['op'] != 'tip')
+        print(f"[DEBUG] UTXOs carregados: {len(utxo_set)} UTXOs ({marked} registros do journal)")
+        return tip, len(records) - marked
+
+    def load(self, utxo_set):
+        self.tip, dangling = self._read(utxo_set)
+        if dangling:
+            self.compact(utxo_set)
+        utxo_set.mark_persisted()
+
+    def load_latest(self, chain, utxo_set):
+        """Carrega o estado gravado se a ponta marcada for um bloco da chain;
+        retorna a altura ou None"""
+        tip, dangling = self._read(utxo_set)
+        if tip is None or tip[0] >= len(chain) or chain[tip[0]]['hash'] != tip[1]:
+            print(f"[SNAPSHOT] {self.utxos_file} sem ponta ou fora da chain, ignorando")
+            return None
+        self.tip = tip
+        if dangling:
+            self.compact(utxo_set)
+        utxo_set.mark_persisted()
+        return tip[0]
+
+    def save(self, utxo_set):
+        replaced, deltas = utxo_set.pending_changes()
+        if replaced or self.journal.records + len(deltas) >= self.compact_every:
+            self.compact(utxo_set)
+            return
+        self.journal.append(deltas)
+        utxo_set.mark_persisted()
+
+    def write(self, height, tip_hash, utxo_set):
+        """Grava as mudanças do bloco `height` e marca a ponta nova"""
+        self.tip = (height, tip_hash)
+        replaced, deltas = utxo_set.pending_changes()
+        if replaced or self.journal.records + len(deltas) >= self.compact_every:
+            self.compact(utxo_set)
+            return
+        # Deltas e 'tip' numa escrita só
+        self.journal.append(deltas + [{'op': 'tip', 'height': height, 'hash': tip_hash}])
+        utxo_set.mark_persisted()
+
+    def compact(self, utxo_set):
+        os.makedirs(os.path.dirname(self.utxos_file), exist_ok=True)
+        tmp_file = self.utxos_file + '.tmp'
+        height, tip_hash = self.tip or (None, None)
+        with open(tmp_file, 'w') as f:
+            json.dump({'height': height, 'tip_hash': tip_hash, 'utxos': utxo_set.to_serializable()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.utxos_file)
+        # Se cair aqui, o journal antigo é reaplicado sobre o snapshot novo.
+        # Não tem problema: o estado final de cada outpoint é dado pela
+        # última operação sobre ele, então o replay é idempotente.
+        self.journal.reset()
+        utxo_set.mark_persisted()
+
+
+class FileMempoolStore(MempoolStore):
+    """mempool.json é um snapshot; o journal registra entradas e saídas depois dele.
+
+    A compactação troca o journal por um vazio (o antigo vira .old) e escreve
+    o snapshot numa thread, fora do lock da mempool. Só depois do snapshot
+    no disco o .old é apagado; até lá o restart reaplica os dois journals.
+    """
+
+    def __init__(self, mempool_file, journal):
+        self.mempool_file = mempool_file
+        self.journal = journal
+        self.old_journal = journal.path + '.old'
+        self.compact_every = config.MEMPOOL_COMPACT_EVERY
+        self._compaction = None
+
+    def load(self):
+        try:
+            with open(self.mempool_file, 'r') as f:
+                transactions = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            transactions = []
+
+        pool = {tx['txid']: tx for tx in transactions}
+        interrupted = os.path.exists(self.old_journal)
+        records = Journal(self.old_journal).replay() if interrupted else []
+        records += self.journal.replay()
+        for record in records:
+            if record['op'] == 'add':
+                pool[record['tx']['txid']] = record['tx']
+            else:
+                for txid in record['txids']:
+                    pool.pop(txid, None)
+
+        transactions = list(pool.values())
+        if interrupted:
+            # Compactação anterior não terminou: fecha ela agora
+            self.compact(transactions, wait=True)
+        return transactions
+
+    def append(self, added=(), removed=()):
+        records = [{'op': 'add', 'tx': tx} for tx in added]
+        if removed:
+            records.append({'op': 'remove', 'txids': list(removed)})
+        self.journal.append(records)
+
+    def needs_compaction(self, pool_size):
+        if self._compaction is not None and self._compaction.is_alive():
+            return False
+        return self.journal.records >= max(self.compact_every, pool_size)
+
+    def compact(self, transactions, wait=False):
+        if self._compaction is not None:
+            self._compaction.join()
+        self.journal.rotate(self.old_journal)
+        self._compaction = threading.Thread(target=self._write_snapshot, args=(transactions,), daemon=True)
+        self._compaction.start()
+        if wait:
+            self._compaction.join()
+
+    def _write_snapshot(self, transactions):
+        try:
+            tmp_file = self.mempool_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(transactions, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.mempool_file)
+            os.remove(self.old_journal)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] Falha ao compactar mempool: {e}")
@@ -0,0 +1,573 @@
+# storage/sqlite_store.py
+# Backend SQLite (modo WAL) para chain, UTXOs e mempool.
+#
+# Os blocos ficam em tabelas indexadas e são lidos sob demanda (a chain não
+# precisa caber na memória). Tudo passa por uma conexão só; atomic() abre uma
+# transação que pode ser aninhada e só é confirmada no bloco mais externo,
+# então conectar um bloco, atualizar os UTXOs e tirar as transações da
+# mempool vira um único COMMIT.
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import contextmanager
+from blockchain.address_index import block_entries, history_item
+from blockchain.block_log import BlockLog
+from blockchain.encoding import to_base_units, from_base_units
+from storage.base import Storage, ChainStore, UTXOStore, MempoolStore
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    height      INTEGER PRIMARY KEY,
+    hash        TEXT NOT NULL UNIQUE,
+    header      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    txid        TEXT PRIMARY KEY,
+    height      INTEGER NOT NULL,
+    position    INTEGER NOT NULL,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_by_block ON transactions (height, position);
+CREATE TABLE IF NOT EXISTS outputs (
+    txid        TEXT NOT NULL,
+    idx         INTEGER NOT NULL,
+    address     TEXT NOT NULL,
+    amount      INTEGER NOT NULL,
+    public_key  TEXT NOT NULL,
+    PRIMARY KEY (txid, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS outputs_by_address ON outputs (address);
+CREATE TABLE IF NOT EXISTS address_history (
+    address     TEXT NOT NULL,
+    height      INTEGER NOT NULL,
+    position    INTEGER NOT NULL,
+    txid        TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    amount      INTEGER NOT NULL,
+    date        TEXT,
+    PRIMARY KEY (address, height, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mempool (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    txid        TEXT NOT NULL UNIQUE,
+    body        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mempool_removed (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    txid        TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            # Workers de leitura: o banco já existe (o processo escritor o
+            # criou) e qualquer escrita falha no próprio SQLite
+            uri = pathlib.Path(os.path.abspath(path)).as_uri() + '?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self._depth = 0
+        self._on_commit = []
+        self._on_rollback = []
+
+    @contextmanager
+    def atomic(self):
+        with self.lock:
+            if self._depth == 0:
+                self.conn.execute('BEGIN IMMEDIATE')
+            self._depth += 1
+            try:
+                yield self.conn
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._rollback()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                try:
+                    self.conn.execute('COMMIT')
+                except BaseException:
+                    self._rollback()
+                    raise
+                callbacks, self._on_commit, self._on_rollback = self._on_commit, [], []
+                for callback in callbacks:
+                    callback()
+
+    def _rollback(self):
+        if self.conn.in_transaction:
+            self.conn.execute('ROLLBACK')
+        # Do último para o primeiro, como quem desfaz uma pilha de mudanças
+        callbacks, self._on_commit, self._on_rollback = self._on_rollback, [], []
+        for callback in reversed(callbacks):
+            callback()
+
+    def on_commit(self, callback):
+        with self.lock:
+            if self._depth == 0:
+                callback()
+            else:
+                self._on_commit.append(callback)
+
+    def on_rollback(self, callback):
+        with self.lock:
+            if self._depth:
+                self._on_rollback.append(callback)
+
+    @contextmanager
+    def snapshot(self):
+        """Transação de leitura: as consultas feitas dentro dela veem o mesmo
+        estado do banco, mesmo que outro processo confirme algo no meio"""
+        with self.lock:
+            if self._depth:
+                yield self.conn
+                return
+            self.conn.execute('BEGIN')
+            self._depth += 1
+            try:
+                yield self.conn
+            finally:
+                self._depth -= 1
+                self.conn.execute('COMMIT')
+
+    def data_version(self):
+        """Muda sempre que outra conexão confirma uma escrita no banco"""
+        return self.query('PRAGMA data_version')[0][0]
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def open_chain(self):
+        return SQLiteChainStore(self)
+
+    def open_utxos(self):
+        return SQLiteUTXOStore(self)
+
+    def open_mempool(self):
+        return SQLiteMempoolStore(self)
+
+    def open_utxo_snapshots(self):
+        return SQLiteUTXOSnapshots(self)
+
+    # ------------------------------------------------------------------ #
+    # Blocos
+    # ------------------------------------------------------------------ #
+    def block_count(self):
+        return self.query('SELECT COUNT(*) FROM blocks')[0][0]
+
+    def write_block(self, height, block):
+        header = {k: v for k, v in block.items() if k != 'transactions'}
+        with self.atomic() as conn:
+            conn.execute(
+                'INSERT INTO blocks (height, hash, header) VALUES (?, ?, ?)',
+                (height, block['hash'], json.dumps(header, separators=(',', ':')))
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO transactions (txid, height, position, body) VALUES (?, ?, ?, ?)',
+                [
+                    (tx['txid'], height, pos, json.dumps(tx, separators=(',', ':')))
+                    for pos, tx in enumerate(block.get('transactions', []))
+                ]
+            )
+
+    def read_blocks(self, start, end):
+        """Blocos [start, end) montados a partir das tabelas"""
+        with self.lock:
+            headers = self.conn.execute(
+                'SELECT height, header FROM blocks WHERE height >= ? AND height < ? ORDER BY height',
+                (start, end)
+            ).fetchall()
+            txs = self.conn.execute(
+                'SELECT height, body FROM transactions WHERE height >= ? AND height < ? ORDER BY height, position',
+                (start, end)
+            ).fetchall()
+
+        blocks = {}
+        for height, header in headers:
+            block = json.loads(header)
+            block['transactions'] = []
+            blocks[height] = block
+        for height, body in txs:
+            blocks[height]['transactions'].append(json.loads(body))
+        return [blocks[h] for h in sorted(blocks)]
+
+
+class StoredChain(Sequence):
+    """Visão da chain lida do SQLite sob demanda, com cache dos blocos recentes.
+
+    append() guarda o bloco como pendente; ele só vai para o banco no
+    próximo ChainStore.save(), como acontece com a lista em memória.
+    """
+    CACHE_SIZE = 512
+    PAGE_SIZE = 256
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._stored = storage.block_count()
+        self._pending = []
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return self._stored + len(self._pending)
+
+    def _remember(self, height, block):
+        self._cache[height] = block
+        self._cache.move_to_end(height)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self._range(start, stop))
+        height = item + len(self) if item < 0 else item
+        if height < 0 or height >= len(self):
+            raise IndexError('índice fora da chain')
+        if height >= self._stored:
+            return self._pending[height - self._stored]
+        block = self._cache.get(height)
+        if block is None:
+            block = self.storage.read_blocks(height, height + 1)[0]
+        self._remember(height, block)
+        return block
+
+    def _range(self, start, stop):
+        stored_stop = min(stop, self._stored)
+        for page in range(start, stored_stop, self.PAGE_SIZE):
+            yield from self.storage.read_blocks(page, min(page + self.PAGE_SIZE, stored_stop))
+        yield from self._pending[max(start - self._stored, 0):max(stop - self._stored, 0)]
+
+    def __iter__(self):
+        return self._range(0, len(self))
+
+    def append(self, block):
+        self._pending.append(block)
+
+    def pop(self):
+        """Desfaz o último append() ainda não gravado"""
+        return self._pending.pop()
+
+    def refresh(self):
+        """Relê a altura do banco, onde outro processo pode ter gravado blocos"""
+        if self._pending:
+            raise RuntimeError('chain com blocos pendentes não pode ser recarregada')
+        self._stored = self.storage.block_count()
+
+    def flush(self):
+        if not self._pending:
+            return
+        stored, pending = self._stored, self._pending
+        with self.storage.atomic():
+            for offset, block in enumerate(pending):
+                self.storage.write_block(stored + offset, block)
+            for block in pending:
+                self._remember(self._stored, block)
+                self._stored += 1
+            self._pending = []
+            # Se um atomic() de fora desfizer as linhas, os blocos voltam a
+            # ser pendentes
+            self.storage.on_rollback(lambda: self._unflush(stored, pending))
+
+    def _unflush(self, stored, pending):
+        for height in range(stored, self._stored):
+            self._cache.pop(height, None)
+        self._stored = stored
+        self._pending = pending + self._pending
+
+
+class SQLiteChainStore(ChainStore):
+    def __init__(self, storage):
+        self.storage = storage
+
+    def load(self):
+        if self.storage.block_count() == 0:
+            self._migrate_from_files()
+        return StoredChain(self.storage)
+
+    def _migrate_from_files(self):
+        """Importa uma única vez a chain do backend de arquivos, se existir"""
+        log_dir = os.path.join(config.DATA_DIR, 'blocks')
+        json_file = os.path.join(config.DATA_DIR, 'blockchain.json')
+        if os.path.exists(os.path.join(log_dir, 'index.dat')):
+            block_log = BlockLog(log_dir)
+            try:
+                count = self._import_blocks(block_log.iter_blocks())
+            finally:
+                block_log.close()
+            source = log_dir
+        elif os.path.exists(json_file):
+            with open(json_file, 'r') as f:
+                count = self._import_blocks(json.load(f))
+            source = json_file
+        else:
+            return
+        print(f"[SQLITE] Migrados {count} blocos de {source}")
+
+    def _import_blocks(self, blocks):
+        count = 0
+        with self.storage.atomic():
+            for height, block in enumerate(blocks):
+                self.storage.write_block(height, block)
+                count += 1
+        return count
+
+    def save(self, chain):
+        chain.flush()
+
+    def open_index(self):
+        return SQLiteChainIndex(self.storage)
+
+    def open_address_index(self):
+        return SQLiteAddressIndex(self.storage)
+
+
+class SQLiteChainIndex:
+    """Os índices são as próprias tabelas; nada a manter em memória"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def load(self, chain):
+        pass
+
+    def add_block(self, block):
+        pass
+
+    def get_height(self, block_hash):
+        rows = self.storage.query('SELECT height FROM blocks WHERE hash = ?', (block_hash,))
+        return rows[0][0] if rows else None
+
+    def get_tx_location(self, txid):
+        rows = self.storage.query('SELECT height, position FROM transactions WHERE txid = ?', (txid,))
+        return tuple(rows[0]) if rows else None
+
+
+class SQLiteAddressIndex:
+    """Histórico por endereço na tabela address_history; a altura até onde ela
+    foi preenchida fica em meta, gravada no mesmo COMMIT das linhas"""
+    HEIGHT_KEY = 'address_history_height'
+    BATCH = 256
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def height(self):
+        rows = self.storage.query('SELECT value FROM meta WHERE key = ?', (self.HEIGHT_KEY,))
+        return int(rows[0][0]) if rows else 0
+
+    def load(self, chain):
+        """Indexa só os blocos que estiverem faltando (a tabela inteira, se vazia)"""
+        start = self.height
+        if start >= len(chain):
+            return
+        for page in range(start, len(chain), self.BATCH):
+            with self.storage.atomic():
+                for offset, block in enumerate(chain[page:min(page + self.BATCH, len(chain))]):
+                    self._index_block(page + offset, block)
+        print(f"[INDEX] Histórico por endereço: {len(chain) - start} blocos indexados")
+
+    def _index_block(self, height, block):
+        with self.storage.atomic() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO address_history (address, height, position, txid, kind, amount, date) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(address, height, pos, txid, kind, units, block.get('timestamp'))
+                 for address, pos, txid, kind, units in block_entries(block)]
+            )
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (self.HEIGHT_KEY, str(height + 1)))
+
+    def add_block(self, block):
+        self._index_block(block['index'], block)
+
+    def history(self, address, before=None, limit=None):
+        sql = 'SELECT height, position, txid, kind, amount, date FROM address_history WHERE address = ?'
+        params = [address]
+        if before is not None:
+            sql += ' AND (height < ? OR (height = ? AND position < ?))'
+            params += [before[0], before[0], before[1]]
+        sql += ' ORDER BY height DESC, position DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [
+            history_item(txid, kind, units, date, 'confirmed', f"{height}:{pos}")
+            for height, pos, txid, kind, units, date in self.storage.query(sql, params)
+        ]
+
+
+class SQLiteUTXOStore(UTXOStore):
+    def __init__(self, storage):
+        self.storage = storage
+
+    def load(self, utxo_set):
+        rows = self.storage.query('SELECT txid, idx, address, amount, public_key FROM outputs')
+        utxo_set.clear()
+        utxo_set.replay(
+            {'op': 'add', 'txid': txid, 'index': idx, 'address': address,
+             'amount': from_base_units(amount), 'public_key': public_key}
+            for txid, idx, address, amount, public_key in rows
+        )
+        utxo_set.mark_persisted()
+        print(f"[DEBUG] UTXOs carregados do SQLite: {len(utxo_set)} UTXOs")
+
+    @staticmethod
+    def _row(txid, index, address, amount, public_key):
+        return (txid, index, address, to_base_units(amount), public_key or '')
+
+    def save(self, utxo_set):
+        replaced, deltas = utxo_set.pending_changes()
+        if replaced:
+            self.compact(utxo_set)
+            return
+        with self.storage.atomic() as conn:
+            for delta in deltas:
+                if delta['op'] == 'add':
+                    conn.execute(
+                        'INSERT OR REPLACE INTO outputs (txid, idx, address, amount, public_key) VALUES (?, ?, ?, ?, ?)',
+                        self._row(delta['txid'], delta['index'], delta['address'], delta['amount'], delta['public_key'])
+                    )
+                else:
+                    conn.execute('DELETE FROM outputs WHERE txid = ? AND idx = ?', (delta['txid'], delta['index']))
+            self._mark_persisted(utxo_set)
+
+    def _mark_persisted(self, utxo_set):
+        utxo_set.mark_persisted()
+        # Um ROLLBACK em volta joga fora o que foi gravado: a tabela só volta
+        # a bater com a memória regravando tudo
+        self.storage.on_rollback(utxo_set.mark_unpersisted)
+
+    def compact(self, utxo_set):
+        with self.storage.atomic() as conn:
+            conn.execute('DELETE FROM outputs')
+            conn.executemany(
+                'INSERT INTO outputs (txid, idx, address, amount, public_key) VALUES (?, ?, ?, ?, ?)',
+                (self._row(u.txid, u.index, u.address, u.amount, u.public_key) for u in utxo_set.iter_utxos())
+            )
+            self._mark_persisted(utxo_set)
+
+
+class SQLiteUTXOSnapshots:
+    """A tabela outputs já é o UTXOSet gravado; o checkpoint é só a altura e o
+    hash da ponta em que ela está, em meta. write() roda dentro do atomic()
+    de add_block, então os dois sempre saem no mesmo COMMIT que o bloco."""
+    HEIGHT_KEY = 'utxo_height'
+    TIP_KEY = 'utxo_tip_hash'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def write(self, height, tip_hash, utxo_set):
+        with self.storage.atomic() as conn:
+            utxo_set.save_utxos()
+            conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                             [(self.HEIGHT_KEY, str(height)), (self.TIP_KEY, tip_hash)])
+
+    def load_latest(self, chain, utxo_set):
+        """Carrega a tabela outputs se ela estiver marcada com um bloco da
+        chain; retorna a altura ou None"""
+        meta = dict(self.storage.query(
+            'SELECT key, value FROM meta WHERE key IN (?, ?)', (self.HEIGHT_KEY, self.TIP_KEY)
+        ))
+        if self.HEIGHT_KEY not in meta:
+            return None
+        height = int(meta[self.HEIGHT_KEY])
+        if height >= len(chain) or chain[height]['hash'] != meta[self.TIP_KEY]:
+            print(f"[SNAPSHOT] UTXOs do banco (altura {height}) não conferem com a chain, ignorando")
+            return None
+        utxo_set.load_utxos()
+        return height
+
+
+class SQLiteMempoolStore(MempoolStore):
+    """Tabela mempool em ordem de chegada (seq).
+
+    Cada txid que sai deixa uma linha em mempool_removed, para que os workers
+    de leitura (sunaryum/replica.py) apliquem só o que mudou desde a última
+    posição lida. As mais antigas são podadas (o piso fica em meta), e
+    compact() troca a época: quem estiver antes do piso ou em outra época
+    recarrega a mempool inteira.
+    """
+    EPOCH_KEY = 'mempool_epoch'
+    FLOOR_KEY = 'mempool_removed_floor'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def load(self):
+        return [json.loads(body) for (body,) in self.storage.query('SELECT body FROM mempool ORDER BY seq')]
+
+    def append(self, added=(), removed=()):
+        with self.storage.atomic() as conn:
+            if removed:
+                conn.executemany('DELETE FROM mempool WHERE txid = ?', [(txid,) for txid in removed])
+                conn.executemany('INSERT INTO mempool_removed (txid) VALUES (?)', [(txid,) for txid in removed])
+                self._prune(conn)
+            conn.executemany(
+                'INSERT OR REPLACE INTO mempool (txid, body) VALUES (?, ?)',
+                [(tx['txid'], json.dumps(tx, separators=(',', ':'))) for tx in added]
+            )
+
+    def _meta(self, key):
+        rows = self.storage.query('SELECT value FROM meta WHERE key = ?', (key,))
+        return int(rows[0][0]) if rows else 0
+
+    def _prune(self, conn):
+        keep = config.SERVE_MEMPOOL_REMOVED_KEEP
+        last = self.position()[2]
+        if last - self._meta(self.FLOOR_KEY) > 2 * keep:
+            floor = last - keep
+            conn.execute('DELETE FROM mempool_removed WHERE seq <= ?', (floor,))
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (self.FLOOR_KEY, str(floor)))
+
+    def compact(self, transactions, wait=False):
+        with self.storage.atomic() as conn:
+            conn.execute('DELETE FROM mempool')
+            conn.execute('DELETE FROM mempool_removed')
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                         (self.EPOCH_KEY, str(self._meta(self.EPOCH_KEY) + 1)))
+            self.append(added=transactions)
+
+    def position(self):
+        """(época, último seq de mempool, último seq de mempool_removed)"""
+        seqs = dict(self.storage.query(
+            "SELECT name, seq FROM sqlite_sequence WHERE name IN ('mempool', 'mempool_removed')"
+        ))
+        return self._meta(self.EPOCH_KEY), seqs.get('mempool', 0), seqs.get('mempool_removed', 0)
+
+    def changes_since(self, position):
+        """(posição atual, transações que entraram, txids que saíram) depois de
+        position, nessa ordem de chegada; None se o registro de saídas não
+        alcança mais position (compactação ou linhas podadas)"""
+        epoch, added_seq, removed_seq = position
+        current = self.position()
+        if current[0] != epoch or removed_seq < self._meta(self.FLOOR_KEY):
+            return None
+        removed = [txid for (txid,) in self.storage.query(
+            'SELECT txid FROM mempool_removed WHERE seq > ? ORDER BY seq', (removed_seq,)
+        )]
+        added = [json.loads(body) for (body,) in self.storage.query(
+            'SELECT body FROM mempool WHERE seq > ? ORDER BY seq', (added_seq,)
+        )]
+        return current, added, removed
@@ -0,0 +1,2 @@
+# sunaryum/__init__.py
+# Ponto de entrada de produção do nó: python -m sunaryum serve --workers N
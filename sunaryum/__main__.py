@@ -0,0 +1,32 @@
+# sunaryum/__main__.py
+#   python -m sunaryum serve [--host 0.0.0.0] [--port 5000] [--workers N]
+#                            [--sync-interval 0.1] [--verify]
+import sys
+import os
+from argparse import ArgumentParser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sunaryum.server import serve
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m sunaryum')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='sobe a API do nó')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=5000)
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                              help='workers de leitura (1 = um processo com threads)')
+    serve_parser.add_argument('--sync-interval', type=float, default=None,
+                              help='segundos entre as checagens de mudança no banco por worker')
+    serve_parser.add_argument('--verify', action='store_true', help='valida a chain inteira antes de subir')
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve(args.host, args.port, args.workers, args.sync_interval, args.verify)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# sunaryum/replica.py
+# Estado só de leitura de um worker do servidor, sobre o SQLite do escritor.
+#
+# O processo escritor é o único que grava chain, UTXOs e mempool. Cada worker
+# de leitura abre o mesmo banco em modo somente leitura e mantém a sua cópia
+# em memória: os UTXOs confirmados (carregados uma vez e atualizados bloco a
+# bloco) e a camada da mempool (atualizada pelas linhas que entraram na
+# tabela mempool e pelas saídas registradas em mempool_removed). O PRAGMA
+# data_version diz se o escritor confirmou algo desde a última
+# sincronização; sem mudança, a consulta custa uma leitura de página.
+import time
+from blockchain.core import Blockchain
+from blockchain.response_cache import next_version
+from storage.sqlite_store import StoredChain, SQLiteChainIndex, SQLiteAddressIndex
+from transactions.mempool import Mempool
+from transactions.utxo import UTXOSet
+
+
+class ReadOnlyMempool(Mempool):
+    """Mempool de um worker de leitura: lida do banco, nunca gravada"""
+
+    def load_transactions(self):
+        self.position = self.store.position()
+        self._rebuild(self.store.load())
+
+    def sync(self, is_confirmed):
+        """Aplica o que o escritor gravou desde a última leitura, em
+        O(mudanças); chamado dentro de storage.snapshot(), depois dos blocos.
+
+        is_confirmed(txid) diz se uma transação que saiu foi para um bloco:
+        essa só tem o delta tirado da camada (como em
+        remove_confirmed_transactions); as outras são desfeitas com os
+        descendentes. Sem o registro das saídas (compactação ou worker muito
+        atrasado) ou com um delta que não se aplica, recarrega tudo.
+        """
+        changes = self.store.changes_since(self.position)
+        if changes is None:
+            print("[REPLICA] Mempool compactada ou registro de saídas podado; recarregando")
+            self.load_transactions()
+            return
+        position, added, removed = changes
+        if added or removed:
+            try:
+                for txid in removed:
+                    if txid not in self.index:
+                        continue    # entrou e saiu desde a última leitura
+                    if is_confirmed(txid):
+                        self.utxo_set.settle(self.index.remove(txid).tx)
+                    else:
+                        for victim in self.index.descendants(txid):
+                            self._undo(victim)
+                now = time.time()
+                for tx in added:
+                    if tx['txid'] not in self.index:
+                        self._restore(tx, now)
+            except Exception as e:
+                print(f"[REPLICA] Mempool fora de sincronia ({e}); recarregando")
+                self.load_transactions()
+                return
+            self.version = next_version()
+        self.position = position
+
+    def _read_only(self, *args, **kwargs):
+        raise RuntimeError('Worker de leitura não altera a mempool')
+
+    add_transaction = add_transactions = _read_only
+    expire_transactions = remove_confirmed_transactions = save_transactions = _read_only
+
+
+class ChainReplica:
+    """Réplica da blockchain com a mesma interface de leitura de Blockchain"""
+
+    get_block = Blockchain.get_block
+    get_transaction = Blockchain.get_transaction
+    _apply_block = Blockchain._apply_block
+
+    def __init__(self, storage, sync_interval=0.1):
+        self.storage = storage
+        self.sync_interval = sync_interval
+        with storage.snapshot():
+            self._data_version = storage.data_version()
+            self.chain = StoredChain(storage)
+            self.index = SQLiteChainIndex(storage)
+            self.address_index = SQLiteAddressIndex(storage)
+            self.utxo_set = UTXOSet()
+            self.utxo_set.load_utxos()
+            self.mempool = ReadOnlyMempool(self.utxo_set)
+        self.version = next_version()
+        self._checked = time.monotonic()
+
+    def refresh(self):
+        """Traz blocos e mempool novos do banco; no máximo a cada sync_interval"""
+        now = time.monotonic()
+        if now - self._checked < self.sync_interval:
+            return False
+        self._checked = now
+        version = self.storage.data_version()
+        if version == self._data_version:
+            return False
+        # Tudo lido numa transação: blocos e mempool do mesmo COMMIT do escritor
+        with self.storage.snapshot():
+            height = self.storage.block_count()
+            if height > len(self.chain):
+                for block in self.storage.read_blocks(len(self.chain), height):
+                    self._apply_block(block)
+                self.utxo_set.mark_persisted()
+                self.chain.refresh()
+                self.version = next_version()
+            self.mempool.sync(lambda txid: self.index.get_tx_location(txid) is not None)
+        self._data_version = version
+        return True
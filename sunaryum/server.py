@@ -0,0 +1,139 @@
+# sunaryum/server.py
+# Servidor de produção: um processo escritor e N workers de leitura.
+#
+#   - o escritor roda o app completo (create_app) numa porta interna e é o
+#     único processo que grava chain, UTXOs e mempool no SQLite;
+#   - os workers herdam o socket público (pre-fork, como gunicorn) e atendem
+#     as consultas a partir de uma réplica só de leitura do banco
+#     (sunaryum.replica); o que altera estado (POST/PUT/DELETE e /node/*) é
+#     repassado ao escritor.
+#
+# Uma escrita confirmada pelo escritor aparece nos workers em até
+# sync_interval segundos. Sem fork (Windows), com o backend 'files' ou com
+# --workers 1 o nó sobe num processo só, com uma thread por pedido.
+import os
+import socket
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+import requests
+from flask import Response, jsonify, request
+from werkzeug.serving import make_server
+import config
+
+# Métodos atendidos pelos workers; o resto vai para o escritor
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+WRITE_PREFIXES = ('/node/',)
+# Cabeçalhos que a camada HTTP recalcula ao repassar a resposta
+HOP_HEADERS = {'connection', 'content-encoding', 'content-length', 'keep-alive', 'transfer-encoding'}
+
+
+def _listen(host, port):
+    return socket.create_server((host, port), backlog=1024)
+
+
+def _run_writer(fd, ready, verify):
+    from app import create_app
+    app = create_app(verify=verify)
+    server = make_server('127.0.0.1', 0, app, threaded=True, fd=fd)
+    ready.set()
+    print(f"[SERVE] Escritor pronto (pid {os.getpid()})")
+    server.serve_forever()
+
+
+def create_reader_app(writer_url, sync_interval):
+    """App de um worker de leitura sobre uma réplica do banco do escritor"""
+    from storage.backend import use_readonly
+    import blockchain.core as core
+    from app import build_app
+    from sunaryum.replica import ChainReplica
+
+    replica = ChainReplica(use_readonly(), sync_interval)
+    # init_blockchain()/get_chain() das rotas passam a devolver a réplica
+    core._blockchain = replica
+    app = build_app(replica, replica.mempool)
+    session = requests.Session()
+
+    @app.before_request
+    def route_request():
+        if request.method not in READ_METHODS or request.path.startswith(WRITE_PREFIXES):
+            return _forward(session, writer_url)
+        replica.refresh()
+
+    return app
+
+
+def _forward(session, writer_url):
+    headers = {k: v for k, v in request.headers if k.lower() not in HOP_HEADERS and k.lower() != 'host'}
+    try:
+        upstream = session.request(
+            request.method, writer_url + request.full_path, data=request.get_data(),
+            headers=headers, timeout=config.SERVE_WRITER_TIMEOUT
+        )
+    except requests.RequestException as e:
+        return jsonify({'status': 'error', 'message': f'Escritor indisponível: {e}'}), 503
+    return Response(
+        upstream.content, upstream.status_code,
+        [(k, v) for k, v in upstream.headers.items() if k.lower() not in HOP_HEADERS]
+    )
+
+
+def _run_reader(host, fd, writer_url, sync_interval):
+    app = create_reader_app(writer_url, sync_interval)
+    # Um pedido por vez: a réplica não precisa de lock e o paralelismo vem
+    # do número de processos
+    server = make_server(host, 0, app, fd=fd)
+    server.serve_forever()
+
+
+def serve(host='0.0.0.0', port=5000, workers=1, sync_interval=None, verify=False):
+    sync_interval = config.SERVE_SYNC_INTERVAL if sync_interval is None else sync_interval
+    if workers <= 1 or not hasattr(os, 'fork') or config.STORAGE_BACKEND != 'sqlite':
+        if workers > 1:
+            print("[SERVE] Workers separados exigem fork e o backend 'sqlite'; usando um processo com threads")
+        from app import create_app
+        server = make_server(host, port, create_app(verify=verify), threaded=True)
+        print(f"[SERVE] Ouvindo em {host}:{port} (1 processo, threads)")
+        server.serve_forever()
+        return
+
+    ctx = multiprocessing.get_context('fork')
+    public = _listen(host, port)
+    internal = _listen('127.0.0.1', 0)
+    writer_url = f"http://127.0.0.1:{internal.getsockname()[1]}"
+
+    ready = ctx.Event()
+    writer = ctx.Process(target=_run_writer, args=(internal.fileno(), ready, verify), name='sunaryum-writer')
+    writer.start()
+    # Os workers só abrem o banco depois que o escritor criou/migrou tudo
+    while not ready.wait(0.5):
+        if not writer.is_alive():
+            raise SystemExit('[SERVE] O escritor terminou antes de ficar pronto')
+
+    def spawn(n):
+        reader = ctx.Process(target=_run_reader, args=(host, public.fileno(), writer_url, sync_interval),
+                             name=f'sunaryum-reader-{n}')
+        reader.start()
+        return reader
+
+    readers = {n: spawn(n) for n in range(workers)}
+    print(f"[SERVE] Ouvindo em {host}:{port} ({workers} workers de leitura + 1 escritor)")
+    try:
+        while True:
+            wait([writer.sentinel] + [r.sentinel for r in readers.values()])
+            if not writer.is_alive():
+                print(f"[SERVE] Escritor terminou (código {writer.exitcode}); encerrando")
+                break
+            for n, reader in list(readers.items()):
+                if not reader.is_alive():
+                    print(f"[SERVE] Worker {n} terminou (código {reader.exitcode}); subindo outro")
+                    time.sleep(0.5)
+                    readers[n] = spawn(n)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in [*readers.values(), writer]:
+            if process.is_alive():
+                process.terminate()
+        for process in [*readers.values(), writer]:
+            process.join()
@@ -0,0 +1,37 @@
+# tests/conftest.py
+# Os testes rodam num diretório de dados temporário com o backend SQLite; as
+# variáveis precisam estar definidas antes de config ser importado.
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+TMP = tempfile.mkdtemp(prefix='sunaryum-test-')
+os.environ['SUNARYUM_DATA_DIR'] = TMP
+os.environ['SUNARYUM_SQLITE_PATH'] = os.path.join(TMP, 'sunaryum.db')
+os.environ['SUNARYUM_STORAGE'] = 'sqlite'
+os.environ['SUNARYUM_MEMPOOL_TTL'] = '0'
+
+import config  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TMP, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    """Cada teste com um banco novo (o backend é um singleton do processo)"""
+    from storage import backend
+    from storage.sqlite_store import SQLiteStorage
+    path = str(tmp_path / 'sunaryum.db')
+    monkeypatch.setattr(config, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'SQLITE_PATH', path)
+    sqlite = SQLiteStorage(path)
+    monkeypatch.setattr(backend, '_storage', sqlite)
+    yield sqlite
+    sqlite.conn.close()
@@ -0,0 +1,55 @@
+# tests/test_crypto.py
+# Os backends de secp256k1 de blockchain/crypto (cryptography x ecdsa) têm
+# que concordar entre si: mesmas chaves públicas e assinaturas de um
+# verificadas pelo outro, nos dois sentidos.
+import hashlib
+import itertools
+
+import pytest
+
+from blockchain.crypto import PrivateKey, PublicKey, BadSignatureError, available_backends
+
+BACKENDS = available_backends()
+PAIRS = list(itertools.product(BACKENDS, repeat=2))
+KEYS = range(10)
+
+
+def secret(n):
+    return hashlib.sha256(f"cross{n}".encode()).digest()
+
+
+def digest(n):
+    return hashlib.sha256(f"{n:064x}:{n % 3}".encode()).digest()
+
+
+@pytest.mark.parametrize('n', KEYS)
+def test_backends_derive_the_same_public_keys(n):
+    keys = [PrivateKey(secret(n), backend).public_key for backend in BACKENDS.values()]
+    for encoding in ('raw', 'compressed', 'uncompressed'):
+        assert len({key.to_string(encoding) for key in keys}) == 1
+
+
+@pytest.mark.parametrize('signer, verifier', PAIRS)
+@pytest.mark.parametrize('encoding', ['raw', 'compressed', 'uncompressed'])
+def test_signatures_verify_across_backends(signer, verifier, encoding):
+    for n in KEYS:
+        private = PrivateKey(secret(n), BACKENDS[signer])
+        key = PublicKey.from_bytes(private.public_key.to_string(encoding), BACKENDS[verifier])
+        assert key.verify_digest(private.sign_digest(digest(n)), digest(n))
+        assert key.verify_digest(private.sign_digest(digest(n), der=True), digest(n), der=True)
+        assert key.verify(private.sign(digest(n)), digest(n))
+
+
+@pytest.mark.parametrize('signer, verifier', PAIRS)
+def test_bad_signatures_are_rejected_across_backends(signer, verifier):
+    for n in KEYS:
+        private = PrivateKey(secret(n), BACKENDS[signer])
+        key = PublicKey.from_bytes(private.public_key.to_string('compressed'), BACKENDS[verifier])
+        raw_sig = private.sign_digest(digest(n))
+        tampered = raw_sig[:-1] + bytes([raw_sig[-1] ^ 1])
+        with pytest.raises(BadSignatureError):
+            key.verify_digest(tampered, digest(n))
+        with pytest.raises(BadSignatureError):
+            key.verify_digest(raw_sig, hashlib.sha256(b'outra').digest())
+        with pytest.raises(BadSignatureError):
+            key.verify_digest(private.sign_digest(digest(n), der=True), digest(n))   # DER lida como r||s
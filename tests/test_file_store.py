@@ -0,0 +1,49 @@
+# tests/test_file_store.py
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+from blockchain.block_log import BlockLog
+from storage.file_store import FileChainStore
+
+BLOCKS = [{'index': n, 'hash': f'{n:064x}', 'transactions': []} for n in range(10)]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    with open(tmp_path / 'blockchain.json', 'w') as f:
+        json.dump(BLOCKS, f)
+    return str(tmp_path)
+
+
+def load(data_dir):
+    store = FileChainStore(data_dir)
+    with redirect_stdout(io.StringIO()):
+        blocks = store.load()
+    store.block_log.close()
+    return blocks
+
+
+def test_migration_from_json(data_dir):
+    assert load(data_dir) == BLOCKS
+    assert load(data_dir) == BLOCKS
+    assert not os.path.exists(os.path.join(data_dir, 'blocks.tmp'))
+
+
+def test_interrupted_migration_is_redone(data_dir, monkeypatch):
+    append = BlockLog.append
+
+    def crash_at_block_4(self, block):
+        if block['index'] == 4:
+            raise KeyboardInterrupt('queda no meio da migração')
+        return append(self, block)
+
+    monkeypatch.setattr(BlockLog, 'append', crash_at_block_4)
+    with pytest.raises(KeyboardInterrupt):
+        load(data_dir)
+    monkeypatch.setattr(BlockLog, 'append', append)
+
+    assert load(data_dir) == BLOCKS
@@ -0,0 +1,66 @@
+# tests/test_mempool.py
+import io
+import sys
+from contextlib import redirect_stdout
+
+from blockchain import encoding
+from transactions.mempool import Mempool
+from transactions.utxo import UTXOSet
+
+ADDRESS = 'a' * 40
+FUNDING = 'f' * 64
+
+
+def change_chain(length):
+    """length transações, cada uma gastando o troco da anterior; a fee cresce
+    ao longo da cadeia, então a última é a de maior fee rate"""
+    txs = []
+    previous, amount = FUNDING, 100.0
+    for n in range(length):
+        fee = encoding.from_base_units(n + 1)
+        amount = encoding.from_base_units(encoding.to_base_units(amount) - n - 1)
+        tx = {'version': encoding.TX_VERSION, 'fee': fee,
+              'inputs': [{'txid': previous, 'index': 0, 'public_key': ''}],
+              'outputs': [{'address': ADDRESS, 'amount': amount, 'public_key': ''}]}
+        tx['txid'] = previous = encoding.tx_hash(tx)
+        txs.append(tx)
+    return txs
+
+
+def test_block_selection_handles_long_change_chains():
+    utxo_set = UTXOSet()
+    utxo_set.clear()
+    utxo_set.add_utxo(ADDRESS, FUNDING, 0, 100.0, '')
+    length = sys.getrecursionlimit() + 500
+    txs = change_chain(length)
+    with redirect_stdout(io.StringIO()):
+        mempool = Mempool(utxo_set)
+        mempool.max_bytes = 1 << 30
+        assert mempool.add_transactions(txs) == [None] * length
+
+    selected = mempool.get_transactions_for_block(length)
+    assert [tx['txid'] for tx in selected] == [tx['txid'] for tx in txs]
+    # Com menos espaço, entram os pais primeiro
+    assert [tx['txid'] for tx in mempool.get_transactions_for_block(10)] == [tx['txid'] for tx in txs[:10]]
+
+
+def test_block_selection_puts_every_parent_first():
+    utxo_set = UTXOSet()
+    utxo_set.clear()
+    utxo_set.add_utxo(ADDRESS, FUNDING, 0, 100.0, '')
+
+    def tx(inputs, amounts, fee):
+        body = {'version': encoding.TX_VERSION, 'fee': fee,
+                'inputs': [{'txid': txid, 'index': index, 'public_key': ''} for txid, index in inputs],
+                'outputs': [{'address': ADDRESS, 'amount': amount, 'public_key': ''} for amount in amounts]}
+        body['txid'] = encoding.tx_hash(body)
+        return body
+
+    # a paga b e o filho; b paga o filho também, que lista b antes de a
+    a = tx([(FUNDING, 0)], [50.0, 49.0], 1.0)
+    b = tx([(a['txid'], 0)], [49.0], 1.0)
+    child = tx([(b['txid'], 0), (a['txid'], 1)], [90.0], 8.0)
+    with redirect_stdout(io.StringIO()):
+        mempool = Mempool(utxo_set)
+        assert mempool.add_transactions([a, b, child]) == [None] * 3
+    assert [t['txid'] for t in mempool.get_transactions_for_block()] == [a['txid'], b['txid'], child['txid']]
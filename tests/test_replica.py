@@ -0,0 +1,122 @@
+# tests/test_replica.py
+# A mempool de um worker de leitura acompanha a do escritor aplicando só as
+# linhas novas e as saídas registradas, e recarrega tudo após compactação.
+import hashlib
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+import config
+from blockchain import encoding
+from blockchain.core import Blockchain, mine_mempool_transactions
+from blockchain.crypto import PrivateKey
+from blockchain.tx_builder import create_transfer
+from storage.sqlite_store import SQLiteStorage
+from sunaryum.replica import ChainReplica
+from transactions.mempool import Mempool
+
+SENDER = 'd' * 40
+COINS = 12
+
+
+@pytest.fixture
+def key():
+    return PrivateKey(hashlib.sha256(b'replica').digest())
+
+
+@pytest.fixture
+def writer(key):
+    pub = key.public_key.to_string('compressed').hex()
+    mint = {'version': encoding.TX_VERSION, 'type': 'mint', 'timestamp': '2024-01-01T00:00:00', 'inputs': [],
+            'outputs': [{'address': SENDER, 'amount': 1.0, 'public_key': pub} for _ in range(COINS)]}
+    mint['txid'] = encoding.tx_hash(mint)
+    with redirect_stdout(io.StringIO()):
+        bc = Blockchain()
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1, 'transactions': [mint]}
+        bc.add_block()
+        mempool = Mempool(bc.utxo_set)
+    return bc, mempool, mint['txid']
+
+
+@pytest.fixture
+def replica(writer):
+    with redirect_stdout(io.StringIO()):
+        replica = ChainReplica(SQLiteStorage(config.SQLITE_PATH, readonly=True), sync_interval=0)
+    reloads = []
+    load = replica.mempool.load_transactions
+    replica.mempool.load_transactions = lambda: (reloads.append(1), load())
+    replica.reloads = reloads
+    yield replica
+    replica.storage.conn.close()
+
+
+def spend(key, funding, n, recipient, fee=0.001):
+    return create_transfer(key, SENDER, recipient, 0.5, [{'txid': funding, 'index': n, 'amount': 1.0}], fee=fee)
+
+
+def assert_same(writer, replica):
+    bc, mempool, _ = writer
+    with redirect_stdout(io.StringIO()):
+        replica.refresh()
+    assert len(replica.chain) == len(bc.chain)
+    assert [tx['txid'] for tx in replica.mempool.transactions] == [tx['txid'] for tx in mempool.transactions]
+    addresses = {SENDER} | {out['address'] for tx in mempool.transactions for out in tx['outputs']}
+    for address in addresses:
+        assert replica.mempool.utxo_set.get_balance(address) == mempool.utxo_set.get_balance(address)
+        assert replica.utxo_set.get_balance(address) == bc.utxo_set.get_balance(address)
+
+
+def test_replica_applies_mempool_deltas(key, writer, replica):
+    bc, mempool, funding = writer
+    with redirect_stdout(io.StringIO()):
+        parents = [spend(key, funding, n, f"{n:040x}") for n in range(6)]
+        mempool.add_transactions(parents)
+        assert_same(writer, replica)
+
+        # Filho gastando o troco de uma pendente
+        change = parents[0]['outputs'][1]
+        child = create_transfer(key, SENDER, 'e' * 40, 0.1,
+                                [{'txid': parents[0]['txid'], 'index': 1, 'amount': change['amount']}])
+        mempool.add_transaction(child)
+        assert_same(writer, replica)
+
+        # Despejo (saída sem bloco): a de fee maior expulsa as de menor fee rate
+        mempool.max_bytes = mempool.index.total_bytes
+        mempool.add_transaction(spend(key, funding, 6, 'f' * 40, fee=0.01))
+        assert len(mempool) < len(parents) + 2
+        assert_same(writer, replica)
+
+        # Mineração: as confirmadas saem da mempool no mesmo COMMIT do bloco
+        mempool.max_bytes = config.MEMPOOL_MAX_BYTES
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1}
+        assert mine_mempool_transactions(bc, mempool, max_txs=2) is not None
+        assert_same(writer, replica)
+
+        mempool.add_transaction(spend(key, funding, 7, 'c' * 40))
+        assert_same(writer, replica)
+    assert replica.reloads == []
+
+
+def test_replica_reloads_after_compaction(key, writer, replica):
+    _, mempool, funding = writer
+    with redirect_stdout(io.StringIO()):
+        mempool.add_transactions([spend(key, funding, n, f"{n:040x}") for n in range(3)])
+        assert_same(writer, replica)
+        mempool.save_transactions()
+        mempool.add_transaction(spend(key, funding, 3, 'c' * 40))
+        assert_same(writer, replica)
+    assert replica.reloads == [1]
+
+
+def test_replica_reloads_when_behind_pruned_removals(key, writer, replica, monkeypatch):
+    monkeypatch.setattr(config, 'SERVE_MEMPOOL_REMOVED_KEEP', 1)
+    bc, mempool, funding = writer
+    with redirect_stdout(io.StringIO()):
+        mempool.add_transactions([spend(key, funding, n, f"{n:040x}") for n in range(6)])
+        assert_same(writer, replica)
+        # Cinco saídas de uma vez com só uma guardada: a réplica fica antes do piso
+        bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1}
+        assert mine_mempool_transactions(bc, mempool, max_txs=5) is not None
+        assert_same(writer, replica)
+    assert replica.reloads == [1]
@@ -0,0 +1,172 @@
+# tests/test_storage.py
+import hashlib
+import io
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+import config
+from blockchain import encoding
+from blockchain.block_log import BlockLog
+from blockchain.core import Blockchain
+from blockchain.crypto import PrivateKey
+from blockchain.tx_builder import create_transfer
+from transactions.mempool import Mempool
+from transactions.utxo import UTXOSet
+from transactions.utxo_view import apply_transaction
+
+ADDRESS = 'a' * 40
+
+
+def mint_block(bc, n):
+    mint = {'version': encoding.TX_VERSION, 'type': 'mint', 'timestamp': f'2024-01-01T00:00:{n:02d}', 'inputs': [],
+            'outputs': [{'address': ADDRESS, 'amount': 1.0, 'public_key': ''}]}
+    mint['txid'] = encoding.tx_hash(mint)
+    bc.node_manager.aggregate_daily_data = lambda: {'total_energy': 1, 'valid_nodes': 1, 'transactions': [mint]}
+    return bc.add_block()
+
+
+@pytest.fixture
+def chain():
+    with redirect_stdout(io.StringIO()):
+        bc = Blockchain()
+        for n in range(3):
+            mint_block(bc, n)
+    return bc
+
+
+def test_sqlite_restores_utxos_from_outputs_table(chain, monkeypatch):
+    monkeypatch.setattr(Blockchain, '_rebuild_utxos', lambda self: pytest.fail('UTXOs reconstruídos da chain'))
+    with redirect_stdout(io.StringIO()):
+        restarted = Blockchain()
+    assert restarted.utxo_set.get_balance(ADDRESS) == chain.utxo_set.get_balance(ADDRESS) == 3.0
+    assert not os.path.exists(os.path.join(config.DATA_DIR, 'utxo_snapshots'))
+
+
+def test_sqlite_rebuilds_utxos_when_checkpoint_does_not_match(chain, storage):
+    with storage.atomic() as conn:
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'utxo_tip_hash'", ('0' * 64,))
+        conn.execute('DELETE FROM outputs')
+    with redirect_stdout(io.StringIO()):
+        restarted = Blockchain()
+    assert restarted.utxo_set.get_balance(ADDRESS) == 3.0
+    assert storage.query("SELECT value FROM meta WHERE key = 'utxo_tip_hash'")[0][0] == chain.chain[-1]['hash']
+
+
+def test_rolled_back_block_is_undone_in_memory(chain, storage):
+    tip = chain.chain[-1]['hash']
+    with pytest.raises(RuntimeError), redirect_stdout(io.StringIO()):
+        with storage.atomic():
+            mint_block(chain, 3)
+            raise RuntimeError('falha depois do bloco')
+    assert len(chain.chain) == storage.block_count() == 4
+    assert chain.chain[-1]['hash'] == tip
+    assert chain.utxo_set.get_balance(ADDRESS) == 3.0
+
+    # O bloco seguinte entra na mesma altura e a tabela outputs bate com a memória
+    with redirect_stdout(io.StringIO()):
+        block = mint_block(chain, 4)
+        restarted = Blockchain()
+    assert block['index'] == 4
+    assert [b['hash'] for b in restarted.chain] == [b['hash'] for b in chain.chain]
+    assert restarted.utxo_set.get_balance(ADDRESS) == 4.0
+
+
+def test_rolled_back_confirmation_keeps_mempool_transactions(storage):
+    key = PrivateKey(hashlib.sha256(b'rollback').digest())
+    funding = hashlib.sha256(b'rollback-funding').hexdigest()
+    utxo_set = UTXOSet()
+    utxo_set.clear()
+    utxo_set.add_utxo(ADDRESS, funding, 0, 10.0, key.public_key.to_string('compressed').hex())
+    with redirect_stdout(io.StringIO()):
+        mempool = Mempool(utxo_set)
+        tx = create_transfer(key, ADDRESS, 'b' * 40, 1.0, [{'txid': funding, 'index': 0, 'amount': 10.0}])
+        mempool.add_transaction(tx)
+        apply_transaction(utxo_set, tx)
+
+        with pytest.raises(RuntimeError):
+            with storage.atomic():
+                mempool.remove_confirmed_transactions([tx['txid']])
+                raise RuntimeError('falha depois do bloco')
+        assert mempool.get_transaction(tx['txid']) is not None
+        assert storage.query('SELECT COUNT(*) FROM mempool')[0][0] == 1
+
+        mempool.remove_confirmed_transactions([tx['txid']])
+    assert mempool.get_transaction(tx['txid']) is None
+    assert storage.query('SELECT COUNT(*) FROM mempool')[0][0] == 0
+
+
+def test_migration_from_block_log_closes_the_log(tmp_path, storage, monkeypatch):
+    log_dir = os.path.join(config.DATA_DIR, 'blocks')
+    with redirect_stdout(io.StringIO()):
+        blocks = list(Blockchain().chain)
+    storage.conn.execute('DELETE FROM blocks')
+    log = BlockLog(log_dir)
+    for block in blocks:
+        log.append(block)
+    log.close()
+
+    closed = []
+    close = BlockLog.close
+    monkeypatch.setattr(BlockLog, 'close', lambda self: (closed.append(self), close(self)))
+    with redirect_stdout(io.StringIO()):
+        migrated = storage.open_chain().load()
+    assert [b['hash'] for b in migrated] == [b['hash'] for b in blocks]
+    assert len(closed) == 1 and closed[0]._segment.closed
+
+
+@pytest.fixture
+def files_backend(tmp_path, monkeypatch):
+    from storage import backend
+    from storage.file_store import FileStorage
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'files')
+    monkeypatch.setattr(backend, '_storage', FileStorage(str(tmp_path)))
+    return backend._storage
+
+
+def test_files_backend_restores_utxos_from_snapshot_and_journal(files_backend, monkeypatch):
+    with redirect_stdout(io.StringIO()):
+        bc = Blockchain()
+        for n in range(3):
+            mint_block(bc, n)
+    store = files_backend.open_utxos()
+    assert store.journal.records > 0
+
+    monkeypatch.setattr(Blockchain, '_rebuild_utxos', lambda self: pytest.fail('UTXOs reconstruídos da chain'))
+    replayed = []
+    replay = store.journal.replay
+    monkeypatch.setattr(store.journal, 'replay', lambda: replayed.append(1) or replay())
+    with redirect_stdout(io.StringIO()):
+        restarted = Blockchain()
+    assert replayed
+    assert restarted.utxo_set.get_balance(ADDRESS) == 3.0
+    assert store.tip == (3, bc.chain[-1]['hash'])
+
+
+def test_files_backend_drops_deltas_of_an_unfinished_block(files_backend):
+    with redirect_stdout(io.StringIO()):
+        bc = Blockchain()
+        mint_block(bc, 0)
+    # Deltas gravados sem o 'tip' do bloco: o bloco não entrou na chain
+    files_backend.open_utxos().journal.append([
+        {'op': 'add', 'txid': 'f' * 64, 'index': 0, 'address': ADDRESS, 'amount': 50.0, 'public_key': ''}
+    ])
+    with redirect_stdout(io.StringIO()):
+        restarted = Blockchain()
+    assert restarted.utxo_set.get_balance(ADDRESS) == 1.0
+    assert restarted.utxo_set.get_utxo('f' * 64, 0) is None
+
+
+def test_files_backend_restart_at_tip_writes_nothing(files_backend, monkeypatch):
+    with redirect_stdout(io.StringIO()):
+        bc = Blockchain()
+        mint_block(bc, 0)       # chain curta: a ponta já fica marcada
+    store = files_backend.open_utxos()
+    monkeypatch.setattr(Blockchain, '_rebuild_utxos', lambda self: pytest.fail('UTXOs reconstruídos da chain'))
+    monkeypatch.setattr(store, 'compact', lambda utxo_set: pytest.fail('utxos.json regravado no restart'))
+    monkeypatch.setattr(store.journal, 'append', lambda records: pytest.fail('journal gravado no restart'))
+    with redirect_stdout(io.StringIO()):
+        restarted = Blockchain()
+    assert restarted.utxo_set.pending_changes() == (False, [])
+    assert restarted.utxo_set.get_balance(ADDRESS) == 1.0
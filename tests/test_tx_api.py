@@ -0,0 +1,108 @@
+# tests/test_tx_api.py
+import hashlib
+import json
+import pytest
+from flask import Flask
+
+from blockchain.crypto import PrivateKey
+from blockchain.encoding import to_base_units, from_base_units
+from blockchain.tx_api import tx_bp, build_transfer, check_raw_transaction, TransferError
+from blockchain.tx_builder import create_transfer
+from transactions.coin_selection import COST_OF_CHANGE
+from transactions.mempool import Mempool
+from transactions.utxo import UTXOSet
+
+SENDER = 'a' * 40
+RECIPIENT = 'b' * 40
+FUNDING = hashlib.sha256(b'tx-api-funding').hexdigest()
+
+
+@pytest.fixture
+def key():
+    return PrivateKey(hashlib.sha256(b'tx-api').digest())
+
+
+@pytest.fixture
+def utxo_set(key):
+    utxos = UTXOSet()
+    utxos.clear()
+    pub = key.public_key.to_string('compressed').hex()
+    utxos.add_utxo(SENDER, FUNDING, 0, 10.0, pub)
+    return utxos
+
+
+@pytest.fixture
+def client(utxo_set):
+    app = Flask(__name__)
+    app.register_blueprint(tx_bp(utxo_set, Mempool(utxo_set), None), url_prefix='/transaction')
+    return app.test_client()
+
+
+def transfer(key, amount=1.0):
+    return create_transfer(key, SENDER, RECIPIENT, amount,
+                           [{'txid': FUNDING, 'index': 0, 'amount': 10.0}])
+
+
+@pytest.mark.parametrize('amount', [1e12, float('inf'), float('nan'), -1e12])
+def test_check_raw_transaction_rejects_out_of_range_amount(key, utxo_set, amount):
+    tx = transfer(key)
+    tx['outputs'][0]['amount'] = amount
+    with pytest.raises(TransferError, match='malformada'):
+        check_raw_transaction(utxo_set, tx)
+
+
+@pytest.mark.parametrize('field', ['fee', 'amount'])
+def test_check_raw_transaction_rejects_oversized_fields(key, utxo_set, field):
+    tx = transfer(key)
+    tx[field] = 1e12
+    with pytest.raises(TransferError, match='malformada'):
+        check_raw_transaction(utxo_set, tx)
+
+
+@pytest.mark.parametrize('amount', ['1e12', 'Infinity', 'NaN'])
+def test_submit_returns_400_for_out_of_range_amount(key, client, amount):
+    tx = transfer(key)
+    body = json.dumps(tx).replace('"amount": 1.0', f'"amount": {amount}', 1)
+    response = client.post('/transaction/submit', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def test_submit_accepts_valid_transaction(key, client):
+    tx = transfer(key)
+    response = client.post('/transaction/submit', json=tx)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['txid'] == tx['txid']
+
+
+def test_new_with_wrong_private_key_returns_400(client):
+    wrong = PrivateKey(hashlib.sha256(b'outra chave').digest())
+    response = client.post('/transaction/new', json={
+        'sender': SENDER, 'recipient': RECIPIENT, 'amount': 1.0, 'private_key': wrong.to_string().hex()
+    })
+    assert response.status_code == 400
+    assert 'Assinatura inválida' in response.get_json()['message']
+
+
+def test_new_signs_and_admits_transaction(key, client):
+    response = client.post('/transaction/new', json={
+        'sender': SENDER, 'recipient': RECIPIENT, 'amount': 1.0, 'private_key': key.to_string().hex()
+    })
+    assert response.status_code == 200, response.get_json()
+
+
+def test_build_transfer_bnb_pays_excess_as_fee(key, utxo_set):
+    excess = COST_OF_CHANGE // 2
+    amount = from_base_units(to_base_units(10.0) - excess)
+    data = {'sender': SENDER, 'recipient': RECIPIENT, 'coin_selection': 'bnb'}
+    tx = build_transfer(utxo_set, data, amount, 10, signing_key=key)
+    assert len(tx['outputs']) == 1
+    assert to_base_units(tx['fee']) == excess
+    check_raw_transaction(utxo_set, tx)
+
+
+def test_build_transfer_largest_first_keeps_change(key, utxo_set):
+    data = {'sender': SENDER, 'recipient': RECIPIENT, 'coin_selection': 'largest_first'}
+    tx = build_transfer(utxo_set, data, 9.99995, 10, signing_key=key)
+    assert [o['address'] for o in tx['outputs']] == [RECIPIENT, SENDER]
+    assert 'fee' not in tx
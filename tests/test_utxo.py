@@ -0,0 +1,71 @@
+# tests/test_utxo.py
+import hashlib
+
+from transactions.utxo import UTXOSet
+
+
+def txid(n):
+    return hashlib.sha256(f"utxo{n}".encode()).hexdigest()
+
+
+def test_interned_addresses_and_keys_are_freed_and_reused():
+    utxos = UTXOSet()
+    utxos.clear()
+    for n in range(100):
+        utxos.add_utxo(f"{n:040x}", txid(n), 0, 1.0, f"03{n:064x}")
+        utxos.add_utxo(f"{n:040x}", txid(n), 1, 2.0, f"03{n:064x}")
+    assert len(utxos._addresses) == len(utxos._pubkeys) == 100
+
+    for round_ in range(5):
+        for n in range(100):
+            utxos.spend_utxo(txid(n + round_ * 100), 0)
+            utxos.spend_utxo(txid(n + round_ * 100), 1)
+        assert not utxos._address_ids and not utxos._pubkey_ids
+        for n in range(100, 200):
+            m = n + round_ * 100
+            utxos.add_utxo(f"{m:040x}", txid(m), 0, 1.0, f"03{m:064x}")
+            utxos.add_utxo(f"{m:040x}", txid(m), 1, 2.0, f"03{m:064x}")
+        assert len(utxos._addresses) == len(utxos._pubkeys) == 100
+
+    m = 599
+    assert utxos.get_balance(f"{m:040x}") == 3.0
+    assert {u.public_key for u in utxos.find_utxos(f"{m:040x}")} == {f"03{m:064x}"}
+
+
+def test_shared_key_survives_until_last_output_is_spent():
+    utxos = UTXOSet()
+    utxos.clear()
+    utxos.add_utxo('a' * 40, txid(1), 0, 1.0, '03' + 'k' * 64)
+    utxos.add_utxo('b' * 40, txid(2), 0, 1.0, '03' + 'k' * 64)
+    utxos.spend_utxo(txid(1), 0)
+    assert utxos.get_utxo(txid(2), 0).public_key == '03' + 'k' * 64
+    assert utxos.get_balance('a' * 40) == 0
+    utxos.add_utxo('c' * 40, txid(3), 0, 5.0, '')
+    assert utxos.get_utxo(txid(2), 0).address == 'b' * 40
+    assert utxos.get_utxo(txid(3), 0).address == 'c' * 40
+    utxos.spend_utxo(txid(2), 0)
+    assert list(utxos._pubkey_ids) == ['']
+
+
+def test_loading_a_stored_set_leaves_nothing_to_persist():
+    source = UTXOSet()
+    source.clear()
+    for n in range(10):
+        source.add_utxo(f"{n:040x}", txid(n), 0, 1.0, '')
+    utxos = UTXOSet()
+    utxos.load_serializable(source.to_serializable())
+    assert len(utxos) == 10
+    assert utxos.pending_changes() == (False, [])
+
+
+def test_no_deltas_are_recorded_while_a_full_rewrite_is_pending():
+    utxos = UTXOSet()
+    utxos.clear()
+    for n in range(10):
+        utxos.add_utxo(f"{n:040x}", txid(n), 0, 1.0, '')
+    utxos.spend_utxo(txid(0), 0)
+    assert utxos.pending_changes() == (True, [])
+
+    utxos.mark_persisted()
+    utxos.spend_utxo(txid(1), 0)
+    assert utxos.pending_changes() == (False, [{'op': 'spend', 'txid': txid(1), 'index': 0}])
@@ -0,0 +1,40 @@
+# tests/test_wallet_api.py
+import json
+
+import pytest
+from flask import Flask
+
+from blockchain import provisioning
+from blockchain.wallet_api import wallet_bp
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Nenhum pedido aqui deve chegar à derivação das carteiras
+    monkeypatch.setattr('blockchain.wallet_api.provision',
+                        lambda items: pytest.fail('pool iniciado para um pedido inválido'))
+    app = Flask(__name__)
+    app.register_blueprint(wallet_bp(None, None), url_prefix='/wallet')
+    return app.test_client()
+
+
+@pytest.mark.parametrize('node_ids', [[1, 'b'], ['a', None], ['a', {'id': 'b'}], ['a', ['b']], ['a', '']])
+def test_bulk_rejects_non_text_node_ids(client, node_ids):
+    response = client.post('/wallet/bulk', json={'count': 2, 'register': True, 'node_ids': node_ids})
+    assert response.status_code == 400
+    assert 'node_ids' in response.get_json()['error']
+
+
+def test_bulk_rejects_node_ids_of_wrong_length(client):
+    response = client.post('/wallet/bulk', json={'count': 2, 'node_ids': ['a']})
+    assert response.status_code == 400
+
+
+def test_bulk_streams_wallets(monkeypatch):
+    app = Flask(__name__)
+    app.register_blueprint(wallet_bp(None, None), url_prefix='/wallet')
+    monkeypatch.setattr('blockchain.wallet_api.provision', provisioning.WalletProvisioner(workers=1).provision)
+    response = app.test_client().post('/wallet/bulk', json={'count': 2})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['index'] for line in lines] == [0, 1]
+    assert all(provisioning.derive_wallet(line['mnemonic'])['address'] == line['address'] for line in lines)
@@ -0,0 +1,164 @@
+# transactions/coin_selection.py
+# Seleção de moedas (inputs) para montar transações.
+#
+# Trabalha sobre as listas do UTXOSet ordenadas por valor
+# (utxos_by_amount), sempre em unidades base:
+#   largest_first -> maiores primeiro: o menor número de inputs possível
+#   bnb           -> branch-and-bound atrás de uma combinação que feche o
+#                    valor sem troco (sobra <= cost_of_change); se não achar,
+#                    cai no largest_first
+#   consolidate   -> cobre o valor com os maiores e completa até max_inputs
+#                    com os menores, juntando a poeira num troco só
+#
+# Todas respeitam max_inputs: carteiras que recebem muitos pagamentos
+# pequenos não geram transações com milhares de assinaturas.
+from bisect import bisect_left, bisect_right
+from blockchain.encoding import to_base_units, from_base_units
+import config
+
+STRATEGIES = ('largest_first', 'bnb', 'consolidate')
+
+# Limite de nós visitados pelo branch-and-bound
+BNB_MAX_TRIES = 100000
+
+# Sobra aceita pelo bnb sem criar troco (a fee padrão da carteira)
+COST_OF_CHANGE = to_base_units(0.0001)
+
+# Maior que qualquer outpoint (36 bytes), para buscas por valor com bisect
+_OUTPOINT_MAX = b'\xff' * 37
+
+
+class CoinSelectionError(Exception):
+    pass
+
+
+class Selection:
+    __slots__ = ('utxos', 'total', 'change', 'excess', 'strategy')
+
+    def __init__(self, utxos, total, change, strategy, excess=0.0):
+        self.utxos = utxos          # objetos UTXO escolhidos
+        self.total = total          # soma dos inputs
+        self.change = change        # troco a devolver ao remetente
+        self.excess = excess        # sobra sem troco que vai para a fee (bnb)
+        self.strategy = strategy    # estratégia que de fato escolheu
+
+
+def select_coins(utxo_set, address, amount, strategy=None, max_inputs=None,
+                 cost_of_change=COST_OF_CHANGE):
+    """Escolhe UTXOs de address que cubram amount (incluindo fee)"""
+    strategy = strategy or config.COIN_SELECTION_STRATEGY
+    if strategy not in STRATEGIES:
+        raise CoinSelectionError(f"Estratégia de seleção desconhecida: {strategy}")
+    max_inputs = max_inputs or config.MAX_TX_INPUTS
+    if max_inputs < 1:
+        raise CoinSelectionError("max_inputs deve ser positivo")
+
+    target = to_base_units(amount)
+    coins = utxo_set.utxos_by_amount(address)
+    balance = utxo_set.get_balance(address)
+    if not coins:
+        raise CoinSelectionError("Nenhum UTXO disponível para o remetente")
+    if to_base_units(balance) < target:
+        raise CoinSelectionError(f"Saldo insuficiente. Necessário: {amount}, Disponível: {balance}")
+
+    chosen = None
+    used = strategy
+    if strategy == 'bnb':
+        chosen = branch_and_bound(coins, to_base_units(balance), target, max_inputs, cost_of_change)
+        if chosen is None:
+            used = 'largest_first'
+    if chosen is None:
+        chosen = largest_first(coins, target, max_inputs)
+        if strategy == 'consolidate':
+            chosen = consolidate(coins, chosen, max_inputs)
+
+    total = sum(units for units, _ in chosen)
+    utxos = [utxo_set.get_outpoint(outpoint) for _, outpoint in chosen]
+    if used == 'bnb':
+        # A combinação fecha sem troco: quem monta a transação soma a sobra
+        # (<= cost_of_change) na fee em vez de criar uma saída de troco
+        return Selection(utxos, from_base_units(total), 0.0, used,
+                         excess=from_base_units(total - target))
+    return Selection(utxos, from_base_units(total), from_base_units(total - target), used)
+
+
+def largest_first(coins, target, max_inputs):
+    chosen = []
+    total = 0
+    for coin in reversed(coins):
+        if len(chosen) == max_inputs:
+            raise CoinSelectionError(f"O valor exige mais de {max_inputs} inputs")
+        chosen.append(coin)
+        total += coin[0]
+        if total >= target:
+            return chosen
+    raise CoinSelectionError("Saldo insuficiente")
+
+
+def branch_and_bound(coins, balance, target, max_inputs, cost_of_change):
+    """Combinação com sobra em [0, cost_of_change], ou None
+
+    coins é a lista crescente do UTXOSet e balance a soma dela. A busca em
+    profundidade vai dos maiores para os menores candidatos, então a primeira
+    combinação encontrada já usa poucos inputs e é devolvida na hora (a sobra
+    dela vira fee). As somas parciais só são calculadas até onde a busca
+    chega, então o custo não depende do tamanho da carteira inteira.
+    """
+    upper = target + cost_of_change
+
+    # Moeda única que já fecha o valor: busca direta na lista ordenada
+    exact = bisect_left(coins, (target,))
+    if exact < len(coins) and coins[exact][0] <= upper:
+        return [coins[exact]]
+
+    # Só moedas <= upper podem entrar; o candidato k é coins[n - 1 - k]
+    n = bisect_right(coins, (upper, _OUTPOINT_MAX))
+    available = balance - sum(units for units, _ in coins[n:])
+    if available < target:
+        return None
+    prefix = [0]                    # prefix[k] = soma dos k maiores candidatos
+
+    def rest(i):
+        while len(prefix) <= i:
+            prefix.append(prefix[-1] + coins[n - len(prefix)][0])
+        return available - prefix[i]
+
+    selected = []                   # candidatos incluídos, em ordem crescente
+    total = 0
+    i = 0
+    for _ in range(BNB_MAX_TRIES):
+        if total >= target:
+            return [coins[n - 1 - k] for k in selected]
+
+        if total + rest(i) >= target and len(selected) < max_inputs:
+            # Inclui o próximo candidato se ele não estourar o limite
+            value = coins[n - 1 - i][0]
+            if total + value <= upper:
+                selected.append(i)
+                total += value
+            i += 1
+            continue
+
+        if not selected:
+            break
+        # Desfaz a última inclusão e segue pelo ramo que a exclui, pulando
+        # candidatos de mesmo valor (dariam as mesmas somas)
+        j = selected.pop()
+        value = coins[n - 1 - j][0]
+        total -= value
+        i = j + 1
+        while i < n and coins[n - 1 - i][0] == value:
+            i += 1
+    return None
+
+
+def consolidate(coins, chosen, max_inputs):
+    """Completa a seleção com as menores moedas até max_inputs"""
+    taken = {outpoint for _, outpoint in chosen}
+    extra = []
+    for coin in coins:
+        if len(chosen) + len(extra) >= max_inputs:
+            break
+        if coin[1] not in taken:
+            extra.append(coin)
+    return chosen + extra
@@ -0,0 +1,131 @@
+# transactions/journal.py
+# Journal append-only de registros JSON (um por linha) com group commit.
+#
+# Os registros são escritos no arquivo assim que chegam; o fsync é feito a cada
+# N registros ou a cada X segundos (o que vier primeiro), por um timer se
+# ninguém mais escrever. Uma linha final incompleta (crash no meio da escrita)
+# é descartada no replay.
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class Journal:
+    def __init__(self, path, fsync_every=64, fsync_interval=0.5):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.records = 0          # registros no arquivo desde o último reset
+
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+        self._file = None
+        atexit.register(self.close)
+
+    def _open(self):
+        if self._file is None or self._file.closed:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a')
+
+    def append(self, records):
+        if not records:
+            return
+        data = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+        with self.lock:
+            self._open()
+            self._file.write(data)
+            self._file.flush()
+            self.records += len(records)
+            self._pending += len(records)
+
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending and self._file is not None and not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self.lock:
+            self._sync_locked()
+
+    def replay(self):
+        """Lê todos os registros válidos e corta uma eventual linha final quebrada"""
+        records = []
+        valid_bytes = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+                    valid_bytes += len(line)
+        except FileNotFoundError:
+            return records
+
+        with self.lock:
+            if os.path.getsize(self.path) > valid_bytes:
+                print(f"[JOURNAL] Descartando final incompleto de {self.path}")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+            self.records = len(records)
+        return records
+
+    def reset(self):
+        """Esvazia o journal (depois que o estado foi compactado num snapshot)"""
+        with self.lock:
+            if self._file is not None and not self._file.closed:
+                self._file.close()
+            self._file = None
+            if os.path.exists(self.path):
+                with open(self.path, 'w') as f:
+                    os.fsync(f.fileno())
+            self.records = 0
+            self._pending = 0
+
+    def rotate(self, path):
+        """Move os registros atuais para path e recomeça com o journal vazio.
+
+        Se path já existe (uma rotação anterior ainda não foi descartada),
+        os registros são acrescentados ao final dele.
+        """
+        with self.lock:
+            self._sync_locked()
+            if self._file is not None and not self._file.closed:
+                self._file.close()
+            self._file = None
+            if os.path.exists(self.path):
+                if os.path.exists(path):
+                    with open(path, 'ab') as dst, open(self.path, 'rb') as src:
+                        shutil.copyfileobj(src, dst)
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, path)
+            self.records = 0
+            self._pending = 0
+
+    def close(self):
+        with self.lock:
+            self._sync_locked()
+            if self._file is not None and not self._file.closed:
+                self._file.close()
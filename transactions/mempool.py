@@ -1,97 +1,356 @@
 # mempool.py
 import json
 import threading
+import time
 from datetime import datetime
 from .utxo import is_valid_transaction
+from .utxo_view import UTXOView, apply_transaction
+from .mempool_index import MempoolIndex, arrival_time
+from blockchain import encoding
+from storage.backend import get_storage
+from blockchain.response_cache import next_version
+import config
 import os
 class Mempool:
     def __init__(self, utxo_set):
-        self.transactions = []
-        self.utxo_set = utxo_set    
-        self.max_size = 10000
+        # Transações pendentes indexadas por txid, fee rate e outpoint gasto
+        self.index = MempoolIndex()
+        # utxo_set é o conjunto confirmado; as transações pendentes ficam numa
+        # camada por cima dele, que é o que a API consulta
+        self.confirmed = utxo_set
+        self.utxo_set = UTXOView(utxo_set)
+        # Limite em bytes serializados e tempo máximo de espera (segundos)
+        self.max_bytes = config.MEMPOOL_MAX_BYTES
+        self.ttl = config.MEMPOOL_TTL
         self.lock = threading.Lock()
+        # Muda a cada transação que entra ou sai; chave do cache de respostas
+        self.version = next_version()
 
-        # Caminho absoluto para o arquivo mempool.json na raiz do servidor
-        self.mempool_file = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'mempool.json'))
+        # mempool.json na raiz do servidor ou a tabela mempool do SQLite
+        self.storage = get_storage()
+        self.store = self.storage.open_mempool()
         self.load_transactions()
 
+    @property
+    def transactions(self):
+        """Transações pendentes em ordem de chegada"""
+        return [entry.tx for entry in self.index.entries.values()]
+
+    def __len__(self):
+        return len(self.index)
+
     def add_transaction(self, tx):
-        with self.lock:
-            # — suas validações existentes —
-            for inp in tx.get('inputs', []):
-                if not self.utxo_set.get_utxo(inp['txid'], inp['index']):
-                    raise Exception(f"UTXO {inp['txid']}:{inp['index']} não encontrado ou já gasto")
-
-            # adiciona timestamp se necessário
-            if 'timestamp' not in tx:
-                tx['timestamp'] = datetime.utcnow().isoformat()
-
-            # **1. remova do UTXOSet os inputs desta tx**
-            for inp in tx['inputs']:
-                self.utxo_set.spend_utxo(inp['txid'], inp['index'])
-
-            # **2. adicione ao UTXOSet os outputs desta tx**
-            for idx, out in enumerate(tx.get('outputs', [])):
-                self.utxo_set.add_utxo(
-                    out['address'],
-                    tx['txid'],
-                    idx,
-                    out['amount'],
-                    out.get('public_key', '')
-                )
-
-            # **3. persista as mudanças no utxos.json**
-            self.utxo_set.save_utxos()
-
-            # agora sim adiciona ao mempool
-            self.transactions.append(tx)
-            self.save_transactions()
+        # O lock do armazenamento vem antes do da mempool (mesma ordem da
+        # mineração), e UTXOs + mempool são gravados juntos
+        with self.storage.atomic(), self.lock:
+            removed = self._expire()
+            try:
+                removed += self._admit(tx)
+            except Exception:
+                # As expiradas saem do disco mesmo que tx seja recusada
+                if removed:
+                    self.store.append(removed=removed)
+                    self.version = next_version()
+                raise
+            self.store.append(added=[tx], removed=removed)
+            self._maybe_compact()
+            self.version = next_version()
             print(f"[MEMPOOL] Transação {tx['txid']} adicionada e UTXOSet atualizado")
+
+    def add_transactions(self, txs):
+        """Admite um lote com uma aquisição do lock e uma gravação só.
+
+        Cada transação é admitida ou recusada sozinha, na ordem do lote (pais
+        antes dos filhos); retorna uma mensagem de erro por transação, None
+        para as aceitas.
+        """
+        errors = []
+        admitted = []
+        with self.storage.atomic(), self.lock:
+            removed = self._expire()
+            for tx in txs:
+                try:
+                    removed += self._admit(tx)
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                errors.append(None)
+                admitted.append(tx)
+            # Uma aceita no começo do lote pode ter sido despejada por outra
+            # do fim; essa não vai para o disco
+            added = [tx for tx in admitted if tx['txid'] in self.index]
+            if added or removed:
+                self.store.append(added=added, removed=removed)
+                self._maybe_compact()
+            if admitted or removed:
+                self.version = next_version()
+        if admitted:
+            print(f"[MEMPOOL] Lote: {len(admitted)} de {len(txs)} transações adicionadas")
+        return errors
+
+    def _admit(self, tx):
+        """Coloca tx no índice e na camada de UTXOs (chamado com self.lock).
+
+        Levanta exceção se ela não puder entrar; retorna os txids que saíram
+        para abrir espaço, para o journal.
+        """
+        if tx['txid'] in self.index:
+            raise Exception(f"Transação {tx['txid']} já está na mempool")
+        # Gasto duplo com outra pendente: O(inputs) pelo índice de outpoints
+        for inp in tx.get('inputs', []):
+            spender = self.index.spender_of(inp['txid'], inp['index'])
+            if spender is not None:
+                raise Exception(f"UTXO {inp['txid']}:{inp['index']} já gasto pela transação pendente {spender}")
+
+        # adiciona timestamp se necessário
+        if 'timestamp' not in tx:
+            tx['timestamp'] = datetime.utcnow().isoformat()
+
+        # A chegada é o timestamp da transação (assinado junto com ela),
+        # o mesmo usado quando a mempool é recarregada do disco
+        now = time.time()
+        entry = self.index.make_entry(tx, arrival_time(tx, now))
+        if self.ttl and entry.added_at < now - self.ttl:
+            raise Exception(f"Transação {tx['txid']} expirada (timestamp {tx['timestamp']})")
+        victims = self._plan_eviction(entry)
+
+        # Aplica numa camada descartável; só entra na camada da mempool
+        # se todos os inputs existirem
+        layer = self.utxo_set.overlay()
+        apply_transaction(layer, tx)
+
+        # As despejadas não são pais de tx nem gastam os mesmos inputs,
+        # então desfazê-las não mexe no que a camada acabou de validar
+        for txid in victims:
+            self._undo(txid)
+        if victims:
+            print(f"[MEMPOOL] {len(victims)} transações despejadas para abrir espaço")
+        layer.commit()
+
+        # agora sim adiciona ao mempool
+        self.index.add(entry)
+        return victims
+
+    def _plan_eviction(self, entry):
+        """txids a despejar para que entry caiba em max_bytes.
+
+        Percorre as entradas de menor fee rate (cada uma com os descendentes,
+        que não ficam sem o pai) até liberar espaço suficiente; só lê o heap,
+        em O(k log n) para k despejadas. Levanta exceção se tx não pagar mais
+        por byte que as que sairiam.
+        """
+        if entry.size > self.max_bytes:
+            raise Exception(f"Transação de {entry.size} bytes excede o limite da mempool ({self.max_bytes} bytes)")
+        needed = self.index.total_bytes + entry.size - self.max_bytes
+        victims = []
+        planned = set()
+        if needed <= 0:
+            return victims
+        for worst in self.index.lowest():
+            if worst.txid in planned:
+                continue
+            if worst.fee_rate >= entry.fee_rate:
+                raise Exception(f"Mempool cheia: fee rate mínimo {worst.fee_rate:.2f} unidades/byte")
+            for txid in self.index.descendants(worst.txid):
+                if txid not in planned:
+                    planned.add(txid)
+                    victims.append(txid)
+                    needed -= self.index.get(txid).size
+            if needed <= 0:
+                break
+        for inp in entry.tx.get('inputs', []):
+            if inp['txid'] in planned:
+                raise Exception(f"Mempool cheia: a transação pai {inp['txid']} seria despejada")
+        return victims
+
+    def _undo(self, txid):
+        """Tira txid do índice e desfaz o efeito dela na camada da mempool.
+
+        Os filhos precisam sair antes (descendants() já devolve nessa ordem).
+        """
+        entry = self.index.remove(txid)
+        tx = entry.tx
+        for idx in range(len(tx.get('outputs', []))):
+            self.utxo_set.spend_utxo(txid, idx)
+        for inp in tx.get('inputs', []):
+            parent = self.index.get(inp['txid'])
+            if parent is not None:
+                # Saída de outra pendente: volta a existir só na camada
+                out = parent.tx['outputs'][inp['index']]
+                public_key = out.get('public_key', '') or out.get('locking_script', '')
+                self.utxo_set.add_utxo(out['address'], parent.txid, inp['index'], out['amount'], public_key)
+            else:
+                self.utxo_set.restore(inp['txid'], inp['index'])
+        return entry
+
+    def _expire(self):
+        """Remove as transações mais velhas que o TTL, com os descendentes"""
+        removed = []
+        if not self.ttl:
+            return removed
+        for txid in self.index.expired(time.time() - self.ttl):
+            if txid not in self.index:
+                continue        # já saiu como descendente de outra expirada
+            for victim in self.index.descendants(txid):
+                self._undo(victim)
+                removed.append(victim)
+        if removed:
+            print(f"[MEMPOOL] {len(removed)} transações expiradas")
+        return removed
+
+    def _trim(self):
+        """Despeja as de menor fee rate até a mempool caber em max_bytes"""
+        removed = []
+        while self.index.total_bytes > self.max_bytes:
+            worst = next(self.index.lowest())
+            for victim in self.index.descendants(worst.txid):
+                self._undo(victim)
+                removed.append(victim)
+        if removed:
+            print(f"[MEMPOOL] {len(removed)} transações despejadas (limite de {self.max_bytes} bytes)")
+        return removed
+
+    def expire_transactions(self):
+        """Remove as expiradas; chamado também a cada transação nova"""
+        with self.storage.atomic(), self.lock:
+            removed = self._expire()
+            if removed:
+                self.store.append(removed=removed)
+                self._maybe_compact()
+                self.version = next_version()
+            return removed
+
     def _calculate_txid(self, tx):
         """Calcula um TXID único para a transação"""
-        import hashlib
-        tx_str = json.dumps(tx, sort_keys=True)
-        return hashlib.sha256(tx_str.encode()).hexdigest()
+        return encoding.tx_hash(tx)
 
     def get_all_transactions(self):
         """Retorna cópia segura das transações"""
         with self.lock:
-            return self.transactions.copy()
+            return self.transactions
+
+    def address_history(self, address, before=None, limit=None):
+        """Transações pendentes de address, da mais nova para a mais velha"""
+        with self.lock:
+            return self.index.address_history(address, before, limit)
+
+    def get_transaction(self, txid):
+        entry = self.index.get(txid)
+        return entry.tx if entry is not None else None
 
     def get_transactions_for_block(self, max_count=100):
-        """Retorna transações para mineração, ordenadas por fee"""
+        """Retorna transações para mineração, ordenadas por fee rate (O(k log k)).
+
+        Uma transação que gasta saída de outra pendente vem depois dela: os
+        pais entram na frente mesmo com fee rate menor.
+        """
         with self.lock:
-            sorted_txs = sorted(
-                self.transactions,
-                key=lambda x: (-x.get('fee', 0), x['timestamp'])
-            )
-            return sorted_txs[:max_count]
+            selected = []
+            seen = set()
+
+            def include(entry):
+                # Pilha explícita em vez de recursão: cadeias longas de troco
+                # não estouram o limite de recursão com o lock na mão. Cada
+                # item é (entrada, pais já visitados?); a entrada só vai para
+                # selected depois dos pais, na mesma ordem da recursão
+                stack = [(entry, False)]
+                while stack:
+                    entry, expanded = stack.pop()
+                    if expanded:
+                        selected.append(entry.tx)
+                        continue
+                    if entry.txid in seen:
+                        continue
+                    seen.add(entry.txid)
+                    stack.append((entry, True))
+                    parents = []
+                    for inp in entry.tx.get('inputs', []):
+                        parent = self.index.get(inp['txid'])
+                        if parent is not None and parent.txid not in seen:
+                            parents.append((parent, False))
+                    # O pai do primeiro input sai da pilha primeiro
+                    stack.extend(reversed(parents))
+
+            for entry in self.index.best(max_count):
+                if len(selected) >= max_count:
+                    break
+                if entry.txid not in seen:
+                    include(entry)
+            return selected[:max_count]
 
     def remove_confirmed_transactions(self, txids):
-        """Remove transações confirmadas em blocos"""
+        """Remove transações confirmadas em blocos.
+
+        A mineração chama dentro do mesmo atomic() do bloco: a memória só
+        muda depois do COMMIT, então um bloco desfeito não leva as
+        transações junto.
+        """
+        with self.storage.atomic():
+            with self.lock:
+                removed = [txid for txid in txids if txid in self.index]
+                if removed:
+                    self.store.append(removed=removed)
+            if removed:
+                self.storage.on_commit(lambda: self._settle(removed))
+
+    def _settle(self, txids):
         with self.lock:
-            initial_count = len(self.transactions)
-            self.transactions = [
-                tx for tx in self.transactions 
-                if tx['txid'] not in txids
-            ]
-            removed = initial_count - len(self.transactions)
-            if removed > 0:
-                print(f"[MEMPOOL] Removidas {removed} transações confirmadas")
-                self.save_transactions()
+            for txid in txids:
+                entry = self.index.remove(txid)
+                if entry is None:
+                    continue
+                # O bloco já aplicou a transação na base; tira o delta dela
+                # da camada da mempool
+                self.utxo_set.settle(entry.tx)
+            print(f"[MEMPOOL] Removidas {len(txids)} transações confirmadas")
+            self._maybe_compact()
+            self.version = next_version()
+
+    def _maybe_compact(self):
+        # Chamado com self.lock: só a cópia da lista é feita aqui; a escrita
+        # do snapshot roda em segundo plano. O journal só é compactado quando
+        # passa do tamanho da mempool, então o custo amortizado por
+        # transação não cresce com ela.
+        if self.store.needs_compaction(len(self.index)):
+            self.store.compact(self.transactions)
 
     def save_transactions(self):
-        try:
-            with open(self.mempool_file, 'w') as f:
-                json.dump(self.transactions, f, indent=2)
-        except Exception as e:
-            print(f"[ERROR] Falha ao salvar mempool: {e}")
+        with self.lock:
+            transactions = self.transactions
+        self.store.compact(transactions, wait=True)
 
     def load_transactions(self):
-        try:
-            with open(self.mempool_file, 'r') as f:
-                self.transactions = json.load(f)
-                print(f"[MEMPOOL] Carregadas {len(self.transactions)} transações")
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.transactions = []
-   
\ No newline at end of file
+        """Reaplica as pendentes salvas sobre a base, descartando as que ficaram inválidas"""
+        dropped = self._rebuild(self.store.load())
+        # TTL e limite de bytes podem ter mudado desde a gravação
+        dropped += self._expire() + self._trim()
+        if dropped:
+            self.store.append(removed=dropped)
+            self.version = next_version()
+        if self.index:
+            print(f"[MEMPOOL] Carregadas {len(self.index)} transações")
+
+    def _rebuild(self, txs):
+        """Refaz índice e camada de UTXOs a partir de txs; retorna os txids descartados"""
+        self.index.clear()
+        self.utxo_set.discard()
+        dropped = []
+        now = time.time()
+        for tx in txs:
+            try:
+                self._restore(tx, now)
+            except Exception as e:
+                print(f"[MEMPOOL] Transação {tx.get('txid')} descartada: {e}")
+                dropped.append(tx.get('txid'))
+        self.version = next_version()
+        return dropped
+
+    def _restore(self, tx, now):
+        """Recoloca uma transação gravada no índice e na camada de UTXOs, sem
+        as regras de admissão; levanta exceção se ela não couber mais"""
+        layer = self.utxo_set.overlay()
+        if self.index.conflicts(tx) or tx['txid'] in self.index:
+            raise Exception("conflita com outra transação pendente")
+        apply_transaction(layer, tx)
+        layer.commit()
+        self.index.add(self.index.make_entry(tx, arrival_time(tx, now)))
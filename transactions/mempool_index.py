@@ -0,0 +1,218 @@
+# transactions/mempool_index.py
+# Índices da mempool:
+#   entries  -> txid -> MempoolEntry (em ordem de chegada)
+#   heap     -> (-fee rate, timestamp, seq, txid): seleção para o bloco
+#   low      -> (fee rate, seq, txid): candidatas a despejo
+#   arrivals -> (chegada, seq, txid): expiração por TTL
+#   spenders -> (txid, index) gasto -> txid da transação pendente que o gasta
+#   history  -> endereço -> txid -> (seq, tipo, unidades), em ordem de chegada
+#
+# Cada entrada conhece os pais e filhos que estão na mempool (transações que
+# gastam saídas umas das outras), para que despejo e expiração levem junto
+# os descendentes.
+#
+# Os heaps têm remoção preguiçosa: itens de entradas que já saíram ficam
+# lá até serem alcançados ou até o próximo rebuild.
+# Inserção e remoção custam O(inputs + log n); seleção e despejo leem os
+# heaps como árvore em O(k log k), sem tirar nada deles.
+import heapq
+import itertools
+from datetime import datetime, timezone
+from blockchain import encoding
+from blockchain.encoding import to_base_units
+from blockchain.address_index import tx_entries, history_item, MEMPOOL_CURSOR
+
+# Os heaps são refeitos quando as entradas removidas passam das vivas
+MIN_STALE_REBUILD = 1024
+
+
+def arrival_time(tx, now):
+    """Horário de chegada de uma transação para o TTL: o timestamp dela,
+    limitado a agora (sem timestamp válido, agora)"""
+    try:
+        dt = datetime.fromisoformat(tx.get('timestamp') or '')
+    except (TypeError, ValueError):
+        return now
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return min(dt.timestamp(), now)
+
+
+class MempoolEntry:
+    __slots__ = ('tx', 'txid', 'fee', 'size', 'fee_rate', 'timestamp', 'seq',
+                 'added_at', 'parents', 'children')
+
+    def __init__(self, tx, seq, added_at):
+        self.tx = tx
+        self.txid = tx['txid']
+        self.fee = to_base_units(tx.get('fee', 0) or 0)
+        self.size = len(encoding.encode_tx(tx, include_signatures=True))
+        self.fee_rate = self.fee / self.size      # unidades base por byte
+        self.timestamp = tx.get('timestamp') or ''
+        self.seq = seq
+        self.added_at = added_at
+        self.parents = set()        # txids na mempool dos quais esta gasta saídas
+        self.children = set()       # txids na mempool que gastam saídas desta
+
+    def outpoints(self):
+        return [(inp['txid'], inp['index']) for inp in self.tx.get('inputs', [])]
+
+
+class MempoolIndex:
+    def __init__(self):
+        self.entries = {}
+        self.spenders = {}
+        self.history = {}
+        self.total_bytes = 0
+        self._heap = []
+        self._low = []
+        self._arrivals = []
+        self._stale = 0
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, txid):
+        return txid in self.entries
+
+    def get(self, txid):
+        return self.entries.get(txid)
+
+    def spender_of(self, txid, index):
+        """txid da transação pendente que já gasta o outpoint, ou None"""
+        return self.spenders.get((txid, index))
+
+    def conflicts(self, tx):
+        """Transações pendentes que gastam algum input de tx (O(inputs))"""
+        found = []
+        for inp in tx.get('inputs', []):
+            spender = self.spenders.get((inp['txid'], inp['index']))
+            if spender is not None and spender not in found:
+                found.append(spender)
+        return found
+
+    def make_entry(self, tx, added_at):
+        return MempoolEntry(tx, next(self._seq), added_at)
+
+    def add(self, entry):
+        self.entries[entry.txid] = entry
+        self.total_bytes += entry.size
+        for outpoint in entry.outpoints():
+            self.spenders[outpoint] = entry.txid
+            parent = self.entries.get(outpoint[0])
+            if parent is not None and parent is not entry:
+                entry.parents.add(parent.txid)
+                parent.children.add(entry.txid)
+        for address, kind, units in tx_entries(entry.tx):
+            self.history.setdefault(address, {})[entry.txid] = (entry.seq, kind, units)
+        heapq.heappush(self._heap, (-entry.fee_rate, entry.timestamp, entry.seq, entry.txid))
+        heapq.heappush(self._low, (entry.fee_rate, entry.seq, entry.txid))
+        heapq.heappush(self._arrivals, (entry.added_at, entry.seq, entry.txid))
+        return entry
+
+    def remove(self, txid):
+        entry = self.entries.pop(txid, None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry.size
+        for outpoint in entry.outpoints():
+            if self.spenders.get(outpoint) == txid:
+                del self.spenders[outpoint]
+        for parent in entry.parents:
+            self.entries[parent].children.discard(txid)
+        for child in entry.children:
+            self.entries[child].parents.discard(txid)
+        for address, _, _ in tx_entries(entry.tx):
+            pending = self.history.get(address)
+            if pending is not None:
+                pending.pop(txid, None)
+                if not pending:
+                    del self.history[address]
+        self._stale += 1
+        if self._stale > MIN_STALE_REBUILD and self._stale > len(self.entries):
+            self._rebuild()
+        return entry
+
+    def address_history(self, address, before=None, limit=None):
+        """Pendentes de address, da mais nova para a mais velha; before é o
+        seq de um cursor da mempool"""
+        result = []
+        for txid, (seq, kind, units) in reversed(self.history.get(address, {}).items()):
+            if limit is not None and len(result) >= limit:
+                break
+            if before is not None and seq >= before:
+                continue
+            tx = self.entries[txid].tx
+            result.append(history_item(txid, kind, units, tx.get('timestamp') or tx.get('date'),
+                                       'pending', f"{MEMPOOL_CURSOR}:{seq}"))
+        return result
+
+    def descendants(self, txid):
+        """txid e todos os descendentes na mempool, filhos antes dos pais.
+
+        Um filho sempre chega depois dos pais (precisa deles na mempool), então
+        ordenar pela chegada, do mais novo para o mais velho, basta.
+        """
+        found = {txid}
+        stack = [txid]
+        while stack:
+            for child in self.entries[stack.pop()].children:
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return sorted(found, key=lambda t: self.entries[t].seq, reverse=True)
+
+    def _live(self, txid, seq):
+        entry = self.entries.get(txid)
+        return entry is not None and entry.seq == seq
+
+    def _rebuild(self):
+        self._heap = [item for item in self._heap if self._live(item[3], item[2])]
+        heapq.heapify(self._heap)
+        self._low = [item for item in self._low if self._live(item[2], item[1])]
+        heapq.heapify(self._low)
+        self._arrivals = [item for item in self._arrivals if self._live(item[2], item[1])]
+        heapq.heapify(self._arrivals)
+        self._stale = 0
+
+    @staticmethod
+    def _walk(heap):
+        """Itens do heap em ordem, sem alterá-lo: O(log k) por item"""
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            item, i = heapq.heappop(frontier)
+            yield item
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def best(self, count):
+        """As count entradas de maior fee rate, em ordem, sem alterar o heap"""
+        result = []
+        if count <= 0:
+            return result
+        for item in self._walk(self._heap):
+            if self._live(item[3], item[2]):
+                result.append(self.entries[item[3]])
+                if len(result) >= count:
+                    break
+        return result
+
+    def lowest(self):
+        """Entradas de menor fee rate, em ordem (gerador preguiçoso)"""
+        for item in self._walk(self._low):
+            if self._live(item[2], item[1]):
+                yield self.entries[item[2]]
+
+    def expired(self, deadline):
+        """Tira do heap e retorna os txids que chegaram antes de deadline"""
+        result = []
+        while self._arrivals and self._arrivals[0][0] < deadline:
+            added_at, seq, txid = heapq.heappop(self._arrivals)
+            if self._live(txid, seq):
+                result.append(txid)
+        return result
+
+    def clear(self):
+        self.__init__()
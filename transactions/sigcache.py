@@ -0,0 +1,108 @@
+# transactions/sigcache.py
+# Caches da verificação de assinaturas, compartilhados por todo o processo:
+#   signature_cache -> (pubkey, digest, assinatura) que já verificaram com sucesso
+#   key_cache       -> pubkey hex -> PublicKey (blockchain/crypto) já decodificada
+#
+# Uma transação é verificada quando entra na mempool e de novo quando o bloco
+# é montado; com o cache, a segunda passada não faz nenhuma conta de ECDSA.
+# Só verificações bem-sucedidas são guardadas: uma assinatura inválida é
+# verificada de novo a cada tentativa.
+import threading
+from collections import OrderedDict
+from blockchain.crypto import PublicKey
+import config
+
+
+class LRUCache:
+    """Dicionário limitado a maxsize entradas, descartando a menos usada"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+signature_cache = LRUCache(config.SIGCACHE_SIZE)
+key_cache = LRUCache(config.KEYCACHE_SIZE)
+
+
+def get_public_key(public_key_hex):
+    """PublicKey de uma chave pública hex, decodificada uma vez só"""
+    key = key_cache.get(public_key_hex)
+    if key is None:
+        key = PublicKey.from_hex(public_key_hex)
+        key_cache.put(public_key_hex, key)
+    return key
+
+
+def verify_digest(public_key_hex, digest, signature_hex, der=False):
+    """Verifica a assinatura de digest (r||s, ou DER com der=True).
+
+    Levanta crypto.BadSignatureError se não conferir.
+    """
+    key = (public_key_hex, digest, signature_hex, der)
+    if signature_cache.get(key):
+        return True
+    get_public_key(public_key_hex).verify_digest(bytes.fromhex(signature_hex), digest, der=der)
+    signature_cache.put(key, True)
+    return True
+
+
+def is_verified(public_key_hex, digest, signature_hex, der=False):
+    """A assinatura já foi verificada com sucesso (sem fazer a conta)?"""
+    return bool(signature_cache.get((public_key_hex, digest, signature_hex, der)))
+
+
+def remember(public_key_hex, digest, signature_hex, der=False):
+    """Guarda uma verificação bem-sucedida feita fora deste processo"""
+    signature_cache.put((public_key_hex, digest, signature_hex, der), True)
+
+
+def cache_stats():
+    return {'signatures': signature_cache.stats(), 'keys': key_cache.stats()}
+
+
+def clear_caches():
+    signature_cache.clear()
+    key_cache.clear()
+
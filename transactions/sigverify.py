@@ -0,0 +1,137 @@
+# transactions/sigverify.py
+# Verificação de assinaturas em lote.
+#
+# Um job é (pubkey hex, digest, assinatura hex r||s). O verificador:
+#   1. responde pelo cache (transactions/sigcache) o que já foi verificado;
+#   2. lotes pequenos (< SIG_PARALLEL_MIN) verifica no próprio processo,
+#      sem pagar a ida e volta ao pool;
+#   3. o resto vai em pedaços de SIG_CHUNK para um pool de processos, e os
+#      acertos voltam para o cache deste processo.
+#
+# Usado pela montagem de blocos, pela verificação da chain e pelo envio de
+# transações em lote.
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from blockchain.crypto import BadSignatureError
+from transactions.sigcache import get_public_key, is_verified, remember
+import config
+
+# Erros de uma assinatura ou chave malformada
+_INVALID = (BadSignatureError, ValueError, TypeError)
+
+
+def signing_digest(txid, index):
+    """Digest assinado por cada input: sha256 de f"{txid}:{index}" """
+    return hashlib.sha256(f"{txid}:{index}".encode()).digest()
+
+
+def transaction_jobs(tx):
+    return [
+        (inp.get('public_key') or '', signing_digest(tx['txid'], i), inp.get('signature') or '')
+        for i, inp in enumerate(tx.get('inputs', []))
+    ]
+
+
+def check_jobs(jobs):
+    """Verifica os jobs no processo atual, sem consultar o cache de
+    assinaturas (é o que roda dentro do pool)"""
+    results = []
+    for public_key, digest, signature in jobs:
+        try:
+            get_public_key(public_key).verify_digest(bytes.fromhex(signature), digest)
+            results.append(True)
+        except _INVALID:
+            results.append(False)
+    return results
+
+
+class SignatureVerifier:
+    def __init__(self, workers=None, chunk_size=None, min_parallel=None):
+        self.workers = workers or config.SIG_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or config.SIG_CHUNK
+        self.min_parallel = config.SIG_PARALLEL_MIN if min_parallel is None else min_parallel
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: o servidor tem threads, e fork copiaria locks travados
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def verify(self, jobs):
+        """Lista de bool, um por job, na mesma ordem"""
+        results = [False] * len(jobs)
+        pending = []
+        for n, (public_key, digest, signature) in enumerate(jobs):
+            if is_verified(public_key, digest, signature):
+                results[n] = True
+            else:
+                pending.append(n)
+        if not pending:
+            return results
+
+        todo = [jobs[n] for n in pending]
+        if self.workers <= 1 or len(todo) < self.min_parallel:
+            checked = check_jobs(todo)
+        else:
+            chunks = [todo[i:i + self.chunk_size] for i in range(0, len(todo), self.chunk_size)]
+            try:
+                checked = [ok for part in self._get_pool().map(check_jobs, chunks) for ok in part]
+            except BrokenProcessPool:
+                print("[SIGVERIFY] Pool de verificação caiu; verificando no processo atual")
+                self.close()
+                checked = check_jobs(todo)
+
+        for n, ok in zip(pending, checked):
+            results[n] = ok
+            if ok:
+                remember(*jobs[n])
+        return results
+
+    def verify_transactions(self, txs):
+        """Um bool por transação: todos os inputs com assinatura válida"""
+        jobs = []
+        spans = []
+        for tx in txs:
+            tx_jobs = transaction_jobs(tx)
+            spans.append((len(jobs), len(jobs) + len(tx_jobs)))
+            jobs.extend(tx_jobs)
+        results = self.verify(jobs)
+        return [all(results[start:end]) for start, end in spans]
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            _verifier = SignatureVerifier()
+            atexit.register(_verifier.close)
+        return _verifier
+
+
+def verify_batch(jobs):
+    return get_verifier().verify(jobs)
+
+
+def verify_transactions(txs):
+    return get_verifier().verify_transactions(txs)
@@ -1,9 +1,16 @@
 import json
 import os
-from ecdsa import VerifyingKey, SECP256k1, BadSignatureError
+from blockchain.crypto import BadSignatureError
 import hashlib
-from ecdsa.util import sigdecode_der
+import struct
+from array import array
+from bisect import bisect_left, insort
+from blockchain.encoding import to_base_units, from_base_units
+from storage.backend import get_storage
+from transactions.sigcache import verify_digest
 class UTXO:
+    __slots__ = ('txid', 'index', 'address', 'amount', 'public_key')
+
     def __init__(self, txid: str, index: int, address: str, amount: float, public_key: str):
         self.txid = txid
         self.index = index
@@ -20,83 +27,295 @@ class UTXO:
             "public_key": self.public_key
         }
 
+_OUTPOINT_INDEX = struct.Struct('>I')
+
+
 class UTXOSet:
+    """Conjunto de UTXOs em layout compacto.
+
+    Cada UTXO ocupa um slot em colunas array (id do endereço, valor em unidades
+    base, id da chave pública). A chave do slot é o outpoint empacotado em
+    36 bytes (txid binário + índice). Endereços e chaves públicas, que se
+    repetem em milhares de saídas, ficam guardados uma vez só em tabelas
+    internadas; a entrada sai da tabela (e o id é reusado) quando o último
+    UTXO que a usa é gasto. Objetos UTXO são montados apenas quando alguém
+    pede.
+
+    Persistência: as criações/gastos ficam registrados como deltas e
+    save_utxos() entrega ao store do backend configurado só o que mudou desde
+    o último save (O(inputs + outputs) por transação). No backend de arquivos
+    isso vai para utxos.journal, compactado periodicamente em utxos.json; no
+    SQLite, para a tabela outputs.
+    """
+
     def __init__(self):
-        self.utxos = {}
+        self.clear()
+        self._needs_compaction = False
+        self._loading = False
+        self.store = get_storage().open_utxos()
+
+    def clear(self):
+        self._slots = {}                 # outpoint empacotado -> slot
+        self._address_col = array('I')
+        self._amount_col = array('q')
+        self._pubkey_col = array('I')
+        self._free = []                  # slots liberados para reuso
+
+        self._addresses = []             # id -> endereço (None se livre)
+        self._address_ids = {}           # endereço -> id
+        self._free_addresses = []        # ids livres para reuso
+        self._pubkeys = []
+        self._pubkey_ids = {}
+        self._pubkey_refs = array('I')   # id -> nº de UTXOs com a chave
+        self._free_pubkeys = []
+        self._txid_names = {}            # txids não-hex (ex.: gênesis) pelo binário
+
+        # Índice secundário: id do endereço -> outpoints (dict usado como set
+        # ordenado) e saldo corrente em unidades base, mantidos por add/spend.
+        self._by_address = {}
+        self._balances = {}
+        # Listas (valor, outpoint) ordenadas por valor, criadas na primeira
+        # seleção de moedas do endereço e mantidas a partir daí.
+        self._by_amount = {}
+
+        # O estado foi trocado por inteiro: o próximo save grava um snapshot
+        self._deltas = []
+        self._needs_compaction = True
 
-        # Caminho absoluto para o arquivo data/utxos.json baseado neste arquivo
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # sobe de transactions/ para server/
-        self.utxos_file = os.path.join(base_dir, 'data', 'utxos.json')
+    def __len__(self):
+        return len(self._slots)
 
+    # ------------------------------------------------------------------ #
+    # Codificação interna
+    # ------------------------------------------------------------------ #
+    def _outpoint(self, txid, index, create=False):
+        try:
+            raw = bytes.fromhex(txid)
+            if len(raw) != 32 or raw.hex() != txid:
+                raise ValueError
+        except ValueError:
+            raw = hashlib.sha256(b'txid:' + txid.encode()).digest()
+            if create:
+                self._txid_names[raw] = txid
+        return raw + _OUTPOINT_INDEX.pack(index)
+
+    def _split_outpoint(self, outpoint):
+        raw = outpoint[:32]
+        txid = self._txid_names.get(raw) or raw.hex()
+        return txid, _OUTPOINT_INDEX.unpack(outpoint[32:])[0]
+
+    @staticmethod
+    def _intern(value, table, ids, free):
+        value_id = ids.get(value)
+        if value_id is None:
+            if free:
+                value_id = free.pop()
+                table[value_id] = value
+            else:
+                value_id = len(table)
+                table.append(value)
+            ids[value] = value_id
+        return value_id
+
+    @staticmethod
+    def _unintern(value_id, table, ids, free):
+        del ids[table[value_id]]
+        table[value_id] = None
+        free.append(value_id)
+
+    def _materialize(self, outpoint, slot):
+        txid, index = self._split_outpoint(outpoint)
+        return UTXO(
+            txid,
+            index,
+            self._addresses[self._address_col[slot]],
+            from_base_units(self._amount_col[slot]),
+            self._pubkeys[self._pubkey_col[slot]]
+        )
+
+    def _release(self, outpoint, slot):
+        address_id = self._address_col[slot]
+        outpoints = self._by_address[address_id]
+        del outpoints[outpoint]
+        if outpoints:
+            self._balances[address_id] -= self._amount_col[slot]
+            by_amount = self._by_amount.get(address_id)
+            if by_amount is not None:
+                del by_amount[bisect_left(by_amount, (self._amount_col[slot], outpoint))]
+        else:
+            # Último UTXO do endereço: o id do endereço fica livre
+            del self._by_address[address_id]
+            del self._balances[address_id]
+            self._by_amount.pop(address_id, None)
+            self._unintern(address_id, self._addresses, self._address_ids, self._free_addresses)
+        pubkey_id = self._pubkey_col[slot]
+        self._pubkey_refs[pubkey_id] -= 1
+        if not self._pubkey_refs[pubkey_id]:
+            self._unintern(pubkey_id, self._pubkeys, self._pubkey_ids, self._free_pubkeys)
+        self._free.append(slot)
+
+    # ------------------------------------------------------------------ #
+    # API
+    # ------------------------------------------------------------------ #
     def add_utxo(self, address, txid, index, amount, public_key):
-        if txid not in self.utxos:
-            self.utxos[txid] = {}
-        self.utxos[txid][index] = UTXO(txid, index, address, amount, public_key)
+        outpoint = self._outpoint(txid, index, create=True)
+        previous = self._slots.pop(outpoint, None)
+        if previous is not None:
+            self._release(outpoint, previous)
+
+        address_id = self._intern(address, self._addresses, self._address_ids, self._free_addresses)
+        pubkey_id = self._intern(public_key or '', self._pubkeys, self._pubkey_ids, self._free_pubkeys)
+        if pubkey_id == len(self._pubkey_refs):
+            self._pubkey_refs.append(1)
+        else:
+            self._pubkey_refs[pubkey_id] += 1
+        units = to_base_units(amount)
+
+        if self._free:
+            slot = self._free.pop()
+            self._address_col[slot] = address_id
+            self._amount_col[slot] = units
+            self._pubkey_col[slot] = pubkey_id
+        else:
+            slot = len(self._amount_col)
+            self._address_col.append(address_id)
+            self._amount_col.append(units)
+            self._pubkey_col.append(pubkey_id)
+
+        self._slots[outpoint] = slot
+        self._by_address.setdefault(address_id, {})[outpoint] = None
+        self._balances[address_id] = self._balances.get(address_id, 0) + units
+        by_amount = self._by_amount.get(address_id)
+        if by_amount is not None:
+            insort(by_amount, (units, outpoint))
+
+        # Com o conjunto inteiro para regravar, deltas não seriam usados
+        if not self._loading and not self._needs_compaction:
+            self._deltas.append({
+                'op': 'add', 'txid': txid, 'index': index,
+                'address': address, 'amount': amount, 'public_key': public_key or ''
+            })
 
     def spend_utxo(self, txid, index):
-        if txid in self.utxos and index in self.utxos[txid]:
-            del self.utxos[txid][index]
-            if not self.utxos[txid]:
-                del self.utxos[txid]
+        outpoint = self._outpoint(txid, index)
+        slot = self._slots.pop(outpoint, None)
+        if slot is not None:
+            self._release(outpoint, slot)
+            if not self._loading and not self._needs_compaction:
+                self._deltas.append({'op': 'spend', 'txid': txid, 'index': index})
 
     def get_utxo(self, txid, index):
-        return self.utxos.get(txid, {}).get(index)
+        outpoint = self._outpoint(txid, index)
+        slot = self._slots.get(outpoint)
+        if slot is None:
+            return None
+        return self._materialize(outpoint, slot)
+
+    def iter_utxos(self):
+        for outpoint, slot in self._slots.items():
+            yield self._materialize(outpoint, slot)
+
+    def to_serializable(self):
+        data = {}
+        for utxo in self.iter_utxos():
+            data.setdefault(utxo.txid, {})[str(utxo.index)] = utxo.to_dict()
+        return data
+
+    def load_serializable(self, data):
+        """Carrega o conjunto gravado em data (utxos.json). O estado é o que já
+        está no armazenamento: não fica pendente uma regravação inteira"""
+        self.clear()
+        self._needs_compaction = False
+        self._loading = True
+        try:
+            for txid, indexes in data.items():
+                for idx_str, utxo_dict in indexes.items():
+                    self.add_utxo(
+                        utxo_dict['address'],
+                        utxo_dict['txid'],
+                        int(idx_str),
+                        utxo_dict['amount'],
+                        utxo_dict['public_key']
+                    )
+        finally:
+            self._loading = False
+
+    def pending_changes(self):
+        """(estado trocado por inteiro?, deltas desde o último save)"""
+        return self._needs_compaction, self._deltas
+
+    def mark_persisted(self):
+        self._deltas = []
+        self._needs_compaction = False
+
+    def mark_unpersisted(self):
+        """A última gravação foi desfeita (ROLLBACK): o próximo save regrava tudo"""
+        self._deltas = []
+        self._needs_compaction = True
+
+    def replay(self, deltas):
+        """Reaplica deltas vindos do armazenamento, sem registrá-los de novo"""
+        self._loading = True
+        try:
+            for delta in deltas:
+                if delta['op'] == 'add':
+                    self.add_utxo(delta['address'], delta['txid'], delta['index'],
+                                  delta['amount'], delta['public_key'])
+                else:
+                    self.spend_utxo(delta['txid'], delta['index'])
+        finally:
+            self._loading = False
 
     def save_utxos(self):
-        os.makedirs(os.path.dirname(self.utxos_file), exist_ok=True)
-        with open(self.utxos_file, 'w') as f:
-            serializable = {
-                txid: {str(idx): utxo.to_dict() for idx, utxo in indexes.items()}
-                for txid, indexes in self.utxos.items()
-            }
-            json.dump(serializable, f, indent=2)
+        """Persiste as mudanças desde o último save"""
+        self.store.save(self)
+
+    def compact(self):
+        """Regrava o conjunto inteiro no armazenamento"""
+        self.store.compact(self)
 
     def load_utxos(self):
-        try:
-            with open(self.utxos_file, 'r') as f:
-                data = json.load(f)
-                self.utxos = {}
-                for txid, indexes in data.items():
-                    self.utxos[txid] = {}
-                    for idx_str, utxo_dict in indexes.items():
-                        idx = int(idx_str)
-                        utxo = UTXO(
-                            txid=utxo_dict['txid'],
-                            index=idx,
-                            address=utxo_dict['address'],
-                            amount=utxo_dict['amount'],
-                            public_key=utxo_dict['public_key']
-                        )
-                        self.utxos[txid][idx] = utxo
-                print(f"[DEBUG] UTXOs carregados: {len(self.utxos)} txids, total {sum(len(v) for v in self.utxos.values())} UTXOs")
-        except FileNotFoundError:
-            self.utxos = {}
-            print(f"[DEBUG] Arquivo {self.utxos_file} não encontrado, iniciando vazio")
+        self.store.load(self)
+
+    def utxos_by_amount(self, address):
+        """Lista (valor em unidades base, outpoint) do endereço, em ordem crescente.
+
+        É a estrutura interna: quem chama não deve alterá-la. Os outpoints
+        viram UTXOs com get_outpoint().
+        """
+        address_id = self._address_ids.get(address)
+        outpoints = self._by_address.get(address_id)
+        if not outpoints:
+            return []
+        by_amount = self._by_amount.get(address_id)
+        if by_amount is None:
+            by_amount = self._by_amount[address_id] = sorted(
+                (self._amount_col[self._slots[outpoint]], outpoint) for outpoint in outpoints
+            )
+        return by_amount
+
+    def get_outpoint(self, outpoint):
+        slot = self._slots.get(outpoint)
+        if slot is None:
+            return None
+        return self._materialize(outpoint, slot)
 
     def get_balance(self, address):
-        return sum(
-            utxo.amount
-            for txs in self.utxos.values()
-            for utxo in txs.values()
-            if utxo.address == address
-        )
+        address_id = self._address_ids.get(address)
+        return from_base_units(self._balances.get(address_id, 0))
 
     def find_utxos(self, address):
+        address_id = self._address_ids.get(address)
         return [
-            utxo
-            for txs in self.utxos.values()
-            for utxo in txs.values()
-            if utxo.address == address
+            self._materialize(outpoint, self._slots[outpoint])
+            for outpoint in self._by_address.get(address_id, ())
         ]
 
 # Assinatura
 def verify_signature(public_key_hex, msg, signature_hex):
     try:
-        pub_key_bytes = bytes.fromhex(public_key_hex)
-        signature_bytes = bytes.fromhex(signature_hex)
-        vk = VerifyingKey.from_string(pub_key_bytes, curve=SECP256k1)
         msg_hash = hashlib.sha256(msg.encode()).digest()
-        return vk.verify(signature_bytes, msg_hash, sigdecode=sigdecode_der, prehashed=True)
+        return verify_digest(public_key_hex, msg_hash, signature_hex, der=True)
     except (BadSignatureError, Exception):
         return False
 # Verificação de transação
@@ -118,9 +337,9 @@ def is_valid_transaction(tx, utxo_set):
 
         # Aqui você deve colocar o código que usa a biblioteca ecdsa pra verificar:
         try:
-            verifying_key = VerifyingKey.from_string(bytes.fromhex(public_key_hex), curve=SECP256k1)
-            # Verifica assinatura, usando verify_digest
-            verifying_key.verify_digest(bytes.fromhex(signature_hex), hashed_data)
+            # Chave decodificada e assinaturas já verificadas ficam em cache
+            # (transactions/sigcache): a montagem do bloco não refaz a conta
+            verify_digest(public_key_hex, hashed_data, signature_hex)
         except BadSignatureError:
             print(f"[DEBUG VALIDATION] Assinatura inválida para input {i}")
             return False, f"Assinatura inválida para input {i}"
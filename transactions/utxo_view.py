@@ -0,0 +1,175 @@
+# transactions/utxo_view.py
+# Camada copy-on-write sobre um UTXOSet.
+#
+# A camada guarda só o que mudou em relação à de baixo: saídas criadas
+# (_added) e outpoints da camada de baixo gastos aqui (_spent). Consultas
+# passam pela camada e caem na de baixo para o resto, e camadas podem ser
+# empilhadas (overlay()). commit() aplica as mudanças na camada de baixo e
+# discard() as joga fora, ambos em O(delta).
+#
+# A mempool é uma camada sobre o conjunto confirmado; montagem de bloco e
+# validação usam camadas descartáveis em cima dela ou da base.
+from transactions.utxo import UTXO
+from blockchain.encoding import to_base_units, from_base_units
+
+
+class UTXOView:
+    def __init__(self, parent):
+        self.parent = parent
+        base = parent
+        while isinstance(base, UTXOView):
+            base = base.parent
+        self.base = base            # UTXOSet confirmado no fundo da pilha
+        self.discard()
+
+    def discard(self):
+        """Descarta todas as mudanças da camada"""
+        self._added = {}            # outpoint -> UTXO criado nesta camada
+        self._spent = {}            # outpoint da camada de baixo -> UTXO gasto aqui
+        self._by_address = {}       # endereço -> {outpoint: None} dos criados
+        self._balance_delta = {}    # endereço -> variação do saldo em unidades base
+
+    def overlay(self):
+        return UTXOView(self)
+
+    def __len__(self):
+        return len(self.parent) - len(self._spent) + len(self._added)
+
+    def _outpoint(self, txid, index):
+        return self.base._outpoint(txid, index, create=True)
+
+    def _shift(self, address, units):
+        self._balance_delta[address] = self._balance_delta.get(address, 0) + units
+
+    # ------------------------------------------------------------------ #
+    # Escrita
+    # ------------------------------------------------------------------ #
+    def add_utxo(self, address, txid, index, amount, public_key):
+        outpoint = self._outpoint(txid, index)
+        if self.get_outpoint(outpoint) is not None:
+            # Mesmo comportamento do UTXOSet: a saída nova substitui a antiga
+            self._spend(outpoint)
+        utxo = UTXO(txid, index, address, amount, public_key or '')
+        self._added[outpoint] = utxo
+        self._by_address.setdefault(address, {})[outpoint] = None
+        self._shift(address, to_base_units(amount))
+
+    def spend_utxo(self, txid, index):
+        self._spend(self._outpoint(txid, index))
+
+    def restore(self, txid, index):
+        """Desfaz um gasto feito nesta camada sobre a camada de baixo"""
+        utxo = self._spent.pop(self._outpoint(txid, index), None)
+        if utxo is not None:
+            self._shift(utxo.address, to_base_units(utxo.amount))
+
+    def _spend(self, outpoint):
+        utxo = self._added.pop(outpoint, None)
+        if utxo is not None:
+            outpoints = self._by_address[utxo.address]
+            del outpoints[outpoint]
+            if not outpoints:
+                del self._by_address[utxo.address]
+        elif outpoint not in self._spent:
+            utxo = self.parent.get_outpoint(outpoint)
+            if utxo is None:
+                return
+            self._spent[outpoint] = utxo
+        else:
+            return
+        self._shift(utxo.address, -to_base_units(utxo.amount))
+
+    def commit(self):
+        """Aplica as mudanças na camada de baixo e esvazia esta.
+
+        Retorna uma função que desfaz a aplicação na camada de baixo (usada
+        quando o atomic() em volta é desfeito).
+        """
+        spent, added, parent = self._spent, self._added, self.parent
+        for utxo in spent.values():
+            parent.spend_utxo(utxo.txid, utxo.index)
+        for utxo in added.values():
+            parent.add_utxo(utxo.address, utxo.txid, utxo.index, utxo.amount, utxo.public_key)
+        self.discard()
+
+        def undo():
+            for utxo in added.values():
+                parent.spend_utxo(utxo.txid, utxo.index)
+            for utxo in spent.values():
+                parent.add_utxo(utxo.address, utxo.txid, utxo.index, utxo.amount, utxo.public_key)
+        return undo
+
+    def settle(self, tx):
+        """tx, aplicada nesta camada, acabou de ser aplicada também na de baixo
+        (bloco conectado): remove o delta dela daqui em O(inputs + outputs).
+
+        Os gastos dela agora valem na camada de baixo. As saídas também:
+        as que ninguém gastou saem de _added, e as já gastas por outra
+        pendente passam a ser gastos sobre a camada de baixo.
+        """
+        for inp in tx.get('inputs', []):
+            self.restore(inp['txid'], inp['index'])
+        for idx in range(len(tx.get('outputs', []))):
+            self.spend_utxo(tx['txid'], idx)
+
+    def save_utxos(self):
+        """Nada a gravar: o estado pendente é reconstruído a partir da mempool"""
+        pass
+
+    # ------------------------------------------------------------------ #
+    # Leitura
+    # ------------------------------------------------------------------ #
+    def get_outpoint(self, outpoint):
+        utxo = self._added.get(outpoint)
+        if utxo is not None:
+            return utxo
+        if outpoint in self._spent:
+            return None
+        return self.parent.get_outpoint(outpoint)
+
+    def get_utxo(self, txid, index):
+        return self.get_outpoint(self._outpoint(txid, index))
+
+    def iter_utxos(self):
+        for utxo in self.parent.iter_utxos():
+            if self._outpoint(utxo.txid, utxo.index) not in self._spent:
+                yield utxo
+        yield from self._added.values()
+
+    def get_balance(self, address):
+        units = to_base_units(self.parent.get_balance(address)) + self._balance_delta.get(address, 0)
+        return from_base_units(units)
+
+    def find_utxos(self, address):
+        utxos = self.parent.find_utxos(address)
+        if self._spent:
+            utxos = [u for u in utxos if self._outpoint(u.txid, u.index) not in self._spent]
+        utxos.extend(self._added[outpoint] for outpoint in self._by_address.get(address, ()))
+        return utxos
+
+    def utxos_by_amount(self, address):
+        """Mesma lista (valor, outpoint) crescente do UTXOSet, vista por esta camada"""
+        coins = self.parent.utxos_by_amount(address)
+        if address not in self._balance_delta:
+            return coins
+        if self._spent:
+            coins = [coin for coin in coins if coin[1] not in self._spent]
+        added = self._by_address.get(address)
+        if added:
+            coins = sorted(coins + [(to_base_units(self._added[op].amount), op) for op in added])
+        return coins
+
+
+def apply_transaction(utxos, tx):
+    """Gasta os inputs e cria os outputs de tx em utxos (UTXOSet ou camada).
+
+    Levanta exceção se algum input não existir; para não deixar a
+    transação aplicada pela metade, use numa camada descartável.
+    """
+    for inp in tx.get('inputs', []):
+        if utxos.get_utxo(inp['txid'], inp['index']) is None:
+            raise Exception(f"UTXO {inp['txid']}:{inp['index']} não encontrado ou já gasto")
+        utxos.spend_utxo(inp['txid'], inp['index'])
+    for idx, out in enumerate(tx.get('outputs', [])):
+        public_key = out.get('public_key', '') or out.get('locking_script', '')
+        utxos.add_utxo(out['address'], tx['txid'], idx, out['amount'], public_key)